@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Connect237 - Serialization benchmark (before/after per endpoint)
+
+"before" is FastAPI's stock path: jsonable_encoder + JSONResponse.render.
+"after" is the orjson path used by the API: ORJSONResponse.render on the raw
+payload (dicts, Pydantic models, datetimes).  Catalog endpoints served from the
+shared segment return a prebuilt ``Response``: "after" is its body as is, and
+"before" encodes the same document the stock way.
+
+Catalog endpoints are benchmarked on the real handler payloads; database backed
+endpoints use synthetic documents shaped like what Mongo returns.
+
+Usage: python benchmarks/bench_serialization.py [--number 200] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "connect237_bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+
+from models import AdminDashboardStats, UserRegistration, Vehicle  # noqa: E402
+from routers import booking, catalog, general, search, tracking  # noqa: E402
+from serialization import ORJSONResponse  # noqa: E402
+
+
+def synthetic_vehicles(count):
+    now = datetime.utcnow()
+    return [
+        Vehicle(
+            agency_id=str(uuid.uuid4()),
+            agency_name="General Express Voyages",
+            model="Coaster",
+            brand="Toyota",
+            year=2018,
+            color="Blanc",
+            license_plate=f"LT-{i:04d}-A",
+            capacity=30,
+            vehicle_type="bus",
+            driver_name="Jean Mbarga",
+            driver_phone="+237677000000",
+            last_maintenance=now - timedelta(days=i % 90),
+        ).model_dump()
+        for i in range(count)
+    ]
+
+
+def synthetic_registrations(count):
+    return [
+        UserRegistration(
+            user_type="agency" if i % 3 else "client",
+            personal_info={"name": f"Utilisateur {i}", "phone": "+237699000000", "email": f"user{i}@connect237.cm"},
+            documents=[{"type": "cni", "verified": False}],
+        ).model_dump()
+        for i in range(count)
+    ]
+
+
+def endpoint_payloads():
+    """(endpoint, payload) pairs, payload as the handler hands it to the response"""
+    run = asyncio.run
+    payloads = [
+        ("GET /api/", run(general.root())),
+        ("GET /api/agencies", run(catalog.get_transport_agencies())),
+        ("GET /api/agencies/premium", run(catalog.get_premium_agencies())),
+        ("GET /api/weather/cities", run(catalog.get_all_weather())),
+        ("GET /api/weather/{city}", run(catalog.get_city_weather("Douala"))),
+        ("GET /api/attractions", run(catalog.get_tourist_attractions())),
+        ("GET /api/tracking/{vehicle_id}", run(tracking.track_vehicle("VH001"))),
+        ("GET /api/tracking/route/{route_id}", run(tracking.track_route_vehicles("R1"))),
+        ("GET /api/payment/calculator", run(booking.payment_calculator(
+            base_price=5000, passenger_count=2, custom_count=None,
+            courier_services=1, package_value=20000, payment_type="full"))),
+        ("GET /api/cities/enhanced", run(catalog.get_enhanced_cities())),
+        ("GET /api/routes/search-smart-ai", run(search.smart_ai_search(
+            q="dou", origin="Douala", destination="Yaoundé", date=None, passengers=1))),
+        ("GET /api/administrative-structure", run(catalog.get_administrative_structure())),
+        ("GET /api/admin/vehicles", {"vehicles": synthetic_vehicles(200), "total": 200}),
+        ("GET /api/admin/dashboard", {
+            "dashboard_stats": AdminDashboardStats(
+                total_users=1200, pending_verifications=40, total_bookings=5000,
+                revenue_today=150000, active_vehicles=30, courier_deliveries=800),
+            "recent_activities": {"bookings": [], "registrations": synthetic_registrations(5)},
+        }),
+        ("GET /api/registration/status/{id}", {
+            "registration_id": "x", "status": "pending", "user_type": "client",
+            "created_at": datetime.utcnow(), "verified_at": None,
+        }),
+    ]
+    return payloads
+
+
+def before(payload):
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def after(payload):
+    if isinstance(payload, Response):
+        return payload.body
+    return ORJSONResponse(payload).body
+
+
+def measure(fn, payload, number):
+    fn(payload)  # warm up
+    start = time.perf_counter()
+    for _ in range(number):
+        fn(payload)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200, help="iterations per endpoint")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'endpoint':40} {'bytes':>8} {'before µs':>11} {'after µs':>10} {'speedup':>8}")
+    for endpoint, payload in endpoint_payloads():
+        # Prebuilt responses: the stock path would encode the document they hold
+        document = json.loads(payload.body) if isinstance(payload, Response) else payload
+        # Both paths must produce the same document
+        assert json.loads(before(document)) == json.loads(after(payload)), endpoint
+        before_us = measure(before, document, args.number)
+        after_us = measure(after, payload, args.number)
+        size = len(after(payload))
+        results.append({
+            "endpoint": endpoint,
+            "bytes": size,
+            "before_us": round(before_us, 2),
+            "after_us": round(after_us, 2),
+            "speedup": round(before_us / after_us, 2),
+        })
+        print(f"{endpoint:40} {size:>8} {before_us:>11.1f} {after_us:>10.1f} {before_us / after_us:>7.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"timestamp": datetime.utcnow().isoformat(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Connect237 - Load generation benchmark
+
+Drives the API with concurrent clients using a traffic mix and reports
+latency percentiles and throughput per endpoint.
+
+Targets:
+  in-process (default)   the FastAPI app through httpx's ASGI transport
+  --base-url URL         a running server, e.g. a local uvicorn
+
+Storage (in-process only):
+  --mongo memory (default)  in-memory repository backend, no Mongo needed
+  --mongo real              MONGO_URL / DB_NAME from the environment
+
+Traffic mixes are weighted request classes modelled on production traffic:
+catalog reads, smart search, booking/parcel writes and tracking polls.
+Use --mix realistic|read-heavy|write-heavy or e.g. --mix catalog=5,search=3.
+
+Results go to --output (JSON).  --baseline FILE compares against a stored run
+and exits 1 when an endpoint's p95 or throughput regresses by more than
+--threshold percent; --save-baseline writes the run as the new baseline.
+
+Usage:
+  python benchmarks/loadgen.py --duration 20 --concurrency 32 --mix realistic \\
+      --baseline benchmarks/baselines/loadgen.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "loadgen.json"
+
+MIXES = {
+    "realistic": {"catalog": 40, "search": 30, "tracking": 20, "booking": 10},
+    "read-heavy": {"catalog": 60, "search": 25, "tracking": 15},
+    "write-heavy": {"booking": 60, "search": 20, "catalog": 20},
+}
+
+CITIES = ["Yaoundé", "Douala", "Bafoussam", "Bamenda", "Bertoua", "Garoua", "Maroua", "Ngaoundéré", "Kribi", "Limbe"]
+REGIONS = ["Centre", "Littoral", "Ouest", "Nord-Ouest", "Est", "Nord", "Extrême-Nord", "Adamaoua", "Sud", "Sud-Ouest"]
+
+
+# === REQUEST CLASSES ===
+# Each returns (endpoint label, method, url, json body or None)
+
+def catalog_request(rng):
+    choice = rng.random()
+    if choice < 0.25:
+        return "GET /api/cities/enhanced", "GET", "/api/cities/enhanced", None
+    if choice < 0.45:
+        return "GET /api/agencies", "GET", "/api/agencies", None
+    if choice < 0.60:
+        return "GET /api/weather/cities", "GET", "/api/weather/cities", None
+    if choice < 0.75:
+        return "GET /api/attractions", "GET", "/api/attractions", None
+    if choice < 0.90:
+        return "GET /api/cities/{region}", "GET", f"/api/cities/{rng.choice(REGIONS)}", None
+    return "GET /api/administrative-structure", "GET", "/api/administrative-structure", None
+
+
+def search_request(rng):
+    origin, destination = rng.sample(CITIES, 2)
+    travel_date = (date.today() + timedelta(days=rng.randint(0, 14))).isoformat()
+    params = {"q": origin[:3], "origin": origin, "destination": destination,
+              "date": travel_date, "passengers": rng.randint(1, 4)}
+    return "GET /api/routes/search-smart-ai", "GET", f"/api/routes/search-smart-ai?{httpx.QueryParams(params)}", None
+
+
+def tracking_request(rng):
+    if rng.random() < 0.6:
+        return "GET /api/tracking/{vehicle_id}", "GET", f"/api/tracking/VH{rng.randint(1, 500):04d}", None
+    return "GET /api/tracking/route/{route_id}", "GET", f"/api/tracking/route/R{rng.randint(1, 40)}", None
+
+
+def departure_time(rng, origin, destination, day):
+    """A departure the timetable runs, so bookings on served routes are not refused"""
+    import catalog
+
+    departures = catalog.store.snapshot.timetable.departures(origin, destination, day)
+    if departures:
+        return rng.choice(departures)["departure_time"]
+    return rng.choice(["06:00", "09:00", "12:00", "15:00", "18:00"])
+
+
+def booking_request(rng):
+    origin, destination = rng.sample(CITIES, 2)
+    choice = rng.random()
+    if choice < 0.6:
+        day = date.today() + timedelta(days=rng.randint(1, 14))
+        body = {
+            "user_id": f"load-{uuid.uuid4().hex[:8]}",
+            "agency_id": "general-express",
+            "route_details": {"id": f"{origin}-{destination}", "price": rng.choice([3500, 4500, 6000, 7500])},
+            "passenger_count": rng.randint(1, 4),
+            "departure_date": day.isoformat(),
+            "departure_time": departure_time(rng, origin, destination, day),
+            "pickup_location": {"address": origin},
+            "dropoff_location": {"address": destination},
+            "payment_method": rng.choice([
+                {"type": "reservation"},
+                {"type": "mobile_money", "provider": "MTN"},
+                {"type": "mobile_money", "provider": "ORANGE"},
+            ]),
+        }
+        return "POST /api/booking/enhanced", "POST", "/api/booking/enhanced", body
+    body = {
+        "sender_id": f"load-{uuid.uuid4().hex[:8]}",
+        "recipient_name": "Destinataire Test",
+        "recipient_phone": "+237699000000",
+        "origin": origin,
+        "destination": destination,
+        "pickup_address": f"Centre-ville, {origin}",
+        "delivery_address": f"Marché central, {destination}",
+        "package_type": rng.choice(["documents", "clothes", "electronics", "food"]),
+        "weight_kg": round(rng.uniform(0.5, 25), 1),
+        "declared_value": rng.randint(5000, 200000),
+        "urgent": rng.random() < 0.2,
+        "insurance": rng.random() < 0.5,
+    }
+    if choice < 0.8:
+        return "POST /api/parcel-delivery", "POST", "/api/parcel-delivery", body
+    return "POST /api/courier/book", "POST", "/api/courier/book", body
+
+
+REQUEST_CLASSES = {
+    "catalog": catalog_request,
+    "search": search_request,
+    "tracking": tracking_request,
+    "booking": booking_request,
+}
+
+
+def parse_mix(value):
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in REQUEST_CLASSES:
+            raise SystemExit(f"unknown request class {name!r}; choose from {', '.join(REQUEST_CLASSES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# === TARGET SETUP ===
+
+def in_process_app(mongo):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "connect237_loadgen")
+    import server
+    from repositories import MemoryBackend, repos
+
+    if mongo == "memory":
+        repos.use_backend(MemoryBackend())
+
+    # server.py configures INFO logging; one line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return server.app
+
+
+# === RUN ===
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(client, mix, concurrency, duration, max_requests, seed):
+    classes = list(mix)
+    weights = [mix[name] for name in classes]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    round_trips = defaultdict(list)
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(worker_id):
+        nonlocal issued
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            request_class = rng.choices(classes, weights)[0]
+            label, method, url, body = REQUEST_CLASSES[request_class](rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 400
+                if "x-db-round-trips" in response.headers:
+                    round_trips[label].append(int(response.headers["x-db-round-trips"]))
+            except httpx.HTTPError:
+                ok = False
+            latencies[label].append(time.perf_counter() - start)
+            if not ok:
+                errors[label] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, round_trips, time.perf_counter() - start
+
+
+def summarize(latencies, errors, round_trips, elapsed):
+    endpoints = {}
+    all_latencies = []
+    for label, values in sorted(latencies.items()):
+        values.sort()
+        all_latencies.extend(values)
+        endpoints[label] = {
+            "requests": len(values),
+            "errors": errors.get(label, 0),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+        if round_trips.get(label):
+            endpoints[label]["db_round_trips"] = round(sum(round_trips[label]) / len(round_trips[label]), 2)
+    all_latencies.sort()
+    total = {
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(all_latencies) / elapsed, 2),
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 3),
+    }
+    return endpoints, total
+
+
+def compare(result, baseline, threshold):
+    """Endpoints whose p95 grew or throughput dropped by more than threshold %"""
+    regressions = []
+    for label, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold / 100):
+            regressions.append(f"{label}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold / 100):
+            regressions.append(
+                f"{label}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s"
+            )
+        # Round trips per request are deterministic: any increase is a real change
+        if current.get("db_round_trips", 0) > previous.get("db_round_trips", current.get("db_round_trips", 0)):
+            regressions.append(
+                f"{label}: DB round trips {previous['db_round_trips']:.2f} -> {current['db_round_trips']:.2f} per request"
+            )
+    return regressions
+
+
+def print_report(endpoints, total):
+    print(f"{'endpoint':38} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db rt':>6}")
+    for label, stats in endpoints.items():
+        print(f"{label:38} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats.get('db_round_trips', 0):>6.2f}")
+    print(f"{'TOTAL':38} {total['requests']:>7} {total['errors']:>5} {total['throughput_rps']:>8.1f} "
+          f"{total['p50_ms']:>8.2f} {total['p95_ms']:>8.2f} {total['p99_ms']:>8.2f}")
+
+
+async def main_async(args):
+    mix = parse_mix(args.mix)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        target = args.base_url
+    else:
+        app = in_process_app(args.mongo)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen",
+                                   timeout=args.timeout)
+        target = f"in-process (mongo={args.mongo})"
+
+    async with client:
+        if args.warmup:
+            await run_load(client, mix, args.concurrency, args.warmup, 0, args.seed + 10_000)
+        latencies, errors, round_trips, elapsed = await run_load(
+            client, mix, args.concurrency, args.duration, args.requests, args.seed
+        )
+
+    endpoints, total = summarize(latencies, errors, round_trips, elapsed)
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "target": target,
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "endpoints": endpoints,
+        "total": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--mongo", choices=["memory", "real"], default="memory")
+    parser.add_argument("--mix", default="realistic", help=f"{', '.join(MIXES)} or class=weight,...")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 = no limit)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=237)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE),
+                        help=f"store this run as the baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print(f"target: {result['target']}  mix: {result['mix']}  concurrency: {args.concurrency}")
+    print_report(result["endpoints"], result["total"])
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.threshold:.0f}% vs {args.baseline}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
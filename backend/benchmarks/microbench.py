@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Connect237 - Micro-benchmarks of the hot pure functions
+
+Times the functions behind the busiest endpoints on synthetic catalogs at 1x,
+10x and 100x the current city and agency counts:
+
+  generate_weather_data, simulate_gps_tracking
+  courier_price, payment_breakdown          (pricing.py)
+  match_cities, find_routes                 (smart search)
+  plan                                      (journey planner, with connections)
+  dispatch.assign                           (5,000 parcels over 300 carriers)
+  routing.optimize                          (a courier round of 60 stops)
+  gazetteer.resolve                         (1,000 free-text addresses)
+  enhanced_cities                           (/api/cities/enhanced)
+
+For every benchmark and scale it reports ops/sec (best of --rounds), the mean
+time per call, and allocations per call measured with tracemalloc: the peak
+bytes allocated during one call, and the number of memory blocks still
+allocated once the call returns, including the result.  Each run is appended
+as one JSON line to the history file, so runs can be compared over time.
+
+Usage:
+  python benchmarks/microbench.py                      # all benchmarks, all scales
+  python benchmarks/microbench.py -k search --scales 1,100
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "connect237_bench")
+
+import catalog  # noqa: E402
+from dispatch import CarrierIndex, assign  # noqa: E402
+from gazetteer import words  # noqa: E402
+from pricing import courier_price, payment_breakdown  # noqa: E402
+from routers.catalog import enhanced_cities  # noqa: E402
+from routers.search import find_routes, match_cities  # noqa: E402
+from routing import optimize  # noqa: E402
+from simulation import generate_weather_data, simulate_gps_tracking  # noqa: E402
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "results" / "microbench-history.jsonl"
+
+
+# === SYNTHETIC FIXTURES ===
+
+def scaled_snapshot(scale: int) -> catalog.CatalogSnapshot:
+    """The real catalog with cities and agencies replicated ``scale`` times.
+
+    Copies get a numeric suffix ("Douala 7") so name lookups stay distinct
+    while the substring workload (regions, route names) keeps its shape.
+    """
+    base = catalog.read_snapshot()["data"]
+    if scale == 1:
+        return catalog.CatalogSnapshot(base, f"bench-x{scale}", 0)
+
+    cities, agencies = list(base["cities"]), list(base["agencies"])
+    for copy in range(2, scale + 1):
+        cities.extend({**city, "name": f"{city['name']} {copy}"} for city in base["cities"])
+        agencies.extend(
+            {
+                **agency,
+                "registration_number": f"{agency['registration_number']}-{copy}",
+                "name": f"{agency['name']} {copy}",
+                "routes_served": [f"{route} {copy}" for route in agency.get("routes_served", [])],
+            }
+            for agency in base["agencies"]
+        )
+    schedules = list(base["timetables"]["schedules"])
+    for copy in range(2, scale + 1):
+        schedules.extend(
+            {
+                **schedule,
+                "id": f"{schedule['id']}-{copy}",
+                "agency": f"{schedule['agency']} {copy}",
+                "origin": f"{schedule['origin']} {copy}",
+                "destination": f"{schedule['destination']} {copy}",
+            }
+            for schedule in base["timetables"]["schedules"]
+        )
+    data = {
+        **base, "cities": cities, "agencies": agencies,
+        "timetables": {**base["timetables"], "schedules": schedules},
+    }
+    return catalog.CatalogSnapshot(data, f"bench-x{scale}", 0)
+
+
+# === BENCHMARKS ===
+# Each factory takes a snapshot and returns the zero-argument callable to time
+
+def bench_generate_weather_data(snapshot):
+    cities = snapshot.major_cities
+    state = {"i": 0}
+
+    def run():
+        city = cities[state["i"] % len(cities)]
+        state["i"] += 1
+        return generate_weather_data(city["name"], city["region"])
+    return run
+
+
+def bench_simulate_gps_tracking(snapshot):
+    return lambda: simulate_gps_tracking("VH0042")
+
+
+def bench_courier_price(snapshot):
+    return lambda: courier_price(7.5, 85000, True, True)
+
+
+def bench_payment_breakdown(snapshot):
+    return lambda: payment_breakdown(4500, 3, None, 2, 60000)
+
+
+def bench_match_cities(snapshot):
+    return lambda: match_cities(snapshot, "bam")
+
+
+def bench_find_routes(snapshot):
+    day = date.today()
+    return lambda: find_routes(snapshot, "Yaoundé", "Douala", day)
+
+
+def bench_plan(snapshot):
+    day = date.today()
+    return lambda: snapshot.planner.plan("Kribi", "Maroua", day)
+
+
+def bench_dispatch_assign(snapshot):
+    rng = random.Random(42)
+    cities = [city["name"] for city in snapshot.major_cities]
+    areas = cities + sorted({city["region"] for city in snapshot.major_cities})
+    carriers = [
+        {"id": str(index), "vehicle_type": rng.choice(["moto", "car", "van"]),
+         "coverage_areas": [rng.choice(areas)], "rating": rng.uniform(3, 5)}
+        for index in range(300)
+    ]
+    parcels = [("parcels", {"id": str(index), "origin": rng.choice(cities), "weight_kg": rng.uniform(0.5, 25)})
+               for index in range(5000)]
+    # Loads grow as parcels are assigned: start from a fresh index every call
+    return lambda: assign(CarrierIndex(carriers), parcels)
+
+
+def bench_routing_optimize(snapshot):
+    rng = random.Random(42)
+    points = [(4.05 + rng.uniform(-0.06, 0.06), 9.7 + rng.uniform(-0.06, 0.06)) for _ in range(61)]
+    # Odd stops are pickups, each followed by its delivery
+    pickup_of = {index + 1: index for index in range(1, 60, 2)}
+    return lambda: optimize(points, pickup_of, budget_ms=10000)
+
+
+def bench_gazetteer_resolve(snapshot):
+    rng = random.Random(42)
+    quarters = [quarter["name"] for city in snapshot.quarters.values() for quarter in city]
+    addresses = [words(f"{rng.randint(1, 300)} rue {rng.choice(['Foch', 'de la Joie'])}, {rng.choice(quarters)}")
+                 for _ in range(1000)]
+    gazetteer = snapshot.gazetteer
+    return lambda: [gazetteer.resolve(address, "douala") for address in addresses]
+
+
+def bench_enhanced_cities(snapshot):
+    return lambda: enhanced_cities(snapshot)
+
+
+BENCHMARKS = {
+    "generate_weather_data": (bench_generate_weather_data, False),
+    "simulate_gps_tracking": (bench_simulate_gps_tracking, False),
+    "courier_price": (bench_courier_price, False),
+    "payment_breakdown": (bench_payment_breakdown, False),
+    "search.match_cities": (bench_match_cities, True),
+    "search.find_routes": (bench_find_routes, True),
+    "planner.plan": (bench_plan, True),
+    "dispatch.assign": (bench_dispatch_assign, False),
+    "routing.optimize": (bench_routing_optimize, False),
+    "gazetteer.resolve": (bench_gazetteer_resolve, False),
+    "enhanced_cities": (bench_enhanced_cities, True),
+}
+# The flag marks benchmarks whose cost depends on the catalog size; the others
+# run once, at scale 1
+
+
+# === MEASUREMENT ===
+
+def calibrate(fn, min_time: float) -> int:
+    """Iterations needed for one round to last at least ``min_time`` seconds"""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return iterations
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def measure_allocations(fn) -> dict:
+    fn()  # warm caches and lazily created objects first
+    tracemalloc.start()
+    try:
+        before_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks_before = sys.getallocatedblocks()
+        result = fn()
+        blocks_after = sys.getallocatedblocks()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {"alloc_peak_bytes": peak - before_bytes, "alloc_blocks": blocks_after - blocks_before}
+
+
+def run_benchmark(fn, rounds: int, min_time: float) -> dict:
+    iterations = calibrate(fn, min_time)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - start) / iterations)
+    best = min(timings)
+    return {
+        "ops_per_sec": round(1 / best, 1),
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 3),
+        "best_us": round(best * 1e6, 3),
+        "iterations": iterations,
+        **measure_allocations(fn),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def last_run(history: Path):
+    if not history.exists():
+        return None
+    lines = history.read_text().strip().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keyword", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--scales", default="1,10,100", help="catalog scale factors, comma separated")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per round")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON lines file the run is appended to")
+    parser.add_argument("--no-history", action="store_true", help="do not record this run")
+    args = parser.parse_args()
+
+    scales = [int(value) for value in args.scales.split(",")]
+    snapshots = {scale: scaled_snapshot(scale) for scale in scales}
+    history = Path(args.history)
+    previous = {(r["name"], r["scale"]): r for r in (last_run(history) or {}).get("results", [])}
+
+    print(f"{'benchmark':24} {'scale':>5} {'cities':>7} {'ops/sec':>12} {'mean µs':>10} "
+          f"{'peak B':>9} {'blocks':>7} {'vs last':>8}")
+    results = []
+    for name, (factory, scales_with_catalog) in BENCHMARKS.items():
+        if args.keyword not in name:
+            continue
+        for scale in scales if scales_with_catalog else scales[:1]:
+            snapshot = snapshots[scale]
+            stats = run_benchmark(factory(snapshot), args.rounds, args.min_time)
+            result = {"name": name, "scale": scale, "cities": len(snapshot.cities),
+                      "agencies": len(snapshot.agencies), **stats}
+            results.append(result)
+
+            change = ""
+            before = previous.get((name, scale))
+            if before:
+                change = f"{(stats['ops_per_sec'] / before['ops_per_sec'] - 1) * 100:+.1f}%"
+            print(f"{name:24} {scale:>4}x {len(snapshot.cities):>7} {stats['ops_per_sec']:>12,.1f} "
+                  f"{stats['mean_us']:>10.2f} {stats['alloc_peak_bytes']:>9} {stats['alloc_blocks']:>7} {change:>8}")
+
+    if not args.no_history:
+        history.parent.mkdir(parents=True, exist_ok=True)
+        run = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with history.open("a") as handle:
+            handle.write(json.dumps(run, ensure_ascii=False) + "\n")
+        print(f"\nrecorded in {history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Connect237 - Startup time report
+
+1. Import breakdown: runs ``python -X importtime -c "import server"`` and lists
+   the top-level packages that spend the most time importing (self time of
+   every module summed per package).
+2. Time to first request: spawns ``uvicorn server:app`` on a free local port and
+   polls ``GET /api/`` until it answers, then times the first catalog request
+   (which pays for the lazy catalog load).
+
+No database is needed: the Motor client connects lazily.
+
+Usage: python benchmarks/startup_report.py [--runs 3] [--top 15] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "connect237_startup")
+    return env
+
+
+def import_breakdown(top):
+    """Self import time (ms) summed per top-level package, largest first"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True,
+    )
+    packages = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, module = match.groups()
+            packages[module.split(".")[0]] += int(self_us)
+    total_ms = sum(packages.values()) / 1000
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return round(total_ms, 1), [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in ranked[:top]]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        response.read()
+        return response.status
+
+
+def time_to_first_request(timeout=30.0):
+    """Seconds from process spawn to the first 200 from /api/, plus first catalog request"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}/api"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=child_env(),
+    )
+    try:
+        while True:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError("server did not answer in time")
+            try:
+                if get(f"{base}/") == 200:
+                    break
+            except OSError:
+                time.sleep(0.01)
+        first_request = time.perf_counter() - start
+
+        catalog_start = time.perf_counter()
+        get(f"{base}/cities/enhanced")
+        first_catalog = time.perf_counter() - catalog_start
+        return first_request, first_catalog
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="uvicorn cold starts to average")
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the import breakdown")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    total_ms, packages = import_breakdown(args.top)
+    print(f"import server: {total_ms:.1f} ms total")
+    for entry in packages:
+        print(f"  {entry['package']:30} {entry['self_ms']:>8.1f} ms")
+
+    runs = [time_to_first_request() for _ in range(args.runs)]
+    first_request_ms = statistics.median(run[0] for run in runs) * 1000
+    first_catalog_ms = statistics.median(run[1] for run in runs) * 1000
+    print(f"time to first request (median of {args.runs}): {first_request_ms:.0f} ms")
+    print(f"first /api/cities/enhanced after boot: {first_catalog_ms:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "import_total_ms": total_ms,
+                "import_breakdown": packages,
+                "time_to_first_request_ms": round(first_request_ms, 1),
+                "first_catalog_request_ms": round(first_catalog_ms, 1),
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Connect237 - Per-worker memory as the number of uvicorn workers grows
+
+Starts `uvicorn server:app --workers N` for each N, warms every worker with
+catalog traffic, then reads /proc/<pid>/smaps_rollup for each worker:
+
+  RSS      resident pages, including pages shared with other processes
+  PSS      proportional share: shared pages divided among their users
+  private  pages only this worker holds (what each extra worker really costs)
+
+With the catalog in the shared segment, private memory per worker should
+stay flat as workers are added.  The run also checks that all workers serve
+the same catalog version and the same weather for a city.
+
+Runs with the in-memory repository backend, so no Mongo is needed.  Linux only.
+
+Usage:
+  python benchmarks/worker_memory.py --workers 1,2,4,8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+WARMUP_PATHS = [
+    "/api/agencies", "/api/attractions", "/api/cities/enhanced", "/api/weather/cities",
+    "/api/administrative-structure", "/api/routes/search-smart-ai?q=dou&origin=Yaound%C3%A9&destination=Douala",
+]
+
+
+def children(pid: int):
+    """Direct child process ids"""
+    result = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            result.append(int(stat.parent.name))
+    return result
+
+
+def smaps_rollup(pid: int) -> dict:
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        values[name] = int(value.split()[0])  # kB
+    return {
+        "rss_kb": values["Rss"],
+        "pss_kb": values["Pss"],
+        "private_kb": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def get(url: str):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.headers, response.read()
+
+
+def wait_ready(base_url: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            get(base_url + "/health/live")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def measure(workers: int, port: int, requests_per_worker: int) -> dict:
+    env = {**os.environ, "REPOSITORY_BACKEND": "memory"}
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "connect237_bench")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url, 60)
+        versions, weathers = set(), set()
+        for index in range(requests_per_worker * workers):
+            headers, _ = get(base_url + WARMUP_PATHS[index % len(WARMUP_PATHS)])
+            versions.add(headers["x-catalog-version"])
+            _, body = get(base_url + "/api/weather/Douala")
+            weathers.add(body)
+        time.sleep(0.5)
+
+        worker_pids = children(server.pid)
+        # With one worker uvicorn serves from the main process
+        stats = [smaps_rollup(pid) for pid in worker_pids] if workers > 1 else [smaps_rollup(server.pid)]
+        average = {key: sum(s[key] for s in stats) // len(stats) for key in stats[0]}
+        return {
+            "workers": workers,
+            "processes_measured": len(stats),
+            **{f"avg_{key}": value for key, value in average.items()},
+            "total_pss_kb": sum(s["pss_kb"] for s in stats),
+            "catalog_versions": len(versions),
+            "distinct_weather": len(weathers),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4,8", help="worker counts to measure")
+    parser.add_argument("--port", type=int, default=8321)
+    parser.add_argument("--requests", type=int, default=30, help="warm-up requests per worker")
+    parser.add_argument("--output", help="write the results JSON here")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'workers':>7} {'avg RSS MB':>11} {'avg PSS MB':>11} {'avg private MB':>15} {'versions':>9} {'weather':>8}")
+    for workers in (int(value) for value in args.workers.split(",")):
+        result = measure(workers, args.port, args.requests)
+        results.append(result)
+        print(f"{workers:>7} {result['avg_rss_kb'] / 1024:>11.1f} {result['avg_pss_kb'] / 1024:>11.1f} "
+              f"{result['avg_private_kb'] / 1024:>15.1f} {result['catalog_versions']:>9} {result['distinct_weather']:>8}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
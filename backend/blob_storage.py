@@ -0,0 +1,214 @@
+"""Content-addressed storage for uploaded documents.
+
+Blobs are keyed by the SHA-256 of their content.  The hash is computed chunk
+by chunk while the upload is copied into the store, so memory use does not
+depend on the file size, and storing the same file twice keeps one copy.
+Records such as registrations only hold the hash and metadata.
+
+``BLOB_STORE`` selects the backend:
+
+* ``local`` (default): files under ``BLOB_DIR``, sharded as ``ab/abcdef...``
+* ``gridfs``: a GridFS bucket in the application database, with the hash as
+  the file name
+
+Starlette spools a whole multipart body before the handler sees it, so
+``UploadLimitMiddleware`` refuses upload requests by their Content-Length
+before any of the body is read.
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+import orjson
+
+import database
+
+CHUNK_SIZE = 64 * 1024
+MAX_BYTES = int(os.environ.get("BLOB_MAX_BYTES", 10 * 1024 * 1024))
+BLOB_DIR = Path(os.environ.get("BLOB_DIR", Path(__file__).parent / "uploads"))
+# Room for the multipart boundaries, headers and form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Reads up to n bytes, b"" at the end (UploadFile.read)
+ChunkReader = Callable[[int], Awaitable[bytes]]
+
+
+class BlobTooLarge(Exception):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    deduplicated: bool
+
+
+async def _chunks(read: ChunkReader, max_bytes: int) -> AsyncIterator[bytes]:
+    size = 0
+    while True:
+        chunk = await read(CHUNK_SIZE)
+        if not chunk:
+            return
+        size += len(chunk)
+        if size > max_bytes:
+            raise BlobTooLarge(f"File larger than {max_bytes} bytes")
+        yield chunk
+
+
+class LocalBlobStore:
+    name = "local"
+
+    def __init__(self, directory: Path = BLOB_DIR):
+        self.directory = directory
+
+    def _path(self, sha256: str) -> Path:
+        return self.directory / sha256[:2] / sha256
+
+    def _commit(self, tmp_path: Path, sha256: str) -> bool:
+        """Move an upload to its content path; False when that content is already stored"""
+        path = self._path(sha256)
+        if path.exists():
+            tmp_path.unlink()
+            return False
+        path.parent.mkdir(exist_ok=True)
+        os.replace(tmp_path, path)
+        return True
+
+    async def put(self, read: ChunkReader, max_bytes: int = MAX_BYTES) -> StoredBlob:
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+        tmp_path = self.directory / f".upload-{uuid.uuid4().hex}"
+        digest = hashlib.sha256()
+        size = 0
+        handle = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in _chunks(read, max_bytes):
+                digest.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(handle.close)
+
+        sha256 = digest.hexdigest()
+        stored = await asyncio.to_thread(self._commit, tmp_path, sha256)
+        return StoredBlob(sha256, size, deduplicated=not stored)
+
+    async def open(self, sha256: str) -> Optional[AsyncIterator[bytes]]:
+        path = self._path(sha256)
+        if not await asyncio.to_thread(path.exists):
+            return None
+
+        async def stream():
+            handle = await asyncio.to_thread(open, path, "rb")
+            try:
+                while chunk := await asyncio.to_thread(handle.read, CHUNK_SIZE):
+                    yield chunk
+            finally:
+                handle.close()
+        return stream()
+
+
+class GridFSBlobStore:
+    name = "gridfs"
+
+    def __init__(self, bucket_name: str = "documents"):
+        self.bucket_name = bucket_name
+        self._bucket = None
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+            self._bucket = AsyncIOMotorGridFSBucket(database.get_database(), bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def _find(self, sha256: str):
+        cursor = self.bucket.find({"filename": sha256}, limit=1)
+        files = await cursor.to_list(length=1)
+        return files[0] if files else None
+
+    async def put(self, read: ChunkReader, max_bytes: int = MAX_BYTES) -> StoredBlob:
+        # The name is only known once everything is hashed: upload under a
+        # temporary name, then rename, or drop the copy if the hash exists
+        upload = self.bucket.open_upload_stream(f".upload-{uuid.uuid4().hex}", chunk_size_bytes=255 * 1024)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in _chunks(read, max_bytes):
+                digest.update(chunk)
+                size += len(chunk)
+                await upload.write(chunk)
+            await upload.close()
+        except BaseException:
+            await upload.abort()
+            raise
+
+        sha256 = digest.hexdigest()
+        if await self._find(sha256) is not None:
+            await self.bucket.delete(upload._id)
+            return StoredBlob(sha256, size, deduplicated=True)
+        await self.bucket.rename(upload._id, sha256)
+        return StoredBlob(sha256, size, deduplicated=False)
+
+    async def open(self, sha256: str) -> Optional[AsyncIterator[bytes]]:
+        if await self._find(sha256) is None:
+            return None
+        download = await self.bucket.open_download_stream_by_name(sha256)
+
+        async def stream():
+            while chunk := await download.readchunk():
+                yield chunk
+        return stream()
+
+
+class UploadLimitMiddleware:
+    """Refuses requests to upload paths whose body could not fit within ``max_bytes``, unread"""
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = MAX_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is None or not length.isdigit():
+            await self._refuse(send, 411, "Longueur du contenu requise")
+        elif int(length) > self.max_bytes + MULTIPART_OVERHEAD:
+            await self._refuse(
+                send, 413, f"Fichier trop volumineux (maximum {self.max_bytes // (1024 * 1024)} Mo)"
+            )
+        else:
+            await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _refuse(send, status: int, detail: str):
+        body = orjson.dumps({"detail": detail})
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+BACKENDS = {"local": LocalBlobStore, "gridfs": GridFSBlobStore}
+
+
+def create_store(name: str):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown BLOB_STORE {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+blobs = create_store(os.environ.get("BLOB_STORE", "local"))
@@ -0,0 +1,420 @@
+"""Cameroon reference catalogs (agencies, attractions, cities, regions, quarters, timetables).
+
+The editable sources are the JSON files in ``data/``.  They are compiled into a
+single versioned msgpack snapshot (``data/catalog.msgpack``) that workers load
+on first use; the version is a hash of the catalog content, so every worker
+serving the same data reports the same version.
+
+The snapshot is published to every uvicorn worker through a shared segment
+(see ``shared_segment.py``).  The first worker to need it builds it; the
+others map the same file.  The segment also carries the catalog responses
+already serialized; each response body is copied out of the shared pages
+when it is served.  Only those bodies and the packed snapshot are shared:
+each worker still decodes the snapshot section and builds its own lookup
+indexes, so per-worker memory grows with the catalog.
+A reload in any worker bumps the segment generation.  The next request of
+every other worker notices it and starts attaching the new segment off the
+event loop; requests keep the current catalog until it is swapped in.
+
+A ``CatalogSnapshot`` is never modified once built.  Swapping in a new one is
+a single assignment: a request that grabbed ``store.snapshot`` keeps a
+consistent view, and the next request sees the new catalog.  Callers must not
+mutate anything they get from a snapshot.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+import orjson
+
+from gazetteer import Gazetteer
+from geo import detour_km, distance_to_segment_km, haversine_km
+from shared_segment import Segment, SegmentControl, default_directory
+from text_folding import fold
+from planner import Planner
+from timetable import Timetable
+
+DATA_DIR = Path(__file__).parent / "data"
+SOURCES = ("agencies", "attractions", "cities", "administrative_structure", "quarters", "timetables")
+SNAPSHOT_PATH = Path(os.environ.get("CATALOG_SNAPSHOT_PATH", DATA_DIR / "catalog.msgpack"))
+SHARED_DIR = Path(os.environ.get("CATALOG_SHARED_DIR", default_directory()))
+FORMAT_VERSION = 3
+# Attractions within this distance of the straight line between two served cities
+CORRIDOR_KM = float(os.environ.get("ATTRACTION_CORRIDOR_KM", 50))
+
+# Responses served as-is from the shared segment, built from the catalog data
+RESPONSE_SECTIONS = {
+    "agencies": lambda data: {"agencies": data["agencies"]},
+    "premium_agencies": lambda data: {
+        "premium_agencies": [agency for agency in data["agencies"] if agency.get("premium_partner", False)]
+    },
+    "attractions": lambda data: {"attractions": data["attractions"]},
+    "administrative_structure": lambda data: {"regions": data["administrative_structure"]},
+}
+
+logger = logging.getLogger(__name__)
+
+
+def route_endpoints(route: str) -> List[str]:
+    """Cities at both ends of a "Yaoundé-Douala" style route"""
+    return [part.strip() for part in route.split("-", 1)]
+
+
+def _point(place: dict) -> Tuple[float, float]:
+    coordinates = place.get("coordinates", place)
+    return coordinates["lat"], coordinates["lng"]
+
+
+def build_corridor(attractions: List[dict], start: dict, end: dict,
+                   width_km: float = CORRIDOR_KM) -> List[Tuple[int, float, float, float]]:
+    """(attraction index, km off the route, detour km, km from start) for attractions near start-end.
+
+    Best rated first, then smallest detour.
+    """
+    a, b = _point(start), _point(end)
+    length = haversine_km(a, b)
+    corridor = []
+    for index, attraction in enumerate(attractions):
+        if "coordinates" not in attraction:
+            continue
+        point = _point(attraction)
+        distance, fraction = distance_to_segment_km(point, a, b)
+        if distance <= width_km:
+            corridor.append((index, distance, detour_km(point, a, b), fraction * length))
+    corridor.sort(key=lambda entry: (-attractions[entry[0]].get("rating", 0), entry[2]))
+    return corridor
+
+
+class CatalogSnapshot:
+    """One immutable version of the catalogs plus the lookup indexes built from it"""
+
+    def __init__(self, data: dict, version: str, generation: int, segment: Optional[Segment] = None):
+        self.version = version
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.segment = segment
+
+        self.agencies: List[dict] = data["agencies"]
+        self.attractions: List[dict] = data["attractions"]
+        self.cities: List[dict] = data["cities"]
+        self.administrative_structure: Dict[str, dict] = data["administrative_structure"]
+        self.quarters: Dict[str, List[dict]] = data["quarters"]
+        self._timetable_source: dict = data["timetables"]
+        self._timetable: Optional[Timetable] = None
+        self._planner: Optional[Planner] = None
+        self._gazetteer: Optional[Gazetteer] = None
+
+        # Keys and search terms are accent-folded: "yaounde" finds Yaoundé
+        self.city_by_name: Dict[str, dict] = {}
+        for city in self.cities:
+            self.city_by_name.setdefault(fold(city["name"]), city)
+        self.city_search_terms: List[Tuple[dict, Tuple[str, ...]]] = [
+            (city, tuple(fold(term) for term in (city["name"], city["region"], *city.get("aliases", []))))
+            for city in self.cities
+        ]
+        self.major_cities = [city for city in self.cities if city["major"]]
+        self.premium_agencies = [agency for agency in self.agencies if agency.get("premium_partner", False)]
+        self.agency_by_name: Dict[str, dict] = {agency["name"]: agency for agency in self.agencies}
+
+        attractions_by_city = defaultdict(list)
+        for attraction in self.attractions:
+            attractions_by_city[attraction["city"].lower()].append(attraction)
+        self.attractions_by_city: Dict[str, List[dict]] = dict(attractions_by_city)
+
+        agencies_by_city = defaultdict(set)
+        for index, agency in enumerate(self.agencies):
+            for route in agency.get("routes_served", []):
+                for city in route_endpoints(route):
+                    agencies_by_city[city.lower()].add(index)
+        self.agencies_count_by_city = {city: len(indexes) for city, indexes in agencies_by_city.items()}
+
+        # Served city pairs (alphabetical) -> attractions along the way
+        self.corridors: Dict[Tuple[str, str], List[Tuple[int, float, float, float]]] = {}
+        for agency in self.agencies:
+            for route in agency.get("routes_served", []):
+                key = tuple(sorted(fold(city) for city in route_endpoints(route)))
+                if key in self.corridors or not all(city in self.city_by_name for city in key):
+                    continue
+                start, end = (self.city_by_name[city] for city in key)
+                self.corridors[key] = build_corridor(self.attractions, start, end)
+
+    @property
+    def timetable(self) -> Timetable:
+        """Compiled on first use: workers that never query schedules never pay for it"""
+        if self._timetable is None:
+            self._timetable = Timetable(self._timetable_source)
+        return self._timetable
+
+    @property
+    def planner(self) -> Planner:
+        if self._planner is None:
+            self._planner = Planner(self.timetable)
+        return self._planner
+
+    @property
+    def gazetteer(self) -> Gazetteer:
+        if self._gazetteer is None:
+            self._gazetteer = Gazetteer(self.cities, self.administrative_structure, self.quarters)
+        return self._gazetteer
+
+    def city(self, name: str) -> Optional[dict]:
+        return self.city_by_name.get(fold(name))
+
+    def attractions_in(self, city: str) -> List[dict]:
+        return self.attractions_by_city.get(city.lower(), [])
+
+    def agencies_count(self, city: str) -> int:
+        return self.agencies_count_by_city.get(city.lower(), 0)
+
+    def attractions_along(self, origin: str, destination: str, limit: int) -> Optional[List[dict]]:
+        """Top attractions near a served route, or None when no agency serves it"""
+        key = (fold(origin), fold(destination))
+        reverse = key[0] > key[1]
+        corridor = self.corridors.get(tuple(sorted(key)))
+        if corridor is None:
+            return None
+        length = haversine_km(_point(self.city(origin)), _point(self.city(destination)))
+        return [
+            {
+                **self.attractions[index],
+                "distance_from_route_km": round(distance, 1),
+                "detour_km": round(detour, 1),
+                "km_from_origin": round(length - position if reverse else position, 1),
+            }
+            for index, distance, detour, position in corridor[:limit]
+        ]
+
+    def response(self, name: str) -> Optional[bytes]:
+        """Pre-serialized JSON body for one of ``RESPONSE_SECTIONS``"""
+        if self.segment is None or f"response:{name}" not in self.segment:
+            return None
+        return self.segment.bytes(f"response:{name}")
+
+
+def _content_version(data: dict) -> str:
+    canonical = orjson.dumps([FORMAT_VERSION, data], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()[:12]
+
+
+def _sources_mtime() -> float:
+    return max((DATA_DIR / f"{name}.json").stat().st_mtime for name in SOURCES)
+
+
+def compile_snapshot(path: Path = SNAPSHOT_PATH) -> dict:
+    """Compile the JSON sources into the msgpack snapshot file and return its payload"""
+    data = {name: orjson.loads((DATA_DIR / f"{name}.json").read_bytes()) for name in SOURCES}
+    payload = {"format": FORMAT_VERSION, "version": _content_version(data), "data": data}
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(msgpack.packb(payload, use_bin_type=True))
+    os.replace(tmp_path, path)
+    return payload
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> dict:
+    """Load the msgpack snapshot, recompiling it when the JSON sources are newer"""
+    try:
+        if path.stat().st_mtime >= _sources_mtime():
+            payload = msgpack.unpackb(path.read_bytes(), raw=False)
+            if payload.get("format") == FORMAT_VERSION:
+                return payload
+    except (OSError, ValueError, msgpack.UnpackException):
+        pass
+    return compile_snapshot(path)
+
+
+def segment_sections(payload: dict) -> Dict[str, bytes]:
+    sections = {"snapshot": msgpack.packb(payload, use_bin_type=True)}
+    for name, build in RESPONSE_SECTIONS.items():
+        sections[f"response:{name}"] = orjson.dumps(build(payload["data"]))
+    return sections
+
+
+class CatalogStore:
+    """Holds the current snapshot and swaps in new versions without downtime"""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH, shared_dir: Path = SHARED_DIR):
+        self.path = path
+        self.shared_dir = shared_dir
+        self._control: Optional[SegmentControl] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._reload_lock = asyncio.Lock()
+        self._follow_task: Optional[asyncio.Task] = None
+        self._listeners = []
+        self._sources_checked_at = 0.0
+
+    @property
+    def control(self) -> SegmentControl:
+        if self._control is None:
+            # One segment family per data directory, so deployments on one host stay apart
+            family = "catalog-" + hashlib.sha1(str(self.path.resolve()).encode()).hexdigest()[:8]
+            self._control = SegmentControl(self.shared_dir, family)
+        return self._control
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # First use: load synchronously, nothing has been served yet
+            generation = self.control.generation() or self._publish()
+            snapshot = self._attach(generation)
+            self._snapshot = snapshot
+        elif self.control.generation() != snapshot.generation:
+            # Another worker published a new catalog
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                if threading.current_thread() is threading.main_thread():
+                    # No event loop (scripts, benchmarks): nothing to keep serving
+                    return self._swap(self._attach(self.control.generation()))
+                # A worker thread of the event loop (to_thread): swaps, and their
+                # listeners, only run on the loop, which notices on its next request
+                return snapshot
+            if self._follow_task is None or self._follow_task.done():
+                self._follow_task = asyncio.create_task(self._follow())
+        return snapshot
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version
+
+    def _publish(self) -> int:
+        """Publish a segment for the current sources unless it exists; returns its generation"""
+        control = self.control
+        with control.lock():
+            generation, version = control.read()
+            payload = read_snapshot(self.path)
+            if generation and version == payload["version"] and control.segment_path(generation).exists():
+                return generation
+            generation += 1
+            control.publish(generation, payload["version"], segment_sections(payload))
+            return generation
+
+    def _attach(self, generation: int) -> CatalogSnapshot:
+        try:
+            segment = self.control.attach(generation)
+        except FileNotFoundError:
+            # Pruned after several quick reloads, or the shared directory was wiped
+            generation = self._publish()
+            segment = self.control.attach(generation)
+        payload = msgpack.unpackb(segment.section("snapshot"), raw=False)
+        if payload.get("format") != FORMAT_VERSION:
+            # Published by an older release still running, or before an upgrade
+            return self._attach(self._publish())
+        return CatalogSnapshot(payload["data"], payload["version"], generation, segment)
+
+    async def _follow(self):
+        """Attach the generation another worker published, off the event loop, and swap it in"""
+        try:
+            async with self._reload_lock:
+                generation = self.control.generation()
+                if self._snapshot is None or self._snapshot.generation != generation:
+                    self._swap(await asyncio.to_thread(self._attach, generation))
+        except Exception:
+            logger.exception("Catalog generation change failed, keeping version %s", self._snapshot.version)
+
+    def _swap(self, new: CatalogSnapshot) -> CatalogSnapshot:
+        old = self._snapshot
+        self._snapshot = new
+        for callback in self._listeners:
+            callback(old, new)
+        logger.info("Catalog version %s (generation %d) in use", new.version, new.generation)
+        return new
+
+    def on_swap(self, callback):
+        """Register ``callback(old, new)`` to run after a new snapshot is swapped in"""
+        self._listeners.append(callback)
+        return callback
+
+    async def reload(self) -> dict:
+        """Republish the catalog from data/ if it changed, off the event loop, and swap it in"""
+        async with self._reload_lock:
+            self._sources_checked_at = time.time()
+            old = self._snapshot
+            generation = await asyncio.to_thread(self._publish)
+            current = self._snapshot
+            if current is not None and current.generation == generation:
+                new = current
+            else:
+                new = self._swap(await asyncio.to_thread(self._attach, generation))
+        return {
+            "previous_version": old.version if old else None,
+            "version": new.version,
+            "generation": new.generation,
+            "changed": old is None or old.version != new.version,
+        }
+
+    def sources_changed(self) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return False
+        try:
+            return _sources_mtime() > max(snapshot.loaded_at, self._sources_checked_at)
+        except OSError:
+            return False
+
+    async def watch(self, interval: float):
+        """Poll the JSON sources and reload when one of them changes"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.sources_changed():
+                try:
+                    await self.reload()
+                except Exception:
+                    logger.exception("Catalog reload failed, keeping version %s", self.version)
+
+
+store = CatalogStore()
+
+
+def agencies() -> list:
+    """Inter-urban transport agencies across the 10 regions"""
+    return store.snapshot.agencies
+
+
+def attractions() -> list:
+    """Tourist attractions with coordinates and images"""
+    return store.snapshot.attractions
+
+
+def cities() -> list:
+    """Cities, villages and arrondissements with coordinates"""
+    return store.snapshot.cities
+
+
+def administrative_structure() -> dict:
+    """Regions and their chefs-lieux"""
+    return store.snapshot.administrative_structure
+
+
+class CatalogVersionMiddleware:
+    """Adds the catalog version to every HTTP response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-catalog-version", store.version.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_version)
+
+
+if __name__ == "__main__":
+    compiled = compile_snapshot()
+    print(f"Compiled {SNAPSHOT_PATH} version {compiled['version']}")
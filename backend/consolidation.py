@@ -0,0 +1,251 @@
+"""Parcel consolidation: book intercity parcels into the hold of passenger buses.
+
+Every ``CONSOLIDATION_INTERVAL_SECONDS`` a batch job takes the parcels not
+booked on a departure yet, groups them by corridor (origin -> destination as
+served by the timetable) and packs each group onto the corridor's upcoming
+departures, first-fit decreasing:
+
+* the bins are the departures from now + ``CONSOLIDATION_CUTOFF_MINUTES``
+  over ``CONSOLIDATION_HORIZON_DAYS`` days, earliest first, each with the
+  hold capacity of its vehicle type (weight and volume) less the load
+  already booked on it;
+* urgent parcels are placed first, then the rest; within each group, the
+  largest first (by the larger of their weight and volume shares of a hold);
+* each parcel goes to the first (earliest) departure it fits in.
+
+Parcels are then updated with one bulk write per collection, guarded on
+them still being unbooked, and the load of every departure touched is
+recomputed from the parcels actually booked on it and upserted into
+``departure_cargo`` with one more bulk write.  A parcel left over (no
+departure runs the corridor, or every hold is full) waits for the next run.
+
+Every worker starts the job, but a run packs against the loads it read, so
+two runs at once could both fill the same hold: a run takes the
+``consolidation`` job lease first (see job_lease.py) and is skipped when
+another worker holds it, or finished a run less than half an interval ago.
+
+Parcels whose volume was not declared get an estimate from their type and
+weight (``estimate_volume``) when they are created.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import catalog
+from job_lease import exclusive
+from repositories import repos
+from text_folding import fold
+from timetable import Timetable, local_now
+
+logger = logging.getLogger(__name__)
+
+CONSOLIDATION_INTERVAL = float(os.environ.get("CONSOLIDATION_INTERVAL_SECONDS", 60))
+CONSOLIDATION_BATCH_SIZE = int(os.environ.get("CONSOLIDATION_BATCH_SIZE", 20000))
+CUTOFF_MINUTES = int(os.environ.get("CONSOLIDATION_CUTOFF_MINUTES", 60))
+HORIZON_DAYS = int(os.environ.get("CONSOLIDATION_HORIZON_DAYS", 2))
+LEASE_SECONDS = float(os.environ.get("CONSOLIDATION_LEASE_SECONDS", 600))
+
+# Hold capacity per vehicle type: (kg, litres)
+HOLD_CAPACITY: Dict[str, Tuple[float, float]] = {
+    "Bus climatisé": (400.0, 3000.0),
+    "Bus VIP climatisé": (300.0, 2500.0),
+}
+DEFAULT_HOLD = (300.0, 2000.0)
+# Litres per kg by package type, for parcels without a declared volume
+LITRES_PER_KG = {"documents": 2.0, "clothes": 6.0, "electronics": 4.0, "food": 3.0}
+DEFAULT_LITRES_PER_KG = 5.0
+MIN_VOLUME_LITERS = 2.0
+# Parcels can ride once registered, until they are on their way
+BOOKABLE_STATUSES = ["pending", "assigned", "collected"]
+PARCEL_SOURCES = ("couriers", "parcels")
+# Departure fields copied onto parcels and departure_cargo documents
+CARGO_FIELDS = ("schedule_id", "agency", "origin", "destination", "date", "departure_time", "vehicle_type")
+
+
+def estimate_volume(package_type: str, weight_kg: float) -> float:
+    return round(max(MIN_VOLUME_LITERS, weight_kg * LITRES_PER_KG.get(package_type, DEFAULT_LITRES_PER_KG)), 1)
+
+
+def departure_id(departure: dict) -> str:
+    return f"{departure['schedule_id']}@{departure['date']}T{departure['departure_time']}"
+
+
+def hold_capacity(vehicle_type: str) -> Tuple[float, float]:
+    return HOLD_CAPACITY.get(vehicle_type, DEFAULT_HOLD)
+
+
+class Hold:
+    """One departure as a bin: what its hold can still take"""
+
+    __slots__ = ("id", "departure", "free_kg", "free_liters", "parcels")
+
+    def __init__(self, departure: dict, load: Optional[dict]):
+        capacity_kg, capacity_liters = hold_capacity(departure["vehicle_type"])
+        self.id = departure_id(departure)
+        self.departure = departure
+        self.free_kg = capacity_kg - (load or {}).get("weight_kg", 0.0)
+        self.free_liters = capacity_liters - (load or {}).get("volume_liters", 0.0)
+        self.parcels: List[Tuple[str, str]] = []
+
+    def fits(self, weight_kg: float, volume_liters: float) -> bool:
+        return weight_kg <= self.free_kg and volume_liters <= self.free_liters
+
+    def put(self, source: str, parcel_id: str, weight_kg: float, volume_liters: float):
+        self.free_kg -= weight_kg
+        self.free_liters -= volume_liters
+        self.parcels.append((source, parcel_id))
+
+
+def parcel_size(parcel: dict) -> Tuple[float, float]:
+    weight = float(parcel.get("weight_kg") or 0.0)
+    volume = parcel.get("volume_liters")
+    return weight, float(volume) if volume else estimate_volume(parcel.get("package_type", ""), weight)
+
+
+def upcoming_departures(timetable: Timetable, origin: str, destination: str, now: datetime,
+                        horizon_days: int = HORIZON_DAYS) -> List[dict]:
+    earliest = now + timedelta(minutes=CUTOFF_MINUTES)
+    departures = []
+    for offset in range(horizon_days):
+        day = earliest.date() + timedelta(days=offset)
+        after = earliest.hour * 60 + earliest.minute if offset == 0 else 0
+        departures.extend(timetable.departures(origin, destination, day, after))
+    return departures
+
+
+def pack(parcels: List[Tuple[str, dict]], holds: List[Hold]) -> List[Tuple[str, dict]]:
+    """First-fit decreasing of (source, parcel) pairs into ``holds`` (earliest first); returns the leftovers"""
+    sized = [(source, parcel, *parcel_size(parcel)) for source, parcel in parcels]
+    # Urgent first; then largest first, by the larger of their weight and volume shares of a hold
+    sized.sort(key=lambda item: (not item[1].get("urgent"),
+                                 -max(item[2] / DEFAULT_HOLD[0], item[3] / DEFAULT_HOLD[1])))
+    smallest_kg = min((item[2] for item in sized), default=0.0)
+    smallest_liters = min((item[3] for item in sized), default=0.0)
+    # Holds that can still take the smallest parcel, earliest first
+    open_holds = [hold for hold in holds if hold.fits(smallest_kg, smallest_liters)]
+    most_kg = max((hold.free_kg for hold in open_holds), default=0.0)
+    most_liters = max((hold.free_liters for hold in open_holds), default=0.0)
+    leftovers = []
+    for source, parcel, weight, volume in sized:
+        if weight > most_kg or volume > most_liters:
+            # Fits nowhere: skip the scan
+            leftovers.append((source, parcel))
+            continue
+        for position, hold in enumerate(open_holds):
+            if hold.fits(weight, volume):
+                hold.put(source, parcel["id"], weight, volume)
+                if not hold.fits(smallest_kg, smallest_liters):
+                    del open_holds[position]
+                most_kg = max((hold.free_kg for hold in open_holds), default=0.0)
+                most_liters = max((hold.free_liters for hold in open_holds), default=0.0)
+                break
+        else:
+            leftovers.append((source, parcel))
+    return leftovers
+
+
+def pack_corridors(corridors: Dict[Tuple[str, str], List[Tuple[str, dict]]],
+                   departures: Dict[Tuple[str, str], List[dict]], loads: Dict[str, dict]) -> Tuple[List[Hold], int]:
+    """Pack every corridor; returns the departures given parcels, and how many parcels are left over"""
+    holds: List[Hold] = []
+    leftovers = 0
+    for key, parcels in corridors.items():
+        corridor_holds = [Hold(departure, loads.get(departure_id(departure))) for departure in departures[key]]
+        leftovers += len(pack(parcels, corridor_holds))
+        holds.extend(hold for hold in corridor_holds if hold.parcels)
+    return holds, leftovers
+
+
+async def consolidate(limit: int = CONSOLIDATION_BATCH_SIZE, min_interval: float = 0.0) -> Optional[dict]:
+    """One consolidation run; returns its counts, None when another worker runs it (or just did)"""
+    async with exclusive("consolidation", LEASE_SECONDS, min_interval) as acquired:
+        return await _consolidate(limit) if acquired else None
+
+
+async def _consolidate(limit: int) -> dict:
+    start = time.perf_counter()
+    timetable = catalog.store.snapshot.timetable
+    now = local_now()
+
+    corridors: Dict[Tuple[str, str], List[Tuple[str, dict]]] = defaultdict(list)
+    unserved = 0
+    for source in PARCEL_SOURCES:
+        for parcel in await getattr(repos, source).pending_consolidation(BOOKABLE_STATUSES, limit):
+            origin, destination = parcel.get("origin", ""), parcel.get("destination", "")
+            if timetable.serves(origin, destination):
+                corridors[(fold(origin), fold(destination))].append((source, parcel))
+            else:
+                unserved += 1
+
+    departures = {key: upcoming_departures(timetable, *key, now) for key in corridors}
+    ids = [departure_id(departure) for corridor in departures.values() for departure in corridor]
+    loads = {load["id"]: load for load in await repos.departure_cargo.by_ids(ids)} if ids else {}
+    # Tens of thousands of parcels: keep the event loop serving requests meanwhile
+    holds, leftovers = await asyncio.to_thread(pack_corridors, corridors, departures, loads)
+
+    booked = 0
+    for source in PARCEL_SOURCES:
+        by_departure = {}
+        for hold in holds:
+            ids = [parcel_id for parcel_source, parcel_id in hold.parcels if parcel_source == source]
+            if ids:
+                by_departure[hold.id] = ({field: hold.departure[field] for field in CARGO_FIELDS}, ids)
+        if by_departure:
+            booked += await getattr(repos, source).board(by_departure, BOOKABLE_STATUSES)
+
+    if holds:
+        await save_loads([hold.id for hold in holds], {hold.id: hold.departure for hold in holds})
+
+    return {
+        "at": datetime.utcnow(),
+        "corridors": len(corridors),
+        "booked": booked,
+        "lost_to_other_workers": sum(len(hold.parcels) for hold in holds) - booked,
+        "waiting": leftovers,
+        "unserved": unserved,
+        "departures": len(holds),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+async def save_loads(departure_ids: List[str], departures: Dict[str, dict]):
+    """Recompute the load of departures from the parcels booked on them and store it"""
+    totals: Dict[str, dict] = {
+        departure_id: {"parcels": 0, "weight_kg": 0.0, "volume_liters": 0.0} for departure_id in departure_ids
+    }
+    for source in PARCEL_SOURCES:
+        for load in await getattr(repos, source).departure_loads(departure_ids):
+            total = totals[load["_id"]]
+            for field in total:
+                total[field] += load[field] or 0
+    now = datetime.utcnow()
+    documents = []
+    for departure_id, total in totals.items():
+        departure = departures[departure_id]
+        capacity_kg, capacity_liters = hold_capacity(departure["vehicle_type"])
+        documents.append({
+            "id": departure_id,
+            **{field: departure[field] for field in CARGO_FIELDS},
+            "capacity_kg": capacity_kg,
+            "capacity_liters": capacity_liters,
+            "parcels": round(total["parcels"]),
+            "weight_kg": round(total["weight_kg"], 1),
+            "volume_liters": round(total["volume_liters"], 1),
+            "updated_at": now,
+        })
+    await repos.departure_cargo.save_loads(documents)
+
+
+async def run(interval: float = CONSOLIDATION_INTERVAL):
+    """Background task: a consolidation run every ``interval`` seconds"""
+    while True:
+        try:
+            await consolidate(min_interval=interval / 2)
+        except Exception:
+            logger.exception("Parcel consolidation failed")
+        await asyncio.sleep(interval)
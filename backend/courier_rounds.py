@@ -0,0 +1,214 @@
+"""Courier rounds: the ordered stops of each carrier, per city, for the day.
+
+A round covers the parcels a carrier holds (``assigned`` or ``collected``)
+whose pickup is in one city.  It starts at the city's bus station, visits each
+pickup, and each delivery when the parcel stays in town (after its pickup).
+When some parcels leave by bus, the round ends back at the station.
+
+Stop ordering (``routing.optimize``) is CPU-bound, so it runs in a process
+pool of ``ROUTING_WORKERS`` (started with forkserver) and never on the event
+loop.  ``plan_rounds`` computes them for one carrier (``POST
+/courier/rounds/{carrier_id}/refresh``), and ``plan_all`` for every carrier in
+a batch job every ``ROUNDS_INTERVAL_SECONDS``; they are stored in
+``courier_rounds``.  Every worker starts the batch job, but a run takes the
+``courier_rounds`` job lease first (see job_lease.py): one worker runs each
+batch, and only a worker that orders rounds starts its pool.
+
+Parcels give their coordinates as ``pickup_coordinates`` and
+``delivery_coordinates`` ([lat, lng]).  Stops without them are geocoded from
+their address, one batch per round (see ``geocoding.py``), and flagged
+``approximate`` below ``ROUNDS_PRECISE_CONFIDENCE``: when only the city, not
+the quarter, was recognized.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import catalog
+from geo import haversine_km
+from geocoding import geocoder
+from job_lease import exclusive
+from repositories import repos
+from routing import ROAD_FACTOR, optimize
+from text_folding import fold
+from timetable import local_now
+
+logger = logging.getLogger(__name__)
+
+ROUTING_WORKERS = int(os.environ.get("ROUTING_WORKERS", 2))
+ROUTING_BUDGET_MS = float(os.environ.get("ROUTING_BUDGET_MS", 200))
+ROUNDS_INTERVAL = float(os.environ.get("ROUNDS_INTERVAL_SECONDS", 900))
+ROUNDS_LEASE_SECONDS = float(os.environ.get("ROUNDS_LEASE_SECONDS", 1800))
+ROUND_STATUSES = ["assigned", "collected"]
+PRECISE_CONFIDENCE = float(os.environ.get("ROUNDS_PRECISE_CONFIDENCE", 0.75))
+# (coordinates field, address field) of each end of a parcel's trip
+PICKUP = ("pickup_coordinates", "pickup_address")
+DELIVERY = ("delivery_coordinates", "delivery_address")
+PARCEL_SOURCES = ("couriers", "parcels")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Not fork: the worker already runs threads (to_thread, Motor) whose locks a forked child could inherit held
+        _pool = ProcessPoolExecutor(max_workers=ROUTING_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def stays_in_town(parcel: dict, city: dict) -> bool:
+    return fold(parcel.get("destination", "")) == fold(city["name"])
+
+
+async def geocode_stops(city: dict, parcels: List[dict]) -> Dict[str, dict]:
+    """Places of the round's addresses that have no coordinates, in one batch"""
+    addresses = {
+        parcel.get(address, "")
+        for parcel in parcels
+        for coordinates, address in ((PICKUP, DELIVERY) if stays_in_town(parcel, city) else (PICKUP,))
+        if not parcel.get(coordinates)
+    }
+    if not addresses:
+        return {}
+    addresses = sorted(addresses)
+    places = await geocoder.geocode_many(addresses, city["name"])
+    return {address: place for address, place in zip(addresses, places) if place is not None}
+
+
+def locate(parcel: dict, end: Tuple[str, str], city: dict, places: Dict[str, dict]) -> dict:
+    """Address, point and confidence of one end of a parcel's trip; the city centre when unknown"""
+    coordinates_field, address_field = end
+    address = parcel.get(address_field, "")
+    coordinates = parcel.get(coordinates_field)
+    if coordinates and len(coordinates) == 2:
+        point, confidence = (float(coordinates[0]), float(coordinates[1])), 1.0
+    elif address in places:
+        place = places[address]
+        point, confidence = (place["lat"], place["lng"]), place["confidence"]
+    else:
+        point, confidence = (city["lat"], city["lng"]), 0.0
+    return {"address": address, "point": point, "confidence": confidence,
+            "approximate": confidence < PRECISE_CONFIDENCE}
+
+
+def build_stops(city: dict, parcels: List[dict],
+                places: Dict[str, dict]) -> Tuple[List[dict], Dict[int, int], Optional[int]]:
+    """Stops of a round (index 0 is the station), the delivery -> pickup map, and the end stop if any"""
+    station = {"kind": "station", "address": f"Gare routière, {city['name']}", "point": (city["lat"], city["lng"]),
+               "confidence": None, "approximate": True}
+    stops, pickup_of = [station], {}
+    leaves_by_bus = False
+    for parcel in parcels:
+        common = {"parcel_id": parcel["id"], "tracking_number": parcel.get("tracking_number")}
+        stops.append({"kind": "pickup", **locate(parcel, PICKUP, city, places), **common})
+        if stays_in_town(parcel, city):
+            stops.append({"kind": "delivery", **locate(parcel, DELIVERY, city, places), **common})
+            pickup_of[len(stops) - 1] = len(stops) - 2
+        else:
+            leaves_by_bus = True
+    if not leaves_by_bus:
+        return stops, pickup_of, None
+    stops.append({**station, "kind": "drop_off"})
+    return stops, pickup_of, len(stops) - 1
+
+
+async def solve(carrier: dict, city: dict, parcels: List[dict], day: str, budget_ms: float) -> dict:
+    """One round, ordered in the process pool"""
+    stops, pickup_of, end = build_stops(city, parcels, await geocode_stops(city, parcels))
+    points = [stop["point"] for stop in stops]
+    order, stats = await asyncio.get_running_loop().run_in_executor(
+        pool(), optimize, points, pickup_of, 0, end, budget_ms
+    )
+    ordered, cumulative, previous = [], 0.0, None
+    for sequence, index in enumerate(order):
+        stop = stops[index]
+        leg = haversine_km(previous, stop["point"]) * ROAD_FACTOR if previous else 0.0
+        cumulative += leg
+        previous = stop["point"]
+        ordered.append({
+            "sequence": sequence,
+            **{key: value for key, value in stop.items() if key != "point"},
+            "lat": stop["point"][0],
+            "lng": stop["point"][1],
+            "leg_km": round(leg, 2),
+            "cumulative_km": round(cumulative, 2),
+        })
+    return {
+        "id": f"{carrier['id']}@{day}:{fold(city['name'])}",
+        "carrier_id": carrier["id"],
+        "carrier_name": carrier.get("name", ""),
+        "city": city["name"],
+        "date": day,
+        "parcels": len(parcels),
+        "stops": ordered,
+        **stats,
+        "computed_at": datetime.utcnow(),
+    }
+
+
+def group_rounds(parcels: List[dict]) -> Dict[Tuple[str, str], Tuple[dict, dict, List[dict]]]:
+    """Parcels by (carrier, pickup city) with the carrier and the catalog city; unknown cities are left out"""
+    snapshot = catalog.store.snapshot
+    groups: Dict[Tuple[str, str], Tuple[dict, dict, List[dict]]] = {}
+    skipped = defaultdict(int)
+    for parcel in parcels:
+        city = snapshot.city(parcel.get("origin", ""))
+        if city is None:
+            skipped[parcel.get("origin", "")] += 1
+            continue
+        key = (parcel["carrier_id"], city["name"])
+        if key not in groups:
+            groups[key] = ({"id": parcel["carrier_id"], "name": parcel.get("carrier_name", "")}, city, [])
+        groups[key][2].append(parcel)
+    if skipped:
+        logger.info("Rounds skip parcels from unknown cities: %s", dict(skipped))
+    return groups
+
+
+async def plan_rounds(carrier_id: Optional[str] = None, city: Optional[str] = None,
+                      budget_ms: float = ROUTING_BUDGET_MS) -> List[dict]:
+    """Compute and store today's rounds, of one carrier or of all"""
+    parcels = []
+    for source in PARCEL_SOURCES:
+        parcels.extend(await getattr(repos, source).in_rounds(ROUND_STATUSES, carrier_id))
+    groups = group_rounds(parcels)
+    if city:
+        groups = {key: group for key, group in groups.items() if fold(key[1]) == fold(city)}
+    day = local_now().date().isoformat()
+    rounds = await asyncio.gather(*(
+        solve(carrier, catalog_city, city_parcels, day, budget_ms)
+        for carrier, catalog_city, city_parcels in groups.values()
+    ))
+    if rounds:
+        await repos.courier_rounds.save(list(rounds))
+    return list(rounds)
+
+
+async def plan_all(min_interval: float = 0.0) -> Optional[List[dict]]:
+    """Compute and store today's rounds of every carrier; None when another worker runs it (or just did)"""
+    async with exclusive("courier_rounds", ROUNDS_LEASE_SECONDS, min_interval) as acquired:
+        return await plan_rounds() if acquired else None
+
+
+async def run(interval: float = ROUNDS_INTERVAL):
+    """Background task: recompute every carrier's rounds every ``interval`` seconds"""
+    while True:
+        try:
+            await plan_all(min_interval=interval / 2)
+        except Exception:
+            logger.exception("Courier rounds batch failed")
+        await asyncio.sleep(interval)
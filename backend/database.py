@@ -0,0 +1,252 @@
+"""MongoDB connection shared by the routers.
+
+Motor and pymongo account for a large share of the import time, so the client
+is only created (and the driver imported) on the first collection access.
+
+Pool sizing and driver timeouts come from the environment (see
+``MongoSettings``).  Routers that talk to Mongo depend on ``mongo_guard``,
+which sets the route's operation deadline and feeds a circuit breaker: once
+Mongo keeps failing, guarded routes answer 503 immediately instead of
+queueing more coroutines behind a dead connection pool.
+
+The deadline bounds each Mongo operation of the request (applied by the
+repositories, see ``operation_timeout``), not the request as a whole: routes
+that spend seconds computing between two queries (rounds, consolidation,
+dispatch) do not eat into it, and a timeout always means Mongo itself was
+too slow.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Projection used on every read: documents are keyed by our own UUID "id"
+NO_OBJECT_ID = {"_id": 0}
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _parse_route_timeouts(value: str) -> Dict[str, int]:
+    """"create_enhanced_booking=3000,get_admin_dashboard=8000" -> {name: ms}"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, ms = item.partition("=")
+        timeouts[name.strip()] = int(ms)
+    return timeouts
+
+
+@dataclass
+class MongoSettings:
+    max_pool_size: int = field(default_factory=lambda: _env_int("MONGO_MAX_POOL_SIZE", 100))
+    min_pool_size: int = field(default_factory=lambda: _env_int("MONGO_MIN_POOL_SIZE", 0))
+    wait_queue_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000))
+    server_selection_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 3000))
+    connect_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_CONNECT_TIMEOUT_MS", 3000))
+    socket_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_SOCKET_TIMEOUT_MS", 10000))
+    # Deadline for each Mongo operation of a guarded request; 0 disables it
+    operation_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_OPERATION_TIMEOUT_MS", 5000))
+    route_timeouts_ms: Dict[str, int] = field(
+        default_factory=lambda: _parse_route_timeouts(os.environ.get("MONGO_ROUTE_TIMEOUTS", ""))
+    )
+    ready_timeout_ms: int = field(default_factory=lambda: _env_int("MONGO_READY_TIMEOUT_MS", 1000))
+    breaker_failures: int = field(default_factory=lambda: _env_int("MONGO_BREAKER_FAILURES", 5))
+    breaker_reset_s: float = field(default_factory=lambda: float(os.environ.get("MONGO_BREAKER_RESET_S", 10)))
+
+    def client_options(self) -> dict:
+        return {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+        }
+
+    def route_timeout(self, route_name: str) -> float:
+        """Operation deadline in seconds for a route (0 = none)"""
+        return self.route_timeouts_ms.get(route_name, self.operation_timeout_ms) / 1000
+
+
+settings = MongoSettings()
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    closed: requests go through.  After ``failure_threshold`` consecutive
+    failures it opens and rejects everything for ``reset_timeout`` seconds, then
+    lets a single probe through (half-open); the probe's outcome closes or
+    re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def retry_after(self) -> int:
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("MongoDB circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("MongoDB circuit opened after %d failures", self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(settings.breaker_failures, settings.breaker_reset_s)
+
+# Operation deadline (seconds) of the current request, set by mongo_guard; 0 = none
+_operation_deadline: contextvars.ContextVar[float] = contextvars.ContextVar("mongo_operation_deadline", default=0.0)
+
+
+def operation_timeout():
+    """Context bounding one Mongo operation by the current request's deadline"""
+    deadline = _operation_deadline.get()
+    if not deadline:
+        return contextlib.nullcontext()
+    import pymongo
+
+    return pymongo.timeout(deadline)
+
+_client = None
+
+
+def get_client():
+    """The process-wide Motor client, created on first use"""
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        from metrics import mongo_command_listener
+
+        _client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'],
+            event_listeners=[mongo_command_listener()],
+            **settings.client_options()
+        )
+    return _client
+
+
+def get_database():
+    return get_client()[os.environ['DB_NAME']]
+
+
+class _LazyDatabase:
+    """Stand-in for the Motor database that defers connecting until needed"""
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
+
+db = _LazyDatabase()
+
+
+def close_client():
+    if _client is not None:
+        _client.close()
+
+
+def is_unavailable_error(exc: BaseException) -> bool:
+    """True for errors meaning Mongo is unreachable or too slow, as opposed to bad queries"""
+    from pymongo.errors import ConnectionFailure, ExecutionTimeout, PyMongoError
+
+    if isinstance(exc, (ConnectionFailure, ExecutionTimeout)):
+        return True
+    return isinstance(exc, PyMongoError) and exc.timeout
+
+
+def unavailable(detail: str = "Base de données temporairement indisponible") -> HTTPException:
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(breaker.retry_after())})
+
+
+async def mongo_guard(request: Request):
+    """Dependency for routes that use Mongo: fail fast when the circuit is open,
+    bound each of the request's Mongo operations by its deadline and record the outcome."""
+    if not breaker.allow():
+        raise unavailable()
+
+    route = request.scope.get("route")
+    token = _operation_deadline.set(settings.route_timeout(getattr(route, "name", "")))
+    try:
+        yield
+    except HTTPException as exc:
+        # Handlers wrap unexpected errors in HTTPException; look at the cause
+        if exc.__context__ is not None and is_unavailable_error(exc.__context__):
+            breaker.record_failure()
+            raise unavailable() from exc
+        breaker.record_success()
+        raise
+    except Exception as exc:
+        if is_unavailable_error(exc):
+            breaker.record_failure()
+            raise unavailable() from exc
+        raise
+    finally:
+        _operation_deadline.reset(token)
+    breaker.record_success()
+
+
+async def ping() -> float:
+    """Round-trip a ping to Mongo; returns the latency in milliseconds"""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(get_database().command("ping"), settings.ready_timeout_ms / 1000)
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return (time.perf_counter() - start) * 1000
+
+
+def database_status() -> str:
+    return {
+        CircuitBreaker.CLOSED: "connected",
+        CircuitBreaker.HALF_OPEN: "recovering",
+        CircuitBreaker.OPEN: "unavailable",
+    }[breaker.state]
@@ -0,0 +1,236 @@
+"""Courier dispatch: hand pending parcels to carriers.
+
+Carriers declare ``coverage_areas``, cities or regions.  ``CarrierIndex``
+inverts them (folded area -> carriers), so the carriers able to collect a
+parcel are found from its origin city and that city's region without a scan.
+The index is rebuilt when a carrier is added, and every
+``DISPATCH_CARRIER_REFRESH_SECONDS`` to pick up changes made elsewhere.
+
+Every ``DISPATCH_INTERVAL_SECONDS`` a pass, run by one worker at a time (it
+takes the ``dispatch`` job lease, see job_lease.py; passes that read the same
+carrier loads at once could overfill a carrier):
+
+1. reads each carrier's current load (parcels assigned and not delivered
+   yet), one aggregation per parcel collection;
+2. reads up to ``DISPATCH_BATCH_SIZE`` unassigned parcels, urgent first then
+   oldest;
+3. assigns them greedily in that order, each to the covering carrier with
+   the lowest cost: how full the parcel makes it (by weight and by parcel
+   count, against the capacity of its vehicle type), less a bonus for rating
+   and for covering the city itself rather than the whole region;
+4. writes the assignments with one bulk write per collection.  Parcels taken
+   meanwhile are skipped by the write, not reassigned.
+
+Parcels no carrier can take stay pending for the next pass.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import catalog
+from job_lease import exclusive
+from repositories import repos
+from text_folding import fold
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_INTERVAL = float(os.environ.get("DISPATCH_INTERVAL_SECONDS", 5))
+DISPATCH_BATCH_SIZE = int(os.environ.get("DISPATCH_BATCH_SIZE", 5000))
+CARRIER_REFRESH = float(os.environ.get("DISPATCH_CARRIER_REFRESH_SECONDS", 60))
+LEASE_SECONDS = float(os.environ.get("DISPATCH_LEASE_SECONDS", 120))
+
+# Vehicle type -> (capacity in kg, parcels carried at once)
+VEHICLE_CAPACITY: Dict[str, Tuple[float, int]] = {
+    "moto": (30.0, 8),
+    "car": (250.0, 25),
+    "van": (1000.0, 80),
+    "truck": (8000.0, 300),
+}
+DEFAULT_VEHICLE = "car"
+ACTIVE_STATUSES = ["assigned", "collected", "in_transit"]
+# Repositories holding parcels: /courier/book and /parcel-delivery
+PARCEL_SOURCES = ("couriers", "parcels")
+
+RATING_WEIGHT = 0.5
+CITY_BONUS = 0.2
+
+
+class Carrier:
+    """A carrier's capacity and the load it has during a pass"""
+
+    __slots__ = ("id", "name", "vehicle_type", "rating", "capacity_kg", "max_parcels", "load_kg", "parcels")
+
+    def __init__(self, document: dict):
+        self.id = document["id"]
+        self.name = document.get("name", "")
+        self.vehicle_type = document.get("vehicle_type") if document.get("vehicle_type") in VEHICLE_CAPACITY \
+            else DEFAULT_VEHICLE
+        self.rating = float(document.get("rating") or 0.0)
+        self.capacity_kg, self.max_parcels = VEHICLE_CAPACITY[self.vehicle_type]
+        self.load_kg = 0.0
+        self.parcels = 0
+
+    def bonus(self, exact: bool) -> float:
+        return RATING_WEIGHT * self.rating / 5 + (CITY_BONUS if exact else 0.0)
+
+    def floor(self, min_weight_kg: float, bonus: float) -> float:
+        """Lower bound of ``cost`` for any parcel of at least ``min_weight_kg``, given the current load"""
+        return max((self.load_kg + min_weight_kg) / self.capacity_kg, (self.parcels + 1) / self.max_parcels) - bonus
+
+    def cost(self, weight_kg: float, bonus: float) -> Optional[float]:
+        """Cost of giving this carrier a parcel of ``weight_kg``; None when it does not fit"""
+        load_kg, parcels = self.load_kg + weight_kg, self.parcels + 1
+        if load_kg > self.capacity_kg or parcels > self.max_parcels:
+            return None
+        return max(load_kg / self.capacity_kg, parcels / self.max_parcels) - bonus
+
+    def take(self, weight_kg: float):
+        self.load_kg += weight_kg
+        self.parcels += 1
+
+
+class CarrierIndex:
+    """Active carriers by folded coverage area"""
+
+    def __init__(self, documents: List[dict]):
+        self.carriers: Dict[str, Carrier] = {}
+        self.by_area: Dict[str, List[Carrier]] = {}
+        for document in documents:
+            carrier = self.carriers[document["id"]] = Carrier(document)
+            for area in {fold(area) for area in document.get("coverage_areas", []) if area}:
+                self.by_area.setdefault(area, []).append(carrier)
+
+    def areas(self, place: str) -> Tuple[str, Optional[str]]:
+        """Folded city and region of a parcel origin (region None when the city is unknown)"""
+        city = catalog.store.snapshot.city(place)
+        if city is None:
+            return fold(place), None
+        return fold(city["name"]), fold(city["region"])
+
+    def candidates(self, place: str) -> List[Tuple[Carrier, bool]]:
+        """Carriers covering ``place``, each with whether they cover the city itself"""
+        city, region = self.areas(place)
+        exact = self.by_area.get(city, [])
+        seen = {carrier.id for carrier in exact}
+        regional = [carrier for carrier in self.by_area.get(region, []) if carrier.id not in seen] if region else []
+        return [(carrier, True) for carrier in exact] + [(carrier, False) for carrier in regional]
+
+    def reset_loads(self, loads: List[dict]):
+        for carrier in self.carriers.values():
+            carrier.load_kg, carrier.parcels = 0.0, 0
+        for load in loads:
+            carrier = self.carriers.get(load["_id"])
+            if carrier is not None:
+                carrier.load_kg += load["weight_kg"] or 0.0
+                carrier.parcels += load["parcels"]
+
+
+def assign(index: CarrierIndex, parcels: List[Tuple[str, dict]]) -> Dict[str, Dict[str, List[str]]]:
+    """Greedy assignment of (source, parcel) pairs, in the order given; updates carrier loads.
+
+    Each origin keeps a heap of its candidate carriers keyed by ``floor``.
+    Loads only grow, so a key is never above the carrier's real cost for any
+    parcel of the batch, and only the carriers whose key is below the best cost
+    found need looking at.
+
+    Returns {source: {carrier_id: [parcel ids]}}.
+    """
+    assignments: Dict[str, Dict[str, List[str]]] = {source: {} for source in PARCEL_SOURCES}
+    heaps: Dict[str, list] = {}
+    min_weight = min((float(parcel.get("weight_kg") or 0.0) for _, parcel in parcels), default=0.0)
+    for source, parcel in parcels:
+        origin = parcel.get("origin", "")
+        heap = heaps.get(origin)
+        if heap is None:
+            heap = heaps[origin] = []
+            for position, (carrier, exact) in enumerate(index.candidates(origin)):
+                bonus = carrier.bonus(exact)
+                heap.append((carrier.floor(min_weight, bonus), position, carrier, bonus))
+            heapq.heapify(heap)
+        weight = float(parcel.get("weight_kg") or 0.0)
+        best, best_cost, seen = None, None, []
+        while heap and (best_cost is None or heap[0][0] < best_cost):
+            entry = heapq.heappop(heap)
+            carrier, bonus = entry[2], entry[3]
+            if carrier.parcels >= carrier.max_parcels:
+                continue  # For good: loads never go down during a pass
+            seen.append(entry)
+            cost = carrier.cost(weight, bonus)
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best, best_cost = carrier, cost
+        if best is not None:
+            best.take(weight)
+            assignments[source].setdefault(best.id, []).append(parcel["id"])
+        for _, position, carrier, bonus in seen:
+            heapq.heappush(heap, (carrier.floor(min_weight, bonus), position, carrier, bonus))
+    return assignments
+
+
+class Dispatcher:
+    """Carrier index of this worker and the periodic assignment pass"""
+
+    def __init__(self):
+        self.index = CarrierIndex([])
+        self.indexed_at = 0.0
+        self.last_pass: Optional[dict] = None
+
+    async def refresh_carriers(self):
+        self.index = CarrierIndex(await repos.carriers.active())
+        self.indexed_at = time.monotonic()
+
+    async def run_once(self, limit: int = DISPATCH_BATCH_SIZE, min_interval: float = 0.0) -> Optional[dict]:
+        """One assignment pass; returns its counts, None when another worker runs it (or just did)"""
+        async with exclusive("dispatch", LEASE_SECONDS, min_interval) as acquired:
+            if not acquired:
+                return None
+            start = time.perf_counter()
+            if time.monotonic() - self.indexed_at > CARRIER_REFRESH:
+                await self.refresh_carriers()
+            loads, pending = [], []
+            for source in PARCEL_SOURCES:
+                repository = getattr(repos, source)
+                loads.extend(await repository.carrier_loads(ACTIVE_STATUSES))
+                pending.extend((source, parcel) for parcel in await repository.pending_dispatch(limit))
+            pending.sort(key=lambda item: (not item[1].get("urgent"), item[1].get("created_at") or datetime.min))
+            pending = pending[:limit]
+
+            self.index.reset_loads(loads)
+            # Thousands of parcels: keep the event loop serving requests meanwhile
+            assignments = await asyncio.to_thread(assign, self.index, pending)
+            now = datetime.utcnow()
+            assigned = 0
+            for source, by_carrier in assignments.items():
+                if by_carrier:
+                    assigned += await getattr(repos, source).assign(
+                        {carrier_id: (self.index.carriers[carrier_id].name, parcel_ids)
+                         for carrier_id, parcel_ids in by_carrier.items()},
+                        now,
+                    )
+            planned = sum(len(ids) for by_carrier in assignments.values() for ids in by_carrier.values())
+            self.last_pass = {
+                "at": now,
+                "pending": len(pending),
+                "assigned": assigned,
+                "lost_to_other_workers": planned - assigned,
+                "unassigned": len(pending) - planned,
+                "carriers": len(self.index.carriers),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            return self.last_pass
+
+    async def run(self, interval: float = DISPATCH_INTERVAL):
+        """Background task: an assignment pass every ``interval`` seconds"""
+        while True:
+            try:
+                await self.run_once(min_interval=interval / 2)
+            except Exception:
+                logger.exception("Dispatch pass failed")
+            await asyncio.sleep(interval)
+
+
+dispatcher = Dispatcher()
@@ -0,0 +1,202 @@
+"""Gazetteer: the places of the catalog, found by name in free-text addresses.
+
+The places are the cities (``cities.json`` and the chefs-lieux of
+``administrative_structure.json``), the regions (at the centre of their
+chefs-lieux) and the neighbourhoods of the larger towns (``quarters.json``).
+A ``Gazetteer`` is compiled once per catalog version (``snapshot.gazetteer``).
+
+An address is folded (case and accents), split into words, and stripped of
+house numbers and filler words ("rue", "face", "quartier", ...).  Place names
+are then looked for left to right, longest first, up to three words, also
+written as one word ("Mvog-Mbi", "mvogmbi").  A single word one letter off a
+name (missing, extra or wrong letter) still matches, with a lower score.
+
+Among the places found, the most precise wins: a quarter before a city, a
+city before a region.  The confidence (0 to 1) reflects that precision, and
+goes up when the address or the caller's city hint confirm the quarter's city,
+down for a misspelled name, or a name shared by places far apart (unless
+confirmed).  Given a
+city hint, quarters of other cities only count when the address names their
+city.  An address with no known name falls back to the hint city's centre
+with a low confidence.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from geo import haversine_km
+from text_folding import fold
+
+MAX_PHRASE_WORDS = 3
+MIN_TYPO_LENGTH = 5
+
+KIND_SCORE = {"quarter": 0.8, "city": 0.6, "region": 0.3}
+CONFIRMED_BONUS = 0.15  # the address or the hint names the quarter's city
+HINT_CITY_BONUS = 0.1  # the city found is the hint
+TYPO_FACTOR = 0.85
+AMBIGUOUS_FACTOR = 0.7
+AMBIGUOUS_KM = 2.0
+FALLBACK_CONFIDENCE = 0.2
+
+WORD_SEPARATORS = re.compile(r"[^0-9a-z]+")
+FILLER_WORDS = frozenset("""
+    a au aux d de des du en et l la le les of the
+    rue avenue av bd boulevard route carrefour rond point quartier qtr quarter street road
+    face derriere pres cote vers apres avant entree ancien ancienne immeuble bp
+    cameroun cameroon republique
+""".split())
+
+
+def words(address: str) -> List[str]:
+    """Normalized words of an address: folded, no numbers nor filler words"""
+    return [word for word in WORD_SEPARATORS.split(fold(address))
+            if word and not word.isdigit() and word not in FILLER_WORDS]
+
+
+def one_letter_variants(word: str) -> Set[str]:
+    return {word} | {word[:index] + word[index + 1:] for index in range(len(word))}
+
+
+class Place:
+    """A named point: quarter, city or region"""
+
+    __slots__ = ("name", "kind", "city", "region", "lat", "lng", "population")
+
+    def __init__(self, name: str, kind: str, city: str, region: str, lat: float, lng: float, population: int = 0):
+        self.name = name
+        self.kind = kind
+        self.city = city
+        self.region = region
+        self.lat = lat
+        self.lng = lng
+        self.population = population
+
+    def result(self, matched: Optional[str], confidence: float) -> dict:
+        return {
+            "place": self.name,
+            "kind": self.kind,
+            "city": self.city or None,
+            "region": self.region,
+            "lat": self.lat,
+            "lng": self.lng,
+            "matched": matched,
+            "confidence": round(min(1.0, confidence), 2),
+        }
+
+
+class Gazetteer:
+    """Places of one catalog version, indexed by normalized name"""
+
+    def __init__(self, cities: List[dict], administrative_structure: Dict[str, dict],
+                 quarters: Dict[str, List[dict]]):
+        self.places: List[Place] = []
+        self.city_index: Dict[str, int] = {}
+        self.names: Dict[str, List[int]] = {}
+        self.variants: Dict[str, Set[str]] = {}
+
+        for city in cities:
+            self._add_city(city["name"], city["region"], city["lat"], city["lng"], city.get("population", 0),
+                           city.get("aliases", []))
+        for region, section in administrative_structure.items():
+            chefs_lieux = section.get("cities", [])
+            for city in chefs_lieux:
+                self._add_city(city["name"], region, city["lat"], city["lng"], 0, [])
+            if chefs_lieux:
+                lat = sum(city["lat"] for city in chefs_lieux) / len(chefs_lieux)
+                lng = sum(city["lng"] for city in chefs_lieux) / len(chefs_lieux)
+                self._add(Place(region, "region", "", region, lat, lng), [region])
+        for city_name, city_quarters in quarters.items():
+            index = self.city_index.get(fold(city_name))
+            if index is None:
+                continue
+            city = self.places[index]
+            for quarter in city_quarters:
+                self._add(Place(quarter["name"], "quarter", city.name, city.region, quarter["lat"], quarter["lng"]),
+                          [quarter["name"], *quarter.get("aliases", [])])
+
+    def _add_city(self, name: str, region: str, lat: float, lng: float, population: int, aliases: List[str]):
+        if fold(name) in self.city_index:
+            return
+        self.city_index[fold(name)] = len(self.places)
+        self._add(Place(name, "city", name, region, lat, lng, population), [name, *aliases])
+
+    def _add(self, place: Place, names: Iterable[str]):
+        index = len(self.places)
+        self.places.append(place)
+        for name in names:
+            name_words = words(name)
+            if not name_words or len(name_words) > MAX_PHRASE_WORDS:
+                continue
+            for key in {" ".join(name_words), "".join(name_words)}:
+                entries = self.names.setdefault(key, [])
+                if index not in entries:
+                    entries.append(index)
+                if " " not in key and len(key) >= MIN_TYPO_LENGTH:
+                    for variant in one_letter_variants(key):
+                        self.variants.setdefault(variant, set()).add(key)
+
+    def city_key(self, name: Optional[str]) -> str:
+        """Folded name of a known city, "" otherwise"""
+        key = fold(name or "")
+        return key if key in self.city_index else ""
+
+    def _lookup(self, address_words: Sequence[str]) -> List[Tuple[str, List[int], bool]]:
+        """(matched name, places, misspelled) found left to right, longest phrases first"""
+        found = []
+        position = 0
+        while position < len(address_words):
+            for length in range(min(MAX_PHRASE_WORDS, len(address_words) - position), 0, -1):
+                phrase = address_words[position:position + length]
+                key = " ".join(phrase)
+                places = self.names.get(key) or self.names.get("".join(phrase))
+                if places:
+                    found.append((key, places, False))
+                    position += length
+                    break
+            else:
+                word = address_words[position]
+                if len(word) >= MIN_TYPO_LENGTH:
+                    keys = set()
+                    for variant in one_letter_variants(word):
+                        keys |= self.variants.get(variant, set())
+                    for key in sorted(keys):
+                        found.append((key, self.names[key], True))
+                position += 1
+        return found
+
+    def resolve(self, address_words: Sequence[str], hint: str = "") -> Optional[dict]:
+        """Best place for normalized address words, with its confidence; None when nothing matches"""
+        found = self._lookup(address_words)
+        named_cities = {fold(self.places[index].name) for _, places, _ in found for index in places
+                        if self.places[index].kind == "city"}
+        scored: List[Tuple[float, int, str, Place, bool]] = []
+        for key, places, misspelled in found:
+            for index in places:
+                place = self.places[index]
+                score, confirmed = KIND_SCORE[place.kind], False
+                if place.kind == "quarter":
+                    if fold(place.city) in named_cities or fold(place.city) == hint:
+                        score, confirmed = score + CONFIRMED_BONUS, True
+                    elif hint:
+                        continue  # The address is in another city
+                elif place.kind == "city" and hint and fold(place.name) == hint:
+                    score, confirmed = score + HINT_CITY_BONUS, True
+                if misspelled:
+                    score *= TYPO_FACTOR
+                scored.append((score, place.population, key, place, confirmed))
+
+        if not scored:
+            if not hint:
+                return None
+            return self.places[self.city_index[hint]].result(None, FALLBACK_CONFIDENCE)
+
+        scored.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        score, _, key, place, confirmed = scored[0]
+        for other_score, _, other_key, other, _ in scored[1:]:
+            if confirmed and other_score < score:
+                break
+            if (other_score == score or other_key == key) and \
+                    haversine_km((place.lat, place.lng), (other.lat, other.lng)) > AMBIGUOUS_KM:
+                score *= AMBIGUOUS_FACTOR
+                break
+        return place.result(key, score)
@@ -0,0 +1,42 @@
+"""Distances on the ground, in kilometres, from (lat, lng) degrees.
+
+Distances between cities use the haversine formula.  Distances to a route
+treat the route as the straight line between its two end cities, measured on
+an equirectangular projection centred on the route.  Inside Cameroon this
+stays within about a percent of the true value.
+"""
+
+import math
+from typing import Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG = 111.320  # at the equator, scaled by cos(latitude)
+
+Point = Tuple[float, float]  # (lat, lng)
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    lat1, lng1 = map(math.radians, a)
+    lat2, lng2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def distance_to_segment_km(point: Point, start: Point, end: Point) -> Tuple[float, float]:
+    """Distance from ``point`` to the segment start-end, and where along it (0 to 1) the closest point lies"""
+    lng_scale = KM_PER_DEGREE_LNG * math.cos(math.radians((start[0] + end[0]) / 2))
+
+    def project(p: Point) -> Tuple[float, float]:
+        return p[1] * lng_scale, p[0] * KM_PER_DEGREE_LAT
+
+    (x, y), (x1, y1), (x2, y2) = project(point), project(start), project(end)
+    dx, dy = x2 - x1, y2 - y1
+    length_squared = dx * dx + dy * dy
+    fraction = 0.0 if length_squared == 0 else max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length_squared))
+    return math.hypot(x - (x1 + fraction * dx), y - (y1 + fraction * dy)), fraction
+
+
+def detour_km(point: Point, start: Point, end: Point) -> float:
+    """Extra distance of going start -> point -> end instead of start -> end"""
+    return haversine_km(start, point) + haversine_km(point, end) - haversine_km(start, end)
@@ -0,0 +1,98 @@
+"""Geocoding of free-text addresses, with caching; see gazetteer.py for the matching.
+
+Results are cached by normalized address, city hint and catalog version: in
+process (LRU, ``GEOCODE_CACHE_SIZE`` entries, emptied when a new catalog is
+swapped in) and in the ``geocode_cache`` collection, shared by the workers and
+kept across restarts.  ``geocode_many`` resolves thousands of addresses with
+one read and one write of the shared cache, off the event loop.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import catalog
+from gazetteer import Gazetteer, words
+from metrics import register_cache
+from repositories import repos
+
+GEOCODE_CACHE_SIZE = int(os.environ.get("GEOCODE_CACHE_SIZE", 50000))
+# Larger batches are normalized and resolved off the event loop
+INLINE_BATCH = 64
+
+
+def _normalize(addresses: Sequence[str], version: str, hint: str) -> List[str]:
+    """Cache keys of addresses: catalog version, hint and normalized words"""
+    return [f"{version}|{hint}|{' '.join(words(address))}" for address in addresses]
+
+
+def _resolve(gazetteer: Gazetteer, keys: List[str], hint: str) -> Dict[str, Optional[dict]]:
+    return {key: gazetteer.resolve(key.split("|", 2)[2].split(), hint) for key in keys}
+
+
+class Geocoder:
+    """Geocoding through the in-process LRU and the shared Mongo cache"""
+
+    def __init__(self, max_entries: int = GEOCODE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[dict]]" = OrderedDict()
+        self.metrics = register_cache("geocode")
+
+    def clear(self, *_):
+        self._entries.clear()
+        self.metrics.set_size(0)
+
+    def _store(self, key: str, result: Optional[dict]):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def geocode_many(self, addresses: Sequence[str], city: Optional[str] = None) -> List[Optional[dict]]:
+        """Places of ``addresses`` in order (None when unknown); ``city`` hints where they are"""
+        snapshot = catalog.store.snapshot
+        gazetteer = snapshot.gazetteer
+        hint = gazetteer.city_key(city)
+        offload = len(addresses) > INLINE_BATCH
+        keys = (await asyncio.to_thread(_normalize, addresses, snapshot.version, hint) if offload
+                else _normalize(addresses, snapshot.version, hint))
+
+        results: Dict[str, Optional[dict]] = {}
+        for key in dict.fromkeys(keys):
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                results[key] = self._entries[key]
+                self.metrics.hit()
+            else:
+                self.metrics.miss()
+        missing = [key for key in dict.fromkeys(keys) if key not in results]
+        if missing:
+            for entry in await repos.geocode_cache.by_keys(missing):
+                results[entry["key"]] = entry["result"]
+                self._store(entry["key"], entry["result"])
+            unknown = [key for key in missing if key not in results]
+            if unknown:
+                resolved = (await asyncio.to_thread(_resolve, gazetteer, unknown, hint) if offload
+                            else _resolve(gazetteer, unknown, hint))
+                now = datetime.utcnow()
+                await repos.geocode_cache.save(
+                    [{"key": key, "result": result, "created_at": now} for key, result in resolved.items()]
+                )
+                for key, result in resolved.items():
+                    results[key] = result
+                    self._store(key, result)
+            self.metrics.set_size(len(self._entries))
+
+        return [
+            {"address": address, **results[key]} if results[key] is not None else None
+            for address, key in zip(addresses, keys)
+        ]
+
+    async def geocode(self, address: str, city: Optional[str] = None) -> Optional[dict]:
+        return (await self.geocode_many([address], city))[0]
+
+
+geocoder = Geocoder()
+catalog.store.on_swap(geocoder.clear)
@@ -0,0 +1,38 @@
+"""Batch jobs run by one worker at a time.
+
+Every uvicorn worker starts the same background tasks.  A batch job whose
+run must not overlap with itself in another worker (it packs or plans from
+what it read, then writes) takes the job's lease in the ``job_leases``
+collection first, and a worker that does not get it skips the run:
+
+* the lease lasts ``ttl`` seconds, so a worker that dies mid-run holds the
+  job no longer than that; ``ttl`` is well above the job's longest run;
+* ``min_interval`` skips the run when another worker finished one less than
+  that many seconds ago, so N workers with the same period make one run per
+  period between them rather than N.
+"""
+
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from repositories import repos
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@asynccontextmanager
+async def exclusive(name: str, ttl: float, min_interval: float = 0.0) -> AsyncIterator[bool]:
+    """Hold job ``name`` for the block; yields False (and holds nothing) when another worker has it"""
+    now = datetime.utcnow()
+    acquired = await repos.job_leases.acquire(
+        name, WORKER_ID, now, now + timedelta(seconds=ttl), now - timedelta(seconds=min_interval)
+    )
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await repos.job_leases.release(name, WORKER_ID, datetime.utcnow())
@@ -0,0 +1,256 @@
+"""Per-client rate limiting and adaptive load shedding.
+
+Every API request falls in a route class:
+
+* ``critical``: booking, courier and payment writes
+* ``standard``: search, registration, admin
+* ``background``: catalog, weather and tracking reads
+
+Two checks run before a request reaches the routers.
+
+Rate limiting (``RATE_LIMITS``) gives each client one token bucket per class.
+The client is its ``X-API-Key`` when that is one of ``RATE_LIMIT_API_KEYS``,
+or else its IP address: unknown keys are ignored, so rotating made-up keys
+neither earns fresh buckets nor evicts other clients'.  An empty bucket
+answers 429 with ``Retry-After``.  It is off unless configured: many mobile
+users share carrier NAT addresses, so per-IP limits are a deployment decision.
+Example value: ``"background=20/40,standard=20/40"``, meaning a rate of 20
+requests/s with a burst of 40.
+
+Load shedding keeps an adaptive limit on the number of requests in flight.
+``monitor_event_loop`` measures event-loop lag.  While the lag stays above
+``SHED_LAG_MS`` the limit shrinks multiplicatively; otherwise it grows back by
+one per sample (AIMD).  Each class may only fill its share of the limit, so
+critical writes keep headroom that reads cannot take.  While the loop is
+lagging, background reads are refused outright.  A shed request gets 503 with
+``Retry-After``.
+
+Refusals are counted in ``requests_shed_total`` by class and reason.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from metrics import CONCURRENCY_LIMIT, EVENT_LOOP_LAG, REQUESTS_SHED
+
+logger = logging.getLogger(__name__)
+
+CRITICAL, STANDARD, BACKGROUND = "critical", "standard", "background"
+
+# (method or None for any, path prefix, class); first match wins, other /api paths are background
+ROUTE_CLASSES = [
+    ("POST", "/api/booking", CRITICAL),
+    ("POST", "/api/courier/book", CRITICAL),
+    ("POST", "/api/parcel-delivery", CRITICAL),
+    ("POST", "/api/payment", CRITICAL),
+    (None, "/api/routes/", STANDARD),
+    (None, "/api/payment", STANDARD),
+    (None, "/api/courier/track", STANDARD),
+    (None, "/api/registration/", STANDARD),
+    (None, "/api/register/", STANDARD),
+    (None, "/api/admin/", STANDARD),
+]
+
+# Share of the concurrency limit each class may occupy
+CLASS_SHARES = {CRITICAL: 1.0, STANDARD: 0.75, BACKGROUND: 0.5}
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None for paths exempt from admission control"""
+    if not path.startswith("/api/") or method == "OPTIONS":
+        return None
+    for route_method, prefix, route_class in ROUTE_CLASSES:
+        if (route_method is None or route_method == method) and path.startswith(prefix):
+            return route_class
+    return BACKGROUND
+
+
+def _parse_rate_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    """"background=20/40,standard=10" -> {class: (rate per second, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, spec = item.partition("=")
+        rate, _, burst = spec.partition("/")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+@dataclass
+class SheddingSettings:
+    rate_limits: Dict[str, Tuple[float, float]] = field(
+        default_factory=lambda: _parse_rate_limits(os.environ.get("RATE_LIMITS", ""))
+    )
+    max_clients: int = field(default_factory=lambda: int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", 10000)))
+    # API keys issued to partners, comma-separated
+    api_keys: frozenset = field(default_factory=lambda: frozenset(
+        filter(None, (key.strip() for key in os.environ.get("RATE_LIMIT_API_KEYS", "").split(",")))
+    ))
+    trust_proxy: bool = field(default_factory=lambda: os.environ.get("RATE_LIMIT_TRUST_PROXY", "0") == "1")
+    enabled: bool = field(default_factory=lambda: os.environ.get("SHED_ENABLED", "1") == "1")
+    max_in_flight: int = field(default_factory=lambda: int(os.environ.get("SHED_MAX_IN_FLIGHT", 512)))
+    min_in_flight: int = field(default_factory=lambda: int(os.environ.get("SHED_MIN_IN_FLIGHT", 16)))
+    lag_threshold: float = field(default_factory=lambda: float(os.environ.get("SHED_LAG_MS", 100)) / 1000)
+    lag_interval: float = field(default_factory=lambda: float(os.environ.get("SHED_LAG_INTERVAL_MS", 50)) / 1000)
+
+
+settings = SheddingSettings()
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    """Token buckets per (client, route class), least recently seen clients evicted first"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], max_clients: int):
+        self.limits = limits
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def check(self, client: str, route_class: str) -> float:
+        """0 when the request may proceed, else the Retry-After delay in seconds"""
+        limit = self.limits.get(route_class)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        now = time.monotonic()
+        key = (client, route_class)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(rate, burst, now)
+
+
+class AdaptiveConcurrencyLimit:
+    """In-flight limit that shrinks while the event loop lags and recovers after"""
+
+    def __init__(self, min_limit: int, max_limit: int, lag_threshold: float):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.lag_threshold = lag_threshold
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.lag = 0.0
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.lag > self.lag_threshold
+
+    def observe_lag(self, lag: float):
+        # Smooth single hiccups (a GC pause) but react within a few samples
+        self.lag = 0.7 * self.lag + 0.3 * lag
+        if self.overloaded:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+        EVENT_LOOP_LAG.set(self.lag)
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    def admit(self, route_class: str) -> bool:
+        if route_class == BACKGROUND and self.overloaded:
+            return False
+        return self.in_flight < self.limit * CLASS_SHARES[route_class]
+
+
+rate_limiter = RateLimiter(settings.rate_limits, settings.max_clients)
+concurrency = AdaptiveConcurrencyLimit(settings.min_in_flight, settings.max_in_flight, settings.lag_threshold)
+
+
+async def monitor_event_loop(interval: float = settings.lag_interval):
+    """Background task feeding event-loop lag samples to the concurrency limit"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        concurrency.observe_lag(max(0.0, loop.time() - start - interval))
+
+
+def client_key(scope) -> str:
+    forwarded = None
+    for name, value in scope["headers"]:
+        if name == b"x-api-key":
+            key = value.decode("latin-1")
+            if key in settings.api_keys:
+                return "key:" + key
+        if name == b"x-forwarded-for":
+            forwarded = value
+    if forwarded and settings.trust_proxy:
+        return forwarded.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _refuse(send, status: int, detail: str, retry_after: float):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class LoadSheddingMiddleware:
+    """Applies the rate limits and the adaptive concurrency limit to /api requests"""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter, limit: AdaptiveConcurrencyLimit = concurrency,
+                 shedding_enabled: bool = settings.enabled):
+        self.app = app
+        self.limiter = limiter
+        self.limit = limit
+        self.shedding_enabled = shedding_enabled
+
+    async def __call__(self, scope, receive, send):
+        route_class = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.limiter.limits:
+            retry_after = self.limiter.check(client_key(scope), route_class)
+            if retry_after:
+                REQUESTS_SHED.labels(route_class, "rate_limited").inc()
+                await _refuse(send, 429, "Trop de requêtes, veuillez réessayer plus tard", retry_after)
+                return
+
+        if self.shedding_enabled and not self.limit.admit(route_class):
+            REQUESTS_SHED.labels(route_class, "overloaded").inc()
+            await _refuse(send, 503, "Service surchargé, veuillez réessayer plus tard", 1)
+            return
+
+        self.limit.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limit.in_flight -= 1
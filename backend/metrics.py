@@ -0,0 +1,205 @@
+"""Prometheus metrics: HTTP per route, Mongo commands, repository operations and
+cache hit ratios.
+
+Labels are kept bounded: HTTP metrics use the route template
+(``/api/tracking/{vehicle_id}``), never the raw path, and Mongo metrics use the
+command name and collection.  With several uvicorn workers, set
+``PROMETHEUS_MULTIPROC_DIR`` so ``/metrics`` aggregates every worker.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to produce the response", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ["method", "route"], buckets=SIZE_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled", multiprocess_mode="livesum"
+)
+
+MONGO_COMMANDS = Counter(
+    "mongodb_commands_total", "MongoDB commands sent", ["command", "collection", "outcome"]
+)
+MONGO_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trip", ["command", "collection"],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUESTS_SHED = Counter(
+    "requests_shed_total", "Requests refused by admission control", ["route_class", "reason"]
+)
+CONCURRENCY_LIMIT = Gauge(
+    "concurrency_limit", "Adaptive limit on requests in flight", multiprocess_mode="livesum"
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds", "Smoothed event loop scheduling lag", multiprocess_mode="livemax"
+)
+
+REPOSITORY_LATENCY = Histogram(
+    "repository_operation_duration_seconds", "Repository operation time, any backend",
+    ["backend", "collection", "operation"], buckets=LATENCY_BUCKETS,
+)
+
+SEARCH_EVENTS = Counter(
+    "search_events_total", "Search log events by outcome (queued, dropped, written, failed)", ["outcome"]
+)
+
+PAYMENT_EVENTS = Counter(
+    "payment_events_total", "Mobile-money callbacks and transaction outcomes by provider", ["provider", "event"]
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries", "Entries held by a cache", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_BYTES = Gauge(
+    "cache_memory_bytes", "Approximate memory held by a cache", ["cache"], multiprocess_mode="livesum"
+)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. /api/tracking/{vehicle_id}"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Records count, latency and response size per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method = scope["method"]
+            route = route_template(scope)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(size)
+
+
+def observe_repository_operation(backend: str, collection: str, operation: str, seconds: float):
+    """Timing hook for repositories.py"""
+    REPOSITORY_LATENCY.labels(backend, collection, operation).observe(seconds)
+
+
+class CacheMetrics:
+    """Hit/miss counters and size gauges for one named cache"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self._entries = CACHE_ENTRIES.labels(name)
+        self._bytes = CACHE_BYTES.labels(name)
+
+    def hit(self):
+        self._hits.inc()
+
+    def miss(self):
+        self._misses.inc()
+
+    def set_size(self, entries: int, memory_bytes: int = 0):
+        self._entries.set(entries)
+        self._bytes.set(memory_bytes)
+
+
+_caches = {}
+
+
+def register_cache(name: str) -> CacheMetrics:
+    """Metrics handle for a cache layer; the same name returns the same handle"""
+    if name not in _caches:
+        _caches[name] = CacheMetrics(name)
+    return _caches[name]
+
+
+def mongo_command_listener():
+    """pymongo CommandListener feeding the mongodb_* metrics.
+
+    Built lazily because importing pymongo is deferred until the client exists.
+    """
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        def __init__(self):
+            # (connection, request id) -> collection, filled by started events
+            self._collections = {}
+
+        def started(self, event):
+            collection = event.command.get(event.command_name)
+            if event.command_name == "getMore":
+                collection = event.command.get("collection")
+            if not isinstance(collection, str):
+                collection = ""
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+        def _finished(self, event, outcome):
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+            MONGO_COMMANDS.labels(event.command_name, collection, outcome).inc()
+            MONGO_LATENCY.labels(event.command_name, collection).observe(event.duration_micros / 1e6)
+
+        def succeeded(self, event):
+            self._finished(event, "success")
+
+        def failed(self, event):
+            self._finished(event, "failure")
+
+    return MongoCommandMetrics()
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,217 @@
+"""Pydantic models shared by the Connect237 routers"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import random
+import uuid
+
+from pydantic import BaseModel, Field
+
+
+# === ENHANCED MODELS FOR CONNECT237 ===
+
+class WeatherInfo(BaseModel):
+    city: str
+    temperature: float
+    description: str
+    humidity: int
+    wind_speed: float
+    icon: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class TouristAttraction(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    city: str
+    region: str
+    description: str
+    image_url: str
+    category: str  # "nature", "cultural", "adventure", "historical"
+    rating: float
+    coordinates: Dict[str, float]
+
+class TransportAgency(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    registration_number: str
+    headquarters: str
+    phone: str
+    email: Optional[str] = None
+    website: Optional[str] = None
+    founded_year: int
+    fleet_size: int
+    routes_served: List[str]
+    services: List[str]  # ["passenger", "cargo", "courier"]
+    rating: float
+    logo_url: str
+    verified: bool = True
+    premium_partner: bool = False
+
+class CourierService(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    sender_id: str
+    recipient_name: str
+    recipient_phone: str
+    origin: str
+    destination: str
+    pickup_address: str
+    delivery_address: str
+    pickup_coordinates: Optional[List[float]] = None  # [lat, lng]
+    delivery_coordinates: Optional[List[float]] = None
+    package_type: str  # "documents", "clothes", "electronics", "food", "other"
+    weight_kg: float
+    volume_liters: Optional[float] = None  # Estimated from type and weight when not declared
+    declared_value: int
+    urgent: bool = False
+    insurance: bool = False
+    pickup_time: Optional[str] = None
+    delivery_instructions: str = ""
+    tracking_number: str = Field(default_factory=lambda: f"C237{random.randint(100000, 999999)}")
+    status: str = "pending"  # pending, collected, in_transit, delivered, failed
+    price: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class GPSLocation(BaseModel):
+    vehicle_id: str
+    latitude: float
+    longitude: float
+    heading: float
+    speed_kmh: float
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    driver_status: str = "active"  # active, break, offline
+
+class PaymentMethod(BaseModel):
+    type: str  # "mobile_money", "account_credit", "voucher", "reservation"
+    provider: Optional[str] = None  # "MTN", "ORANGE"
+    account_number: Optional[str] = None
+    voucher_code: Optional[str] = None
+    reservation_fee: int = 500  # FCFA
+
+class PaymentTransaction(BaseModel):
+    """A mobile-money collection, reconciled in the background (see payments.py)"""
+    reference: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    provider: str  # "MTN", "ORANGE"
+    amount: int
+    currency: str = "XAF"
+    account_number: Optional[str] = None
+    status: str = "created"  # created, pending, successful, failed, expired
+    attempts: int = 0
+    provider_transaction_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    next_poll_at: datetime = Field(default_factory=datetime.utcnow)
+    requested_at: Optional[datetime] = None
+    settled_at: Optional[datetime] = None
+
+class EnhancedBooking(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    route_id: str
+    agency_id: str
+    vehicle_id: Optional[str] = None
+    
+    # Passenger details
+    passenger_count: int
+    custom_passenger_count: Optional[int] = None
+    passenger_details: List[Dict[str, Any]] = []
+    
+    # Journey details
+    departure_date: str
+    departure_time: str
+    pickup_location: Dict[str, Any]  # {"address": "", "coordinates": {"lat": 0, "lng": 0}}
+    dropoff_location: Dict[str, Any]
+    
+    # Pricing
+    base_price: int
+    reservation_fee: int = 500
+    total_price: int
+    payment_method: PaymentMethod
+    payment_status: str = "reservation"  # reservation, pending, partial, completed, failed
+    payment: Optional[PaymentTransaction] = None  # mobile money only
+    
+    # Services
+    courier_services: List[str] = []  # Courier service IDs if any
+    special_requests: str = ""
+    
+    # Status
+    status: str = "reserved"  # reserved, confirmed, in_progress, completed, cancelled
+    booking_reference: str = Field(default_factory=lambda: f"C237{random.randint(100000, 999999)}")
+    qr_code: str = ""
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+# === ADDITIONAL MODELS FOR CONNECT237 FEATURES ===
+
+class UserRegistration(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_type: str  # "client", "agency", "transporter", "occasional_transporter"
+    personal_info: Dict[str, Any]  # Name, email, phone, address
+    documents: List[Dict[str, Any]] = []  # Uploaded documents
+    verification_status: str = "pending"  # pending, verified, rejected
+    admin_comments: str = ""
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    verified_at: Optional[datetime] = None
+
+class SmartSearchQuery(BaseModel):
+    query: str
+    filters: Dict[str, Any] = {}
+    user_preferences: Dict[str, Any] = {}
+
+class AdminDashboardStats(BaseModel):
+    total_users: int
+    pending_verifications: int
+    total_bookings: int
+    revenue_today: int
+    active_vehicles: int
+    courier_deliveries: int
+
+class Vehicle(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    agency_id: str
+    agency_name: str
+    model: str
+    brand: str
+    year: int
+    color: str
+    license_plate: str
+    capacity: int
+    vehicle_type: str  # "bus", "minibus", "car", "van"
+    status: str = "active"  # active, maintenance, inactive
+    driver_name: Optional[str] = None
+    driver_phone: Optional[str] = None
+    current_route: Optional[str] = None
+    gps_enabled: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_maintenance: Optional[datetime] = None
+
+class CourierCarrier(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    phone: str
+    email: Optional[str] = None
+    license_number: str
+    vehicle_type: str  # "moto", "car", "van", "truck"
+    coverage_areas: List[str]  # List of regions/cities they cover
+    rating: float = 4.0
+    active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class AppSettings(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    setting_key: str
+    setting_value: str
+    setting_type: str  # "text", "number", "boolean", "json"
+    description: str
+    updated_by: str  # admin user id
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PolicyDocument(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    content: str
+    document_type: str  # "privacy", "terms", "conditions", "refund"
+    language: str = "fr"  # Default French
+    version: str = "1.0"  # Label shown to users
+    revision: int = 0  # Assigned by the policy store, increases per (document_type, language)
+    active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,283 @@
+"""Mobile-money payments: collection requests and their reconciliation, off the booking path.
+
+A booking paid by mobile money is saved with ``payment_status = "pending"``
+and a ``payment`` transaction (reference, provider, amount, phone number) in
+the ``created`` state.  The booking request never calls the provider.
+
+Every ``PAYMENT_RECONCILE_SECONDS`` the ``PaymentReconciler``:
+
+1. applies the provider callbacks received since the last pass.  The webhook
+   endpoint only checks and parses a callback and appends it to an in-process
+   queue of ``PAYMENT_CALLBACK_QUEUE_SIZE``, so it answers at once.  A
+   callback never settles a payment: anyone who knows a reference could send
+   one.  It only makes its pending transaction due for a poll now, and the
+   poll answer from the provider settles it;
+2. claims a batch of due transactions: every worker runs the reconciler,
+   so a transaction is leased to one pass for ``PAYMENT_CLAIM_SECONDS`` (its
+   ``next_poll_at`` moves to the end of the lease) before any provider call.
+   A pass that dies leaves its transactions due again once the lease ends;
+3. sends the collection requests of the new transactions claimed (``created``
+   -> ``pending``), one batch per provider.  A request the provider does not
+   accept is retried later, with the same backoff as polls;
+4. polls the status of the pending transactions claimed, one batch per
+   provider, backing off from ``PAYMENT_POLL_BASE_SECONDS`` to
+   ``PAYMENT_POLL_MAX_SECONDS`` between polls of the same transaction;
+5. writes every change with one bulk write, each update guarded on the
+   transaction still being open (and, for claimed ones, still claimed by the
+   pass), so a callback and a poll, or two workers, settle a transaction once.
+
+A transaction still open ``PAYMENT_TIMEOUT_MINUTES`` after it was created
+expires, requested or not.  A successful payment sets the booking's ``payment_status`` to
+``completed`` and its status to ``confirmed``; a failed or expired one sets
+``payment_status`` to ``failed``.  Callbacks still queued when a worker dies
+are lost, and the regular polls catch up with them.
+
+``SimulatedProvider`` stands in for the MTN MoMo and Orange Money collection
+APIs, with their status vocabularies and callback fields: a payment settles
+``PAYMENT_SIMULATED_DELAY_SECONDS`` after its request, approved for
+``PAYMENT_SIMULATED_SUCCESS_RATE`` of the references.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from metrics import PAYMENT_EVENTS
+from repositories import repos
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL = float(os.environ.get("PAYMENT_RECONCILE_SECONDS", 5))
+RECONCILE_BATCH_SIZE = int(os.environ.get("PAYMENT_RECONCILE_BATCH_SIZE", 2000))
+CLAIM_SECONDS = float(os.environ.get("PAYMENT_CLAIM_SECONDS", 60))
+CALLBACK_QUEUE_SIZE = int(os.environ.get("PAYMENT_CALLBACK_QUEUE_SIZE", 10000))
+POLL_BASE = float(os.environ.get("PAYMENT_POLL_BASE_SECONDS", 10))
+POLL_MAX = float(os.environ.get("PAYMENT_POLL_MAX_SECONDS", 120))
+TIMEOUT = timedelta(minutes=float(os.environ.get("PAYMENT_TIMEOUT_MINUTES", 30)))
+SIMULATED_DELAY = float(os.environ.get("PAYMENT_SIMULATED_DELAY_SECONDS", 20))
+SIMULATED_SUCCESS_RATE = float(os.environ.get("PAYMENT_SIMULATED_SUCCESS_RATE", 0.9))
+
+OPEN_STATUSES = ["created", "pending"]
+# Booking payment_status once the transaction is settled
+BOOKING_PAYMENT_STATUS = {"successful": "completed", "failed": "failed", "expired": "failed"}
+MERCHANT_CODES = {"MTN": "237001", "ORANGE": "237002"}
+USSD_CODES = {"MTN": "*126#", "ORANGE": "#150#"}
+
+Callback = Tuple[str, str, Optional[str]]  # reference, provider status, provider transaction id
+Change = Tuple[str, dict]  # claim the update is guarded on, fields to set
+
+
+class SimulatedProvider:
+    """Local stand-in for a provider's collection API"""
+
+    def __init__(self, name: str, statuses: Dict[str, str], callback_fields: Tuple[str, str, str],
+                 delay: float = SIMULATED_DELAY, success_rate: float = SIMULATED_SUCCESS_RATE):
+        self.name = name
+        # Provider status -> pending, successful or failed
+        self.statuses = statuses
+        self.pending, self.successful, self.failed = (
+            next(raw for raw, status in statuses.items() if status == wanted)
+            for wanted in ("pending", "successful", "failed")
+        )
+        self.callback_fields = callback_fields
+        self.delay = delay
+        self.success_rate = success_rate
+
+    def normalize(self, status: str) -> Optional[str]:
+        return self.statuses.get(str(status).upper())
+
+    def parse_callback(self, body: dict) -> Optional[Callback]:
+        reference_field, status_field, transaction_field = self.callback_fields
+        reference, status = body.get(reference_field), body.get(status_field)
+        if not isinstance(reference, str) or self.normalize(status) is None:
+            return None
+        transaction_id = body.get(transaction_field)
+        return reference, str(status).upper(), str(transaction_id) if transaction_id else None
+
+    async def request_to_pay(self, transactions: List[dict]) -> List[str]:
+        """Send collection requests; returns the references accepted"""
+        return [transaction["reference"] for transaction in transactions]
+
+    async def poll(self, transactions: List[dict], now: datetime) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Provider status and transaction id of each reference"""
+        results = {}
+        for transaction in transactions:
+            reference = transaction["reference"]
+            requested_at = transaction.get("requested_at") or now
+            if (now - requested_at).total_seconds() < self.delay:
+                results[reference] = (self.pending, None)
+                continue
+            digest = hashlib.sha1(reference.encode()).digest()
+            approved = int.from_bytes(digest[:4], "big") / 2 ** 32 < self.success_rate
+            results[reference] = (self.successful, f"{self.name}-{digest.hex()[:12]}") if approved \
+                else (self.failed, None)
+        return results
+
+
+PROVIDERS: Dict[str, SimulatedProvider] = {
+    "MTN": SimulatedProvider(
+        "MTN",
+        {"PENDING": "pending", "SUCCESSFUL": "successful", "FAILED": "failed", "REJECTED": "failed",
+         "TIMEOUT": "failed"},
+        ("externalId", "status", "financialTransactionId"),
+    ),
+    "ORANGE": SimulatedProvider(
+        "ORANGE",
+        {"INITIATED": "pending", "PENDING": "pending", "SUCCESS": "successful", "FAILED": "failed",
+         "EXPIRED": "failed"},
+        ("order_id", "status", "txnid"),
+    ),
+}
+
+
+def provider_name(name: Optional[str]) -> Optional[str]:
+    """Canonical provider name, None when unknown"""
+    name = (name or "MTN").upper()
+    return name if name in PROVIDERS else None
+
+
+def settlement(status: str, now: datetime, transaction_id: Optional[str] = None) -> dict:
+    """Booking fields set when its transaction is settled"""
+    fields = {
+        "payment.status": status,
+        "payment.settled_at": now,
+        "payment_status": BOOKING_PAYMENT_STATUS[status],
+    }
+    if transaction_id:
+        fields["payment.provider_transaction_id"] = transaction_id
+    if status == "successful":
+        fields["status"] = "confirmed"
+    return fields
+
+
+def next_poll(attempts: int, now: datetime) -> datetime:
+    return now + timedelta(seconds=min(POLL_BASE * 2 ** attempts, POLL_MAX))
+
+
+class PaymentReconciler:
+    """Callback queue of this worker and the periodic reconciliation pass"""
+
+    def __init__(self, queue_size: int = CALLBACK_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.callbacks: Deque[Tuple[str, Callback]] = deque()
+        self.last_pass: Optional[dict] = None
+        self._lock = asyncio.Lock()
+
+    def enqueue(self, provider: str, callback: Callback) -> bool:
+        """Queue a parsed callback; False when the queue is full"""
+        if len(self.callbacks) >= self.queue_size:
+            PAYMENT_EVENTS.labels(provider, "callback_dropped").inc()
+            return False
+        self.callbacks.append((provider, callback))
+        PAYMENT_EVENTS.labels(provider, "callback_queued").inc()
+        return True
+
+    async def _apply_callbacks(self, now: datetime) -> int:
+        """Make the pending transactions named by the queued callbacks due for a poll; returns how many"""
+        references = defaultdict(set)
+        while self.callbacks:
+            provider, (reference, _, _) = self.callbacks.popleft()
+            references[provider].add(reference)
+        hinted = 0
+        for provider, provider_references in references.items():
+            hinted += await repos.bookings.poll_payments_now(provider, list(provider_references), now)
+        return hinted
+
+    async def flush_callbacks(self) -> int:
+        """Apply the queued callbacks now; returns the transactions made due"""
+        async with self._lock:
+            return await self._apply_callbacks(datetime.utcnow())
+
+    async def run_once(self, limit: int = RECONCILE_BATCH_SIZE) -> dict:
+        """One reconciliation pass; returns its counts"""
+        async with self._lock:
+            start = time.perf_counter()
+            now = datetime.utcnow()
+            counts = defaultdict(int, callbacks=await self._apply_callbacks(now))
+            changes: Dict[str, Change] = {}
+
+            claim = uuid.uuid4().hex
+            claimed = await repos.bookings.claim_payments(
+                OPEN_STATUSES, now, now + timedelta(seconds=CLAIM_SECONDS), claim, limit
+            )
+            counts["claimed"] = len(claimed)
+            by_provider: Dict[str, Dict[str, List[dict]]] = defaultdict(lambda: {"created": [], "pending": []})
+            for booking in claimed:
+                transaction = booking["payment"]
+                if now - transaction["created_at"] > TIMEOUT:
+                    changes[transaction["reference"]] = (claim, settlement("expired", now))
+                    counts["expired"] += 1
+                    PAYMENT_EVENTS.labels(transaction["provider"], "expired").inc()
+                elif transaction["provider"] in PROVIDERS:
+                    by_provider[transaction["provider"]][transaction["status"]].append(transaction)
+
+            for name, transactions in by_provider.items():
+                provider = PROVIDERS[name]
+                try:
+                    if transactions["created"]:
+                        accepted = set(await provider.request_to_pay(transactions["created"]))
+                        for transaction in transactions["created"]:
+                            reference = transaction["reference"]
+                            if reference in accepted:
+                                changes[reference] = (claim, {
+                                    "payment.status": "pending",
+                                    "payment.requested_at": now,
+                                    "payment.attempts": 0,
+                                    "payment.next_poll_at": next_poll(0, now),
+                                })
+                                event = "requested"
+                            else:
+                                changes[reference] = (claim, self._retry_later(transaction, now))
+                                event = "request_refused"
+                            counts[event] += 1
+                            PAYMENT_EVENTS.labels(name, event).inc()
+                    if transactions["pending"]:
+                        polled = await provider.poll(transactions["pending"], now)
+                        counts["polled"] += len(polled)
+                        for transaction in transactions["pending"]:
+                            reference = transaction["reference"]
+                            raw_status, transaction_id = polled.get(reference, (provider.pending, None))
+                            status = provider.normalize(raw_status)
+                            if status in BOOKING_PAYMENT_STATUS:
+                                changes[reference] = (claim, settlement(status, now, transaction_id))
+                            else:
+                                changes[reference] = (claim, self._retry_later(transaction, now))
+                            counts[status] += 1
+                            PAYMENT_EVENTS.labels(name, status).inc()
+                except Exception:
+                    # Left claimed: due again when the claim runs out
+                    logger.exception("Payment provider %s unavailable", name)
+                    counts["provider_errors"] += 1
+
+            written = await repos.bookings.update_payments(changes, OPEN_STATUSES) if changes else 0
+            self.last_pass = {
+                "at": now,
+                **counts,
+                "written": written,
+                "callbacks_queued": len(self.callbacks),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            return self.last_pass
+
+    @staticmethod
+    def _retry_later(transaction: dict, now: datetime) -> dict:
+        attempts = transaction.get("attempts", 0) + 1
+        return {"payment.attempts": attempts, "payment.next_poll_at": next_poll(attempts, now)}
+
+    async def run(self, interval: float = RECONCILE_INTERVAL):
+        """Background task: a reconciliation pass every ``interval`` seconds"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Payment reconciliation failed")
+            await asyncio.sleep(interval)
+
+
+reconciler = PaymentReconciler()
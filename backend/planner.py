@@ -0,0 +1,211 @@
+"""Journey planner: itineraries with connections between agencies.
+
+A round-based search in the manner of RAPTOR over the timetable.  Round k
+finds every city reachable with k buses: for each city improved in round
+k - 1, each schedule leaving it is boarded at its first departure after the
+arrival there plus the city's minimum transfer time.  Every schedule is a
+direct service between two cities, so a later departure of the same schedule
+arrives later for the same price and only the first one needs scanning.
+
+Each city keeps a Pareto set of labels (arrival, price) per round, so the
+answer holds every itinerary that no other beats on arrival time, number of
+transfers and price together.  Labels that an itinerary already found to the
+destination dominates are pruned as soon as they appear.
+
+The timetable of a date is compiled once into flat arrays (``Network``): the
+departures of every schedule over ``HORIZON_DAYS`` days, as minutes from the
+first midnight, back to back in one array, with the schedules leaving each
+city listed in a second one.  Networks are cached per date and runtime
+exceptions version.
+"""
+
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from text_folding import fold
+from timetable import MINUTES_PER_DAY, Timetable, format_time
+
+HORIZON_DAYS = 3
+MAX_TRANSFERS = int(os.environ.get("PLANNER_MAX_TRANSFERS", 3))
+NETWORK_CACHE_SIZE = 16
+
+
+class Network:
+    """Departures of every schedule from ``day`` to the end of the horizon, in flat arrays"""
+
+    def __init__(self, timetable: Timetable, day: date, horizon_days: int = HORIZON_DAYS):
+        self.day = day
+        self.cities: List[str] = []
+        self.city_index: Dict[str, int] = {}
+        self.schedules = []
+        self.origin = array("H")
+        self.destination = array("H")
+        self.duration = array("H")
+        self.price = array("I")
+        self.offsets = array("I", [0])
+        self.times = array("I")
+
+        days = [day + timedelta(days=offset) for offset in range(horizon_days)]
+        holidays = [timetable.is_holiday(current) for current in days]
+        for schedule in timetable.schedules:
+            count = len(self.times)
+            for offset, current in enumerate(days):
+                times = schedule.times_on(current, holidays[offset], timetable.exceptions.get(schedule.id, current))
+                self.times.extend(offset * MINUTES_PER_DAY + minutes for minutes in times)
+            if len(self.times) == count:
+                continue
+            self.schedules.append(schedule)
+            self.origin.append(self._city(schedule.origin))
+            self.destination.append(self._city(schedule.destination))
+            self.duration.append(schedule.duration)
+            self.price.append(schedule.price)
+            self.offsets.append(len(self.times))
+
+        self.transfer = array("H", (timetable.transfer_minutes(city) for city in self.cities))
+        leaving: List[List[int]] = [[] for _ in self.cities]
+        for index, origin in enumerate(self.origin):
+            leaving[origin].append(index)
+        self.leaving_offsets = array("I", [0])
+        self.leaving = array("H")
+        for schedules in leaving:
+            self.leaving.extend(schedules)
+            self.leaving_offsets.append(len(self.leaving))
+
+    def _city(self, name: str) -> int:
+        key = fold(name)
+        index = self.city_index.get(key)
+        if index is None:
+            index = self.city_index[key] = len(self.cities)
+            self.cities.append(name)
+        return index
+
+
+class Label:
+    """Arrival in a city, with the bus taken to get there and the label it was boarded from"""
+
+    __slots__ = ("arrival", "price", "round", "parent", "schedule", "departure")
+
+    def __init__(self, arrival: int, price: int, round: int, parent: Optional["Label"] = None,
+                 schedule: int = -1, departure: int = 0):
+        self.arrival = arrival
+        self.price = price
+        self.round = round
+        self.parent = parent
+        self.schedule = schedule
+        self.departure = departure
+
+
+def dominated(labels: List[Label], arrival: int, price: int) -> bool:
+    for label in labels:
+        if label.arrival <= arrival and label.price <= price:
+            return True
+    return False
+
+
+class Planner:
+    """Journey planner over one catalog version's timetable"""
+
+    def __init__(self, timetable: Timetable):
+        self.timetable = timetable
+        self._networks: "OrderedDict[tuple, Network]" = OrderedDict()
+
+    def network(self, day: date) -> Network:
+        key = (day, self.timetable.exceptions.version)
+        network = self._networks.get(key)
+        if network is not None:
+            self._networks.move_to_end(key)
+            return network
+        network = self._networks[key] = Network(self.timetable, day)
+        if len(self._networks) > NETWORK_CACHE_SIZE:
+            self._networks.popitem(last=False)
+        return network
+
+    def plan(self, origin: str, destination: str, day: date, after: int = 0,
+             max_transfers: int = MAX_TRANSFERS, limit: int = 5) -> Optional[List[dict]]:
+        """Pareto-optimal itineraries leaving ``origin`` on ``day`` at or after ``after`` (minutes),
+        earliest arrival first; None when either city has no bus service"""
+        network = self.network(day)
+        source, target = network.city_index.get(fold(origin)), network.city_index.get(fold(destination))
+        if source is None or target is None:
+            return None
+        if source == target:
+            return []
+
+        times, offsets, duration, price = network.times, network.offsets, network.duration, network.price
+        destination_of, transfer = network.destination, network.transfer
+        leaving, leaving_offsets = network.leaving, network.leaving_offsets
+
+        best: List[List[Label]] = [[] for _ in network.cities]
+        best[source].append(Label(after, 0, 0))
+        bags: Dict[int, List[Label]] = {source: best[source][:]}
+        for round in range(1, max_transfers + 2):
+            improved: Dict[int, List[Label]] = {}
+            for city, labels in bags.items():
+                wait = transfer[city] if round > 1 else 0
+                for position in range(leaving_offsets[city], leaving_offsets[city + 1]):
+                    schedule = leaving[position]
+                    stop = destination_of[schedule]
+                    start, end = offsets[schedule], offsets[schedule + 1]
+                    for label in labels:
+                        index = bisect_left(times, label.arrival + wait, start, end)
+                        if index == end:
+                            continue
+                        arrival = times[index] + duration[schedule]
+                        cost = label.price + price[schedule]
+                        if dominated(best[target], arrival, cost) or dominated(best[stop], arrival, cost):
+                            continue
+                        new = Label(arrival, cost, round, label, schedule, times[index])
+                        best[stop] = [other for other in best[stop]
+                                      if other.round < round or other.arrival < arrival or other.price < cost]
+                        best[stop].append(new)
+                        bag = improved.setdefault(stop, [])
+                        bag[:] = [other for other in bag if other.arrival < arrival or other.price < cost]
+                        bag.append(new)
+            improved.pop(target, None)
+            if not improved:
+                break
+            bags = improved
+
+        return [self.itinerary(network, label) for label in self.pareto(best[target])[:limit]]
+
+    @staticmethod
+    def pareto(labels: List[Label]) -> List[Label]:
+        kept: List[Label] = []
+        for label in sorted(labels, key=lambda label: (label.arrival, label.round, label.price)):
+            if not any(other.round <= label.round and other.price <= label.price for other in kept):
+                kept.append(label)
+        return kept
+
+    @staticmethod
+    def itinerary(network: Network, label: Label) -> dict:
+        chain = []
+        while label.parent is not None:
+            chain.append(label)
+            label = label.parent
+        chain.reverse()
+        legs = []
+        for previous, current in zip([None] + chain, chain):
+            schedule = network.schedules[current.schedule]
+            day = network.day + timedelta(days=current.departure // MINUTES_PER_DAY)
+            leg = schedule.departure(current.departure % MINUTES_PER_DAY, day)
+            if previous is not None:
+                leg["wait_minutes"] = current.departure - previous.arrival
+            legs.append(leg)
+        first, last = chain[0], chain[-1]
+        total = last.arrival - first.departure
+        return {
+            "departure_date": legs[0]["date"],
+            "departure_time": legs[0]["departure_time"],
+            "arrival_date": (network.day + timedelta(days=last.arrival // MINUTES_PER_DAY)).isoformat(),
+            "arrival_time": format_time(last.arrival),
+            "duration_minutes": total,
+            "duration": f"{total // 60}h{total % 60:02d}",
+            "transfers": len(legs) - 1,
+            "price": last.price,
+            "via": [leg["destination"] for leg in legs[:-1]],
+            "legs": legs,
+        }
@@ -0,0 +1,138 @@
+"""Versioned policy documents (privacy, terms, refund) with a process cache.
+
+Each (document_type, language) pair has numbered revisions.  Publishing takes
+the next number from the pair's head document in ``policy_heads`` and moves
+the head's active pointer to the new revision, unless a later one is already
+live.  Older revisions stay in ``policy_documents`` with ``active`` False, so
+history is kept and there is only ever one live document per pair.
+
+Reads are served from a process cache of rendered JSON bodies, each with an
+ETag computed from the body's content hash.  Clients that send the ETag back
+in ``If-None-Match`` get a bodiless 304.  A write invalidates the cache of the
+worker that handled it; other workers pick the change up within
+``POLICY_CACHE_TTL`` seconds.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi.responses import Response
+
+from metrics import register_cache
+from models import PolicyDocument
+from repositories import repos
+from serialization import dumps
+
+DEFAULT_LANGUAGE = "fr"
+CACHE_TTL = float(os.environ.get("POLICY_CACHE_TTL", 30))
+
+Key = Tuple[str, str]  # (document_type, language)
+
+
+class CachedBody:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload: dict):
+        self.body = dumps(payload)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def cached_response(cached: CachedBody, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+class PolicyStore:
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._active: Optional[Dict[Key, dict]] = None
+        self._loaded_at = 0.0
+        self._bodies: Dict[tuple, CachedBody] = {}
+        self._lock = asyncio.Lock()
+        self.metrics = register_cache("policies")
+
+    def invalidate(self):
+        self._active = None
+        self._bodies.clear()
+        self.metrics.set_size(0)
+
+    async def _load(self) -> Dict[Key, dict]:
+        heads = {(head["document_type"], head["language"]): head.get("active_id")
+                 for head in await repos.policy_heads.all()}
+        active: Dict[Key, dict] = {}
+        # Highest revision first; documents from before revisions existed have no head
+        for policy in await repos.policies.active():
+            key = (policy["document_type"], policy.get("language", DEFAULT_LANGUAGE))
+            if key in heads and policy["id"] != heads[key]:
+                continue
+            active.setdefault(key, policy)
+        return active
+
+    async def active(self) -> Dict[Key, dict]:
+        if self._active is None or time.monotonic() - self._loaded_at > self.ttl:
+            async with self._lock:
+                if self._active is None or time.monotonic() - self._loaded_at > self.ttl:
+                    active = await self._load()
+                    self._bodies.clear()
+                    self._active, self._loaded_at = active, time.monotonic()
+        return self._active
+
+    def _remember(self, key: tuple, payload: dict) -> CachedBody:
+        cached = self._bodies[key] = CachedBody(payload)
+        self.metrics.set_size(len(self._bodies), sum(len(entry.body) for entry in self._bodies.values()))
+        return cached
+
+    async def _cached(self, key: tuple, build) -> Optional[CachedBody]:
+        active = await self.active()
+        cached = self._bodies.get(key)
+        if cached is not None:
+            self.metrics.hit()
+            return cached
+        self.metrics.miss()
+        payload = await build(active)
+        return self._remember(key, payload) if payload is not None else None
+
+    async def all(self) -> CachedBody:
+        async def build(active):
+            return {"policies": sorted(active.values(), key=lambda p: (p["document_type"], p.get("language", "")))}
+        return await self._cached(("all",), build)
+
+    async def get(self, document_type: str, language: str, revision: Optional[int] = None) -> Optional[CachedBody]:
+        """Active (or given) revision in ``language``, falling back to the default language"""
+        async def build(active):
+            if revision is not None:
+                policy = await repos.policies.revision(document_type, language, revision)
+            else:
+                policy = active.get((document_type, language)) or active.get((document_type, DEFAULT_LANGUAGE))
+            return {"policy": policy} if policy else None
+        return await self._cached((document_type, language, revision), build)
+
+    async def publish(self, policy: PolicyDocument) -> PolicyDocument:
+        """Store ``policy`` as the next revision of its (type, language) and make it live"""
+        key = (policy.document_type, policy.language)
+        policy.revision = await repos.policy_heads.next_revision(*key)
+        policy.active = True
+        await repos.policies.create(policy.model_dump())
+        if await repos.policy_heads.activate(*key, policy.id, policy.revision):
+            await repos.policies.deactivate_older(*key, policy.revision)
+        else:
+            # A later revision went live while this one was being written
+            policy.active = False
+            await repos.policies.update_one({"id": policy.id}, {"$set": {"active": False}})
+        self.invalidate()
+        return policy
+
+
+store = PolicyStore()
@@ -0,0 +1,284 @@
+"""Route popularity from the stream of searches and bookings.
+
+Every route search and booking is added to a count-min sketch: a fixed table of
+``SKETCH_DEPTH`` rows x ``SKETCH_WIDTH`` counters, so memory does not grow
+with the number of distinct routes.  Next to it, a top-k table keeps the
+``TOP_CAPACITY`` heaviest routes with their booking prices and departure hours.
+
+Counts decay exponentially with a half-life of ``POPULARITY_HALF_LIFE_HOURS``.
+Rather than scaling every counter over time, each event is added with weight
+``2 ** (age of the epoch / half-life)``, which grows with time.  Reads divide
+by the current weight.  The epoch moves forward, rescaling the table once,
+before the weights get large.
+
+Each worker keeps its own view plus the events recorded since its last
+checkpoint.  Every ``POPULARITY_CHECKPOINT_SECONDS`` it merges those events
+into the shared checkpoint document in Mongo (sketches add up counter by
+counter), using optimistic versioning, and adopts the merged result.  A
+restart resumes from the checkpoint.  Nothing on the request path queries the
+database.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from repositories import repos
+
+logger = logging.getLogger(__name__)
+
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+TOP_CAPACITY = 64
+HALF_LIFE = float(os.environ.get("POPULARITY_HALF_LIFE_HOURS", 72)) * 3600
+CHECKPOINT_INTERVAL = float(os.environ.get("POPULARITY_CHECKPOINT_SECONDS", 60))
+SEARCH_WEIGHT = 1.0
+BOOKING_WEIGHT = 5.0
+# Move the epoch forward once weights reach 2 ** REBASE_HALF_LIVES
+REBASE_HALF_LIVES = 32
+
+
+class CountMinSketch:
+    """Count-min sketch over string keys; hashes are stable across processes so sketches merge"""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH, table: Optional[bytes] = None):
+        self.width = width
+        self.depth = depth
+        self.table = array("d", bytes(8 * width * depth) if table is None else table)
+
+    def _cells(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, amount: float) -> float:
+        """Add ``amount`` to ``key`` and return its new estimate"""
+        estimate = math.inf
+        for cell in self._cells(key):
+            self.table[cell] += amount
+            estimate = min(estimate, self.table[cell])
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def scale(self, factor: float):
+        for index in range(len(self.table)):
+            self.table[index] *= factor
+
+    def merge(self, other: "CountMinSketch", factor: float = 1.0):
+        for index, value in enumerate(other.table):
+            self.table[index] += value * factor
+
+
+class RouteStats:
+    """Booking details kept for routes in the top-k table (in sketch units)"""
+
+    __slots__ = ("price_sum", "price_weight", "hours")
+
+    def __init__(self, price_sum: float = 0.0, price_weight: float = 0.0, hours: Optional[List[float]] = None):
+        self.price_sum = price_sum
+        self.price_weight = price_weight
+        self.hours = hours or [0.0] * 24
+
+    def scale(self, factor: float):
+        self.price_sum *= factor
+        self.price_weight *= factor
+        self.hours = [value * factor for value in self.hours]
+
+    def merge(self, other: "RouteStats", factor: float = 1.0):
+        self.price_sum += other.price_sum * factor
+        self.price_weight += other.price_weight * factor
+        self.hours = [mine + theirs * factor for mine, theirs in zip(self.hours, other.hours)]
+
+
+class PopularityState:
+    """Decaying sketch, top-k routes and their stats, all relative to ``epoch``"""
+
+    def __init__(self, epoch: Optional[float] = None, half_life: float = HALF_LIFE):
+        self.epoch = time.time() if epoch is None else epoch
+        self.half_life = half_life
+        self.sketch = CountMinSketch()
+        self.top: Dict[str, float] = {}
+        self.stats: Dict[str, RouteStats] = {}
+
+    def weight(self, now: float) -> float:
+        return 2.0 ** ((now - self.epoch) / self.half_life)
+
+    def rebase(self, epoch: float):
+        factor = 2.0 ** ((self.epoch - epoch) / self.half_life)
+        self.sketch.scale(factor)
+        self.top = {route: score * factor for route, score in self.top.items()}
+        for stats in self.stats.values():
+            stats.scale(factor)
+        self.epoch = epoch
+
+    def _offer(self, route: str, score: float):
+        if route not in self.top and len(self.top) >= TOP_CAPACITY:
+            weakest = min(self.top, key=self.top.get)
+            if self.top[weakest] >= score:
+                return
+            del self.top[weakest]
+            self.stats.pop(weakest, None)
+        self.top[route] = score
+
+    def record(self, route: str, amount: float, now: float, price: Optional[float] = None,
+               hour: Optional[int] = None):
+        if now - self.epoch > REBASE_HALF_LIVES * self.half_life:
+            self.rebase(now)
+        weight = self.weight(now)
+        self._offer(route, self.sketch.add(route, amount * weight))
+        if route in self.top and (price is not None or hour is not None):
+            stats = self.stats.setdefault(route, RouteStats())
+            if price is not None:
+                stats.price_sum += price * weight
+                stats.price_weight += weight
+            if hour is not None:
+                stats.hours[hour] += weight
+
+    def merge(self, other: "PopularityState"):
+        factor = 2.0 ** ((other.epoch - self.epoch) / self.half_life)
+        self.sketch.merge(other.sketch, factor)
+        for route, stats in other.stats.items():
+            self.stats.setdefault(route, RouteStats()).merge(stats, factor)
+        candidates = set(self.top) | set(other.top)
+        ranked = sorted(candidates, key=self.sketch.estimate, reverse=True)[:TOP_CAPACITY]
+        self.top = {route: self.sketch.estimate(route) for route in ranked}
+        self.stats = {route: stats for route, stats in self.stats.items() if route in self.top}
+
+    def ranking(self, limit: int, now: float) -> List[dict]:
+        weight = self.weight(now)
+        ranked = sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:limit]
+        if not ranked:
+            return []
+        best = ranked[0][1]
+        results = []
+        for route, score in ranked:
+            stats = self.stats.get(route)
+            results.append({
+                "route": route,
+                "popularity": round(100 * score / best),
+                "score": round(score / weight, 2),
+                "avg_price": round(stats.price_sum / stats.price_weight) if stats and stats.price_weight else None,
+            })
+        return results
+
+    def to_document(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "width": self.sketch.width,
+            "depth": self.sketch.depth,
+            "table": self.sketch.table.tobytes(),
+            "top": [[route, score] for route, score in self.top.items()],
+            "stats": [[route, stats.price_sum, stats.price_weight, stats.hours] for route, stats in self.stats.items()],
+        }
+
+    @classmethod
+    def from_document(cls, document: dict) -> "PopularityState":
+        state = cls(document["epoch"])
+        state.sketch = CountMinSketch(document["width"], document["depth"], document["table"])
+        state.top = {route: score for route, score in document["top"]}
+        state.stats = {route: RouteStats(price_sum, price_weight, hours)
+                       for route, price_sum, price_weight, hours in document["stats"]}
+        return state
+
+
+def route_name(origin: str, destination: str) -> str:
+    return f"{origin} - {destination}"
+
+
+class RoutePopularity:
+    """This worker's view of route popularity, checkpointed to ``popularity_sketches``"""
+
+    def __init__(self, name: str = "routes"):
+        self.name = name
+        self.view = PopularityState()
+        self.pending = PopularityState(self.view.epoch)
+        self.version = 0
+
+    def record(self, route: str, amount: float, price: Optional[float] = None, hour: Optional[int] = None):
+        now = time.time()
+        self.view.record(route, amount, now, price, hour)
+        self.pending.record(route, amount, now, price, hour)
+
+    def record_search(self, origin: str, destination: str):
+        self.record(route_name(origin, destination), SEARCH_WEIGHT)
+
+    def record_booking(self, origin: str, destination: str, price: Optional[float], departure_time: Optional[str]):
+        try:
+            hour = int(departure_time.split(":")[0]) % 24 if departure_time else None
+        except ValueError:
+            hour = None
+        self.record(route_name(origin, destination), BOOKING_WEIGHT, price, hour)
+
+    def top(self, limit: int) -> List[dict]:
+        return self.view.ranking(limit, time.time())
+
+    def stats(self, origin: str, destination: str) -> Optional[dict]:
+        """Rank, average booking price and busiest departure hour of a route, when it is in the top table"""
+        route = route_name(origin, destination)
+        if route not in self.view.top:
+            return None
+        rank = 1 + sum(1 for score in self.view.top.values() if score > self.view.top[route])
+        stats = self.view.stats.get(route)
+        hours = stats.hours if stats else []
+        return {
+            "rank": rank,
+            "avg_price": round(stats.price_sum / stats.price_weight) if stats and stats.price_weight else None,
+            "peak_hour": max(range(24), key=hours.__getitem__) if any(hours) else None,
+        }
+
+    async def restore(self):
+        document = await repos.sketches.load(self.name)
+        if document is None:
+            return
+        self.version = document["version"]
+        restored = PopularityState.from_document(document)
+        restored.merge(self.pending)
+        self.view = restored
+
+    async def checkpoint(self, attempts: int = 3):
+        """Merge the events recorded since the last checkpoint into the shared document"""
+        delta, self.pending = self.pending, PopularityState(self.view.epoch)
+        try:
+            for _ in range(attempts):
+                document = await repos.sketches.load(self.name)
+                version = document["version"] if document else 0
+                merged = PopularityState.from_document(document) if document else PopularityState(delta.epoch)
+                merged.merge(delta)
+                if await repos.sketches.save(self.name, {**merged.to_document(), "updated_at": datetime.utcnow()},
+                                             version):
+                    self.version = version + 1
+                    # Keep what was recorded while the checkpoint was being written
+                    merged.merge(self.pending)
+                    self.view = merged
+                    return
+        except Exception:
+            # Mongo unavailable: keep these events for the next checkpoint
+            self.pending.merge(delta)
+            raise
+        # Another worker kept winning: retry these events next time
+        self.pending.merge(delta)
+        logger.warning("Popularity checkpoint for %s lost %d races, will retry", self.name, attempts)
+
+    async def run(self, interval: float = CHECKPOINT_INTERVAL):
+        """Background task: restore, then checkpoint every ``interval`` seconds"""
+        try:
+            await self.restore()
+        except Exception:
+            logger.exception("Could not restore popularity checkpoint %s", self.name)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.checkpoint()
+            except Exception:
+                logger.exception("Popularity checkpoint %s failed", self.name)
+
+
+routes = RoutePopularity()
@@ -0,0 +1,63 @@
+"""Fare and fee formulas shared by the booking and courier routes"""
+
+from typing import Optional
+
+COURIER_BASE_PRICE = 2000  # FCFA
+COURIER_PRICE_PER_KG = 500
+COURIER_URGENT_MULTIPLIER = 1.5
+COURIER_INSURANCE_RATE = 0.02
+
+RESERVATION_FEE_PER_PASSENGER = 500
+COURIER_SERVICE_FEE = 2000
+PACKAGE_TAX_RATE = 0.13
+
+
+def courier_price(weight_kg: float, declared_value: int, urgent: bool, insurance: bool) -> int:
+    """Courier price from weight, declared value and urgency"""
+    weight_price = weight_kg * COURIER_PRICE_PER_KG
+    urgent_multiplier = COURIER_URGENT_MULTIPLIER if urgent else 1.0
+    insurance_price = (declared_value * COURIER_INSURANCE_RATE) if insurance else 0
+    return int((COURIER_BASE_PRICE + weight_price + insurance_price) * urgent_multiplier)
+
+
+def payment_breakdown(base_price: int, passenger_count: int = 1, custom_count: Optional[int] = None,
+                      courier_services: int = 0, package_value: int = 0) -> dict:
+    """Full payment breakdown for a booking: reservation now, balance later"""
+    final_count = custom_count if custom_count else passenger_count
+    subtotal = base_price * final_count
+
+    # Nouvelle règle: 500 FCFA de réservation par passager
+    total_reservation_fee = RESERVATION_FEE_PER_PASSENGER * final_count
+
+    # Add courier services cost with 13% of package value
+    courier_base_cost = courier_services * COURIER_SERVICE_FEE
+    package_tax = int(package_value * PACKAGE_TAX_RATE) if package_value > 0 else 0
+    total_courier_cost = courier_base_cost + package_tax
+
+    # Calculate totals
+    total_full_payment = subtotal + total_courier_cost
+    remaining_amount = total_full_payment - total_reservation_fee
+
+    return {
+        "passenger_count": final_count,
+        "base_price_per_person": base_price,
+        "subtotal": subtotal,
+        "courier_services_count": courier_services,
+        "courier_base_cost": courier_base_cost,
+        "package_value": package_value,
+        "package_tax_13_percent": package_tax,
+        "total_courier_cost": total_courier_cost,
+        "reservation_fee_per_passenger": RESERVATION_FEE_PER_PASSENGER,
+        "total_reservation_fee": total_reservation_fee,
+        "total_amount": total_full_payment,
+        "remaining_amount": remaining_amount,
+        "payment_breakdown": {
+            "reservation_now": total_reservation_fee,
+            "balance_later": remaining_amount,
+            "full_payment": total_full_payment
+        },
+        "calculation_details": {
+            "formula_reservation": f"{final_count} passagers × {RESERVATION_FEE_PER_PASSENGER} FCFA = {total_reservation_fee} FCFA",
+            "formula_package": f"{package_value} FCFA × 13% = {package_tax} FCFA" if package_value > 0 else "Aucun colis"
+        }
+    }
@@ -0,0 +1,272 @@
+"""On-demand statistical profiling of individual requests.
+
+A request is profiled when it is picked by ``PROFILE_SAMPLE_RATE`` or when it
+carries a valid ``X-Profile-Request`` header signed with ``PROFILE_SECRET``::
+
+    X-Profile-Request: <expires unix ts>.<hex HMAC-SHA256(secret, "<expires>:<path>")>
+
+While a request is profiled, a sampler thread reads the event loop thread's
+stack every ``PROFILE_INTERVAL_MS``.  Samples taken while another task is
+running or the loop is idle are folded into a single ``<awaiting>`` frame, so
+the profile shows the request's own CPU time next to the time it spent waiting
+(on Mongo, for instance).  Each sample is weighted by the wall time since the
+previous one, in microseconds.  Profiles are written as collapsed stacks
+(flamegraph.pl / speedscope input) into a bounded ring directory, listed by
+``/api/admin/profiles``.
+
+With neither a sample rate nor a secret configured the middleware is not
+installed at all.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-request"
+AWAITING_FRAME = "<awaiting>"
+
+
+class ProfilerSettings:
+    def __init__(self):
+        self.sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+        self.secret = os.environ.get("PROFILE_SECRET", "").encode()
+        self.interval = float(os.environ.get("PROFILE_INTERVAL_MS", 2)) / 1000
+        self.directory = Path(os.environ.get("PROFILE_DIR", "/tmp/connect237-profiles"))
+        self.ring_size = int(os.environ.get("PROFILE_RING_SIZE", 50))
+        self.max_depth = int(os.environ.get("PROFILE_MAX_DEPTH", 64))
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.secret)
+
+
+settings = ProfilerSettings()
+
+
+def sign(secret: bytes, path: str, expires: int) -> str:
+    """Header value allowing one profile of ``path`` until ``expires``"""
+    digest = hmac.new(secret, f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+def verify(secret: bytes, path: str, value: str) -> bool:
+    if not secret:
+        return False
+    expires, _, digest = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sign(secret, path, int(expires)), f"{expires}.{digest}")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id: int, task, loop, interval: float, max_depth: int):
+        self.thread_id = thread_id
+        self.task = task
+        self.loop = loop
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    async def stop(self):
+        """Stop sampling; waits for the sampler thread off the loop, so the wait is not in the profile"""
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # While the loop thread holds the GIL the sampler wakes up late, so
+            # weight each sample by the wall time it stands for (microseconds)
+            now = time.perf_counter()
+            weight = int((now - last) * 1e6)
+            last = now
+            if asyncio.current_task(self.loop) is not self.task:
+                self.stacks[AWAITING_FRAME] += weight
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += weight
+
+
+class ProfileStore:
+    """Bounded on-disk ring of collapsed-stack profiles"""
+
+    def __init__(self, directory: Path, ring_size: int):
+        self.directory = directory
+        self.ring_size = ring_size
+
+    def save(self, meta: dict, stacks: Counter):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self.directory / meta["id"]
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        base.with_suffix(".collapsed").write_text(collapsed)
+        # Metadata last: a profile is listed only once it is complete
+        base.with_suffix(".json").write_bytes(orjson.dumps(meta))
+        self._prune()
+
+    def _prune(self):
+        metas = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in metas[:-self.ring_size] if self.ring_size else metas:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def list(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        metas = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        profiles = []
+        for path in metas:
+            try:
+                profiles.append(orjson.loads(path.read_bytes()))
+            except (OSError, orjson.JSONDecodeError):
+                continue
+        return profiles
+
+    def _path(self, profile_id: str, suffix: str) -> Optional[Path]:
+        # Ids are generated hex strings; refuse anything that could escape the directory
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def collapsed(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, ".collapsed")
+        return path.read_text() if path else None
+
+    def meta(self, profile_id: str) -> Optional[dict]:
+        path = self._path(profile_id, ".json")
+        return orjson.loads(path.read_bytes()) if path else None
+
+    def speedscope(self, profile_id: str) -> Optional[dict]:
+        """The profile in speedscope's "sampled" file format"""
+        collapsed, meta = self.collapsed(profile_id), self.meta(profile_id)
+        if collapsed is None or meta is None:
+            return None
+        frames, frame_index, samples, weights = [], {}, [], []
+        for line in collapsed.splitlines():
+            stack, _, count = line.rpartition(" ")
+            indexes = []
+            for name in stack.split(";"):
+                if name not in frame_index:
+                    frame_index[name] = len(frames)
+                    frames.append({"name": name})
+                indexes.append(frame_index[name])
+            samples.append(indexes)
+            weights.append(int(count) / 1000)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{meta['method']} {meta['path']}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": meta["id"],
+            "exporter": "connect237",
+        }
+
+
+store = ProfileStore(settings.directory, settings.ring_size)
+
+
+class ProfilingMiddleware:
+    """Profiles sampled or explicitly requested HTTP requests"""
+
+    def __init__(self, app, profiler_settings: ProfilerSettings = settings, profile_store: ProfileStore = store):
+        self.app = app
+        self.settings = profiler_settings
+        self.store = profile_store
+        # One profile at a time: concurrent samplers would skew each other
+        self._busy = False
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self._busy:
+            return None
+        if self.settings.secret:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    if verify(self.settings.secret, scope["path"], value.decode("latin-1")):
+                        return "signed"
+                    return None
+        if self.settings.sample_rate and random.random() < self.settings.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self._busy = True
+        sampler = StackSampler(
+            threading.get_ident(), asyncio.current_task(), asyncio.get_running_loop(),
+            self.settings.interval, self.settings.max_depth,
+        )
+        started_at = time.time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            await sampler.stop()
+            self._busy = False
+            route = scope.get("route")
+            meta = {
+                "id": uuid.uuid4().hex,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status,
+                "trigger": trigger,
+                "started_at": started_at,
+                "duration_ms": round(duration_ms, 2),
+                "interval_ms": self.settings.interval * 1000,
+                "sampled_us": sum(sampler.stacks.values()),
+            }
+            try:
+                await asyncio.to_thread(self.store.save, meta, sampler.stacks)
+            except OSError:
+                logger.exception("Could not save profile %s", meta["id"])
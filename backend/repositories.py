@@ -0,0 +1,1155 @@
+"""Data access: one repository per collection, over a swappable storage backend.
+
+Routers never touch Motor directly; they go through ``repos``::
+
+    await repos.bookings.create(booking.model_dump())
+
+Two backends implement the same collection interface:
+
+* ``MotorBackend`` (default) talks to MongoDB through the shared client in
+  ``database.py``.
+* ``MemoryBackend`` keeps documents in process, with the subset of the Mongo
+  query and update language the repositories use.  It serves benchmarks, load
+  tests and local runs without a database (``REPOSITORY_BACKEND=memory``).
+
+Every repository operation is one round trip.  Operations are reported to the
+timing hooks (``add_timing_hook``) and counted per request, so a test can
+assert how many round trips a handler makes::
+
+    with count_round_trips() as trips:
+        await handler()
+    assert trips.total == 2
+
+``RoundTripMiddleware`` does the same for each HTTP request and returns the
+count in an ``X-DB-Round-Trips`` header.
+"""
+
+import contextlib
+import copy
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import database
+from database import NO_OBJECT_ID
+from metrics import observe_repository_operation
+
+logger = logging.getLogger(__name__)
+
+Sort = Sequence[Tuple[str, int]]
+
+ROUND_TRIPS_HEADER = b"x-db-round-trips"
+
+
+# === INSTRUMENTATION ===
+
+class RoundTrips:
+    """Round trips made while counting, in total and per (collection, operation)"""
+
+    def __init__(self):
+        self.total = 0
+        self.by_operation = Counter()
+
+    def add(self, collection: str, operation: str):
+        self.total += 1
+        self.by_operation[(collection, operation)] += 1
+
+
+_round_trips: ContextVar[Optional[RoundTrips]] = ContextVar("repository_round_trips", default=None)
+
+_timing_hooks: List[Callable[[str, str, str, float], None]] = []
+
+
+def add_timing_hook(hook: Callable[[str, str, str, float], None]):
+    """Call ``hook(backend, collection, operation, seconds)`` after every operation"""
+    _timing_hooks.append(hook)
+    return hook
+
+
+@contextlib.contextmanager
+def count_round_trips():
+    """Count the repository operations made in this context (and tasks it starts)"""
+    counter = RoundTrips()
+    token = _round_trips.set(counter)
+    try:
+        yield counter
+    finally:
+        _round_trips.reset(token)
+
+
+class RoundTripMiddleware:
+    """Counts repository round trips per request and reports them in a header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = RoundTrips()
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((ROUND_TRIPS_HEADER, str(counter.total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _round_trips.set(counter)
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _round_trips.reset(token)
+
+
+# === MOTOR BACKEND ===
+
+class MotorCollection:
+    """Collection operations on MongoDB through the shared Motor client"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def _collection(self):
+        return database.get_database()[self.name]
+
+    async def insert_one(self, document: dict):
+        await self._collection.insert_one(document)
+
+    async def insert_many(self, documents: List[dict]):
+        if documents:
+            await self._collection.insert_many(documents, ordered=False)
+
+    async def find_one(self, filter: dict, projection: dict = NO_OBJECT_ID) -> Optional[dict]:
+        return await self._collection.find_one(filter, projection)
+
+    async def find(self, filter: dict, projection: dict = NO_OBJECT_ID, sort: Optional[Sort] = None,
+                   skip: int = 0, limit: int = 0) -> List[dict]:
+        cursor = self._collection.find(filter, projection)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def count_documents(self, filter: dict) -> int:
+        return await self._collection.count_documents(filter)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False) -> int:
+        result = await self._collection.update_one(filter, update, upsert=upsert)
+        return result.matched_count
+
+    async def update_many(self, filter: dict, update: dict) -> int:
+        result = await self._collection.update_many(filter, update)
+        return result.matched_count
+
+    async def find_one_and_update(self, filter: dict, update: dict, sort: Optional[Sort] = None,
+                                  projection: dict = NO_OBJECT_ID, upsert: bool = False) -> Optional[dict]:
+        from pymongo import ReturnDocument
+
+        return await self._collection.find_one_and_update(
+            filter, update, projection=projection, sort=list(sort) if sort else None,
+            upsert=upsert, return_document=ReturnDocument.AFTER,
+        )
+
+    async def bulk_update(self, operations: List[Tuple[dict, dict]], upsert: bool = False) -> int:
+        from pymongo import UpdateMany
+
+        if not operations:
+            return 0
+        result = await self._collection.bulk_write(
+            [UpdateMany(filter, update, upsert=upsert) for filter, update in operations], ordered=False
+        )
+        return result.matched_count
+
+    async def bulk_upsert(self, operations: List[Tuple[dict, dict]]) -> int:
+        from pymongo import UpdateOne
+
+        if not operations:
+            return 0
+        result = await self._collection.bulk_write(
+            [UpdateOne(filter, update, upsert=True) for filter, update in operations], ordered=False
+        )
+        return result.matched_count + result.upserted_count
+
+    async def delete_one(self, filter: dict) -> int:
+        result = await self._collection.delete_one(filter)
+        return result.deleted_count
+
+    async def create_index(self, keys: Sort, **options):
+        await self._collection.create_index(list(keys), **options)
+
+    async def create(self, **options):
+        """Create the collection with ``options``; if it exists, check its options match"""
+        from pymongo.errors import CollectionInvalid
+
+        db = database.get_database()
+        try:
+            await db.create_collection(self.name, **options)
+            return
+        except CollectionInvalid:
+            pass  # Already there
+        existing = await db.list_collections(filter={"name": self.name}).to_list(length=1)
+        current = existing[0].get("options", {}) if existing else {}
+        if "timeseries" in options and "timeseries" not in current:
+            # Created by a plain insert before this ran: it cannot be converted in place
+            logger.error("Collection %s is not a time-series collection; drop it so it can be recreated",
+                         self.name)
+            return
+        expire = options.get("expireAfterSeconds")
+        if expire is not None and current.get("expireAfterSeconds") != expire:
+            await db.command("collMod", self.name, expireAfterSeconds=expire)
+
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        return await self._collection.aggregate(pipeline).to_list(length=None)
+
+
+class MotorBackend:
+    name = "motor"
+
+    def __init__(self):
+        self._collections: Dict[str, MotorCollection] = {}
+
+    def collection(self, name: str) -> MotorCollection:
+        if name not in self._collections:
+            self._collections[name] = MotorCollection(name)
+        return self._collections[name]
+
+    async def ping(self) -> float:
+        return await database.ping()
+
+
+# === IN-MEMORY BACKEND ===
+
+_MISSING = object()
+
+
+def _get_path(document: dict, path: str):
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _set_path(document: dict, path: str, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        document = document.setdefault(key, {})
+    document[last] = value
+
+
+def _compare(value, arg, op: Callable[[Any, Any], bool]) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return op(value, arg)
+    except TypeError:
+        return False
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, arg: _equals(value, arg),
+    "$ne": lambda value, arg: not _equals(value, arg),
+    "$in": lambda value, arg: any(_equals(value, item) for item in arg),
+    "$nin": lambda value, arg: not any(_equals(value, item) for item in arg),
+    "$gt": lambda value, arg: _compare(value, arg, lambda a, b: a > b),
+    "$gte": lambda value, arg: _compare(value, arg, lambda a, b: a >= b),
+    "$lt": lambda value, arg: _compare(value, arg, lambda a, b: a < b),
+    "$lte": lambda value, arg: _compare(value, arg, lambda a, b: a <= b),
+    "$exists": lambda value, arg: (value is not _MISSING) == bool(arg),
+}
+
+
+def _equals(value, expected) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def _matches(document: dict, filter: dict) -> bool:
+    for key, condition in filter.items():
+        if key == "$or":
+            if not any(_matches(document, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(_matches(document, sub) for sub in condition):
+                return False
+        else:
+            value = _get_path(document, key)
+            if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+                if not all(_OPERATORS[op](value, arg) for op, arg in condition.items()):
+                    return False
+            elif not _equals(value, condition):
+                return False
+    return True
+
+
+def _apply_update(document: dict, update: dict, inserting: bool = False):
+    for operator, fields in update.items():
+        if operator == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if operator in ("$set", "$setOnInsert"):
+                _set_path(document, path, copy.deepcopy(value))
+            elif operator == "$unset":
+                *parents, last = path.split(".")
+                parent = _get_path(document, ".".join(parents)) if parents else document
+                if isinstance(parent, dict):
+                    parent.pop(last, None)
+            elif operator == "$inc":
+                current = _get_path(document, path)
+                _set_path(document, path, (0 if current is _MISSING else current) + value)
+            elif operator == "$push":
+                current = _get_path(document, path)
+                _set_path(document, path, ([] if current is _MISSING else current) + [copy.deepcopy(value)])
+            else:
+                raise ValueError(f"Unsupported update operator {operator}")
+
+
+def _project(document: dict, projection: Optional[dict]) -> dict:
+    fields = {key: value for key, value in (projection or {}).items() if key != "_id"}
+    if fields and any(fields.values()):
+        projected = {}
+        for path in fields:
+            value = _get_path(document, path)
+            if value is not _MISSING:
+                _set_path(projected, path, copy.deepcopy(value))
+        return projected
+    projected = copy.deepcopy(document)
+    for path in fields:
+        projected.pop(path, None)
+    return projected
+
+
+def _expression(document: dict, expression):
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict):
+        return {key: _expression(document, value) for key, value in expression.items()}
+    return expression
+
+
+def _group(documents: List[dict], spec: dict) -> List[dict]:
+    """$group with $sum accumulators"""
+    groups: Dict[str, dict] = {}
+    for document in documents:
+        group_id = _expression(document, spec["_id"])
+        group = groups.setdefault(repr(group_id), {"_id": group_id, **{field: 0 for field in spec if field != "_id"}})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (operator, argument), = accumulator.items()
+            if operator != "$sum":
+                raise ValueError(f"Unsupported accumulator {operator}")
+            value = _expression(document, argument)
+            group[field] += value if isinstance(value, (int, float)) else 0
+    return list(groups.values())
+
+
+def _sort_key(path: str):
+    def key(document):
+        value = _get_path(document, path)
+        # Mongo orders missing and null before any value
+        return (0, 0) if value is _MISSING or value is None else (1, value)
+    return key
+
+
+def _sorted(documents: List[dict], sort: Optional[Sort]) -> List[dict]:
+    for path, direction in reversed(list(sort or [])):
+        documents = sorted(documents, key=_sort_key(path), reverse=direction < 0)
+    return documents
+
+
+class MemoryCollection:
+    """Collection held in process.
+
+    Documents are deep-copied in and out, like a round trip through BSON, so
+    callers can never alias stored state.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[dict] = []
+
+    async def insert_one(self, document: dict):
+        self.documents.append(copy.deepcopy(document))
+
+    async def insert_many(self, documents: List[dict]):
+        self.documents.extend(copy.deepcopy(document) for document in documents)
+
+    def _find(self, filter: dict) -> List[dict]:
+        return [document for document in self.documents if _matches(document, filter)]
+
+    async def find_one(self, filter: dict, projection: dict = NO_OBJECT_ID) -> Optional[dict]:
+        for document in self.documents:
+            if _matches(document, filter):
+                return _project(document, projection)
+        return None
+
+    async def find(self, filter: dict, projection: dict = NO_OBJECT_ID, sort: Optional[Sort] = None,
+                   skip: int = 0, limit: int = 0) -> List[dict]:
+        documents = _sorted(self._find(filter), sort)[skip:]
+        if limit:
+            documents = documents[:limit]
+        return [_project(document, projection) for document in documents]
+
+    async def count_documents(self, filter: dict) -> int:
+        return len(self._find(filter))
+
+    def _upsert(self, filter: dict, update: dict) -> dict:
+        document = {key: copy.deepcopy(value) for key, value in filter.items()
+                    if not key.startswith("$") and not isinstance(value, dict)}
+        _apply_update(document, update, inserting=True)
+        self.documents.append(document)
+        return document
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False) -> int:
+        for document in self.documents:
+            if _matches(document, filter):
+                _apply_update(document, update)
+                return 1
+        if upsert:
+            self._upsert(filter, update)
+        return 0
+
+    async def update_many(self, filter: dict, update: dict) -> int:
+        matched = self._find(filter)
+        for document in matched:
+            _apply_update(document, update)
+        return len(matched)
+
+    async def find_one_and_update(self, filter: dict, update: dict, sort: Optional[Sort] = None,
+                                  projection: dict = NO_OBJECT_ID, upsert: bool = False) -> Optional[dict]:
+        matched = _sorted(self._find(filter), sort)
+        if not matched:
+            return _project(self._upsert(filter, update), projection) if upsert else None
+        _apply_update(matched[0], update)
+        return _project(matched[0], projection)
+
+    async def bulk_update(self, operations: List[Tuple[dict, dict]], upsert: bool = False) -> int:
+        matched = 0
+        for filter, update in operations:
+            count = await self.update_many(filter, update)
+            if not count and upsert:
+                self._upsert(filter, update)
+            matched += count
+        return matched
+
+    async def bulk_upsert(self, operations: List[Tuple[dict, dict]]) -> int:
+        for filter, update in operations:
+            await self.update_one(filter, update, upsert=True)
+        return len(operations)
+
+    async def delete_one(self, filter: dict) -> int:
+        for index, document in enumerate(self.documents):
+            if _matches(document, filter):
+                del self.documents[index]
+                return 1
+        return 0
+
+    async def create_index(self, keys: Sort, **options):
+        # Scans are all we have; uniqueness is not enforced either
+        pass
+
+    async def create(self, **options):
+        pass
+
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        documents = [copy.deepcopy(document) for document in self.documents]
+        for stage in pipeline:
+            (operator, argument), = stage.items()
+            if operator == "$match":
+                documents = [document for document in documents if _matches(document, argument)]
+            elif operator == "$group":
+                documents = _group(documents, argument)
+            elif operator == "$sort":
+                documents = _sorted(documents, list(argument.items()))
+            elif operator == "$limit":
+                documents = documents[:argument]
+            else:
+                raise ValueError(f"Unsupported aggregation stage {operator}")
+        return documents
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def collection(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    async def ping(self) -> float:
+        return 0.0
+
+
+BACKENDS = {"motor": MotorBackend, "memory": MemoryBackend}
+
+
+def create_backend(name: str):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown REPOSITORY_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+# === REPOSITORIES ===
+
+class Repository:
+    """Generic collection operations, timed and counted; subclasses add the domain queries"""
+
+    collection: str
+    # create_collection options (time series, TTL) and (keys, options) index
+    # pairs, applied by Repositories.ensure_indexes
+    create_options: Optional[dict] = None
+    indexes: List[Tuple[Sort, dict]] = []
+
+    def __init__(self, registry: "Repositories"):
+        self._registry = registry
+
+    async def _call(self, operation: str, *args, **kwargs):
+        backend = self._registry.backend
+        start = time.perf_counter()
+        try:
+            with database.operation_timeout():
+                return await getattr(backend.collection(self.collection), operation)(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            counter = _round_trips.get()
+            if counter is not None:
+                counter.add(self.collection, operation)
+            for hook in _timing_hooks:
+                hook(backend.name, self.collection, operation, elapsed)
+
+    async def insert_one(self, document: dict):
+        await self._call("insert_one", document)
+
+    async def insert_many(self, documents: List[dict]):
+        await self._call("insert_many", documents)
+
+    async def find_one(self, filter: dict, projection: dict = NO_OBJECT_ID) -> Optional[dict]:
+        return await self._call("find_one", filter, projection)
+
+    async def find(self, filter: dict, projection: dict = NO_OBJECT_ID, sort: Optional[Sort] = None,
+                   skip: int = 0, limit: int = 0) -> List[dict]:
+        return await self._call("find", filter, projection, sort, skip, limit)
+
+    async def count_documents(self, filter: dict) -> int:
+        return await self._call("count_documents", filter)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False) -> int:
+        return await self._call("update_one", filter, update, upsert)
+
+    async def update_many(self, filter: dict, update: dict) -> int:
+        return await self._call("update_many", filter, update)
+
+    async def find_one_and_update(self, filter: dict, update: dict, sort: Optional[Sort] = None,
+                                  projection: dict = NO_OBJECT_ID, upsert: bool = False) -> Optional[dict]:
+        return await self._call("find_one_and_update", filter, update, sort, projection, upsert)
+
+    async def bulk_update(self, operations: List[Tuple[dict, dict]], upsert: bool = False) -> int:
+        """Several (filter, update) update_many operations in one round trip; returns the documents matched"""
+        return await self._call("bulk_update", operations, upsert)
+
+    async def bulk_upsert(self, operations: List[Tuple[dict, dict]]) -> int:
+        """Several (filter, update) update_one upserts, by unique key, in one round trip; returns their count"""
+        return await self._call("bulk_upsert", operations)
+
+    async def delete_one(self, filter: dict) -> int:
+        return await self._call("delete_one", filter)
+
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        return await self._call("aggregate", pipeline)
+
+    async def ensure_indexes(self):
+        if self.create_options:
+            await self._call("create", **self.create_options)
+        for keys, options in self.indexes:
+            await self._call("create_index", keys, **options)
+
+
+class BookingRepository(Repository):
+    collection = "enhanced_bookings"
+    indexes = [
+        ([("payment.status", 1), ("payment.next_poll_at", 1)], {}),
+        ([("payment.reference", 1)], {}),
+        ([("payment.claim", 1)], {}),
+    ]
+
+    async def create(self, booking: dict):
+        await self.insert_one(booking)
+
+    async def recent(self, limit: int = 5) -> List[dict]:
+        return await self.find({}, sort=[("created_at", -1)], limit=limit)
+
+    async def count(self) -> int:
+        return await self.count_documents({})
+
+    async def claim_payments(self, statuses: List[str], now: datetime, lease_until: datetime, claim: str,
+                             limit: int) -> List[dict]:
+        """Lease up to ``limit`` open transactions due for their next step to ``claim``; see payments.py.
+
+        The lease moves ``next_poll_at`` to ``lease_until``, so a transaction
+        another worker claimed in between is no longer due and is left out.
+        """
+        due = {"payment.status": {"$in": statuses}, "payment.next_poll_at": {"$lte": now}}
+        candidates = await self.find(
+            due, {"_id": 0, "payment.reference": 1}, sort=[("payment.next_poll_at", 1)], limit=limit
+        )
+        if not candidates:
+            return []
+        await self.update_many(
+            {**due, "payment.reference": {"$in": [booking["payment"]["reference"] for booking in candidates]}},
+            {"$set": {"payment.claim": claim, "payment.next_poll_at": lease_until}},
+        )
+        return await self.find({"payment.claim": claim}, {"_id": 0, "id": 1, "payment": 1})
+
+    async def by_payment_reference(self, reference: str) -> Optional[dict]:
+        return await self.find_one(
+            {"payment.reference": reference},
+            {"_id": 0, "id": 1, "booking_reference": 1, "status": 1, "payment_status": 1, "payment": 1},
+        )
+
+    async def poll_payments_now(self, provider: str, references: List[str], now: datetime) -> int:
+        """Make pending transactions of ``provider`` due for a poll at once (a provider callback named them)"""
+        return await self.update_many(
+            {"payment.reference": {"$in": references}, "payment.provider": provider, "payment.status": "pending"},
+            {"$set": {"payment.next_poll_at": now}},
+        )
+
+    async def update_payments(self, changes: Dict[str, Tuple[str, dict]], open_statuses: List[str]) -> int:
+        """Set fields of bookings by transaction reference, if still open and still held by the claim given,
+        in one round trip"""
+        return await self.bulk_update([
+            ({"payment.reference": reference, "payment.status": {"$in": open_statuses}, "payment.claim": claim},
+             {"$set": fields})
+            for reference, (claim, fields) in changes.items()
+        ])
+
+
+class ParcelQueueRepository(Repository):
+    """Parcels waiting for a carrier and a bus; see dispatch.py and consolidation.py"""
+
+    indexes = [
+        ([("status", 1), ("urgent", -1), ("created_at", 1)], {}),
+        ([("carrier_id", 1), ("status", 1)], {}),
+        ([("departure_id", 1), ("status", 1)], {}),
+    ]
+
+    async def pending_dispatch(self, limit: int) -> List[dict]:
+        """Unassigned parcels, urgent first then oldest"""
+        return await self.find(
+            {"status": "pending", "carrier_id": None},
+            {"_id": 0, "id": 1, "origin": 1, "weight_kg": 1, "urgent": 1, "created_at": 1},
+            sort=[("urgent", -1), ("created_at", 1)],
+            limit=limit,
+        )
+
+    async def carrier_loads(self, statuses: List[str]) -> List[dict]:
+        """Parcel count and weight per carrier over parcels in ``statuses``"""
+        return await self.aggregate([
+            {"$match": {"status": {"$in": statuses}, "carrier_id": {"$ne": None}}},
+            {"$group": {"_id": "$carrier_id", "parcels": {"$sum": 1}, "weight_kg": {"$sum": "$weight_kg"}}},
+        ])
+
+    async def assign(self, assignments: Dict[str, Tuple[str, List[str]]], now: datetime) -> int:
+        """Hand parcels to carriers ({carrier_id: (carrier_name, parcel_ids)}) in one round trip.
+
+        Only parcels still pending and unassigned are updated, so concurrent
+        dispatch passes cannot hand a parcel out twice.
+        """
+        return await self.bulk_update([
+            (
+                {"id": {"$in": parcel_ids}, "status": "pending", "carrier_id": None},
+                {"$set": {"status": "assigned", "carrier_id": carrier_id, "carrier_name": carrier_name,
+                          "assigned_at": now}},
+            )
+            for carrier_id, (carrier_name, parcel_ids) in assignments.items()
+        ])
+
+    async def pending_consolidation(self, statuses: List[str], limit: int) -> List[dict]:
+        """Parcels not booked on a departure yet, urgent first then oldest"""
+        return await self.find(
+            {"status": {"$in": statuses}, "departure_id": None},
+            {"_id": 0, "id": 1, "origin": 1, "destination": 1, "weight_kg": 1, "volume_liters": 1,
+             "package_type": 1, "urgent": 1, "created_at": 1},
+            sort=[("urgent", -1), ("created_at", 1)],
+            limit=limit,
+        )
+
+    async def board(self, departures: Dict[str, Tuple[dict, List[str]]], statuses: List[str]) -> int:
+        """Book parcels on departures ({departure_id: (departure fields, parcel_ids)}) in one round trip"""
+        return await self.bulk_update([
+            (
+                {"id": {"$in": parcel_ids}, "status": {"$in": statuses}, "departure_id": None},
+                {"$set": {"departure_id": departure_id, "departure": departure}},
+            )
+            for departure_id, (departure, parcel_ids) in departures.items()
+        ])
+
+    async def in_rounds(self, statuses: List[str], carrier_id: Optional[str] = None) -> List[dict]:
+        """Parcels in carriers' hands, of one carrier or of all; see courier_rounds.py"""
+        return await self.find(
+            {"status": {"$in": statuses}, "carrier_id": carrier_id if carrier_id else {"$ne": None}},
+            {"_id": 0, "id": 1, "tracking_number": 1, "origin": 1, "destination": 1, "pickup_address": 1,
+             "delivery_address": 1, "pickup_coordinates": 1, "delivery_coordinates": 1, "carrier_id": 1,
+             "carrier_name": 1},
+            sort=[("created_at", 1)],
+        )
+
+    async def departure_loads(self, departure_ids: List[str]) -> List[dict]:
+        """Parcel count, weight and volume booked on each departure"""
+        return await self.aggregate([
+            {"$match": {"departure_id": {"$in": departure_ids}}},
+            {"$group": {"_id": "$departure_id", "parcels": {"$sum": 1}, "weight_kg": {"$sum": "$weight_kg"},
+                        "volume_liters": {"$sum": "$volume_liters"}}},
+        ])
+
+
+class CourierRepository(ParcelQueueRepository):
+    collection = "courier_services"
+
+    async def create(self, courier: dict):
+        await self.insert_one(courier)
+
+    async def by_tracking_number(self, tracking_number: str) -> Optional[dict]:
+        return await self.find_one({"tracking_number": tracking_number})
+
+    async def count(self) -> int:
+        return await self.count_documents({})
+
+
+class ParcelRepository(ParcelQueueRepository):
+    collection = "parcel_deliveries"
+
+    async def create(self, parcel: dict):
+        await self.insert_one(parcel)
+
+
+class RegistrationRepository(Repository):
+    collection = "user_registrations"
+    indexes = [
+        ([("id", 1)], {"unique": True}),
+        # Verification queue: pending items oldest first, optionally per user type
+        ([("verification_status", 1), ("created_at", 1), ("id", 1)], {}),
+        ([("verification_status", 1), ("user_type", 1), ("created_at", 1), ("id", 1)], {}),
+    ]
+
+    async def create(self, registration: dict):
+        await self.insert_one(registration)
+
+    async def get(self, registration_id: str) -> Optional[dict]:
+        return await self.find_one({"id": registration_id})
+
+    async def exists(self, registration_id: str) -> bool:
+        return await self.find_one({"id": registration_id}, {"_id": 0, "id": 1}) is not None
+
+    async def set_verification(self, registration_id: str, status: str, admin_comments: str,
+                               verified_at: Optional[datetime]) -> bool:
+        matched = await self.update_one(
+            {"id": registration_id},
+            {"$set": {"verification_status": status, "admin_comments": admin_comments, "verified_at": verified_at,
+                      "lease_owner": None, "lease_expires_at": None}}
+        )
+        return matched > 0
+
+    async def add_document(self, registration_id: str, document: dict) -> bool:
+        return await self.update_one({"id": registration_id}, {"$push": {"documents": document}}) > 0
+
+    async def count(self, verification_status: Optional[str] = None, user_type: Optional[str] = None) -> int:
+        filter = {"verification_status": verification_status} if verification_status else {}
+        if user_type:
+            filter["user_type"] = user_type
+        return await self.count_documents(filter)
+
+    async def recent(self, limit: int = 5) -> List[dict]:
+        return await self.find({}, sort=[("created_at", -1)], limit=limit)
+
+    # --- Verification queue ---
+
+    @staticmethod
+    def _pending(user_type: Optional[str]) -> dict:
+        filter = {"verification_status": "pending"}
+        if user_type:
+            filter["user_type"] = user_type
+        return filter
+
+    async def pending_page(self, user_type: Optional[str], after: Optional[Tuple[datetime, str]],
+                           limit: int) -> List[dict]:
+        """Pending registrations oldest first, after the (created_at, id) keyset cursor"""
+        filter = self._pending(user_type)
+        if after:
+            created_at, registration_id = after
+            filter["$or"] = [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "id": {"$gt": registration_id}},
+            ]
+        return await self.find(
+            filter, {"_id": 0, "documents": 0}, sort=[("created_at", 1), ("id", 1)], limit=limit
+        )
+
+    async def claim(self, admin_id: str, lease_until: datetime, now: datetime,
+                    user_type: Optional[str] = None) -> Optional[dict]:
+        """Lease the oldest pending registration nobody holds (or whose lease expired)"""
+        filter = self._pending(user_type)
+        filter["$or"] = [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]
+        return await self.find_one_and_update(
+            filter,
+            {"$set": {"lease_owner": admin_id, "lease_expires_at": lease_until}},
+            sort=[("created_at", 1), ("id", 1)],
+            projection={"_id": 0, "documents": 0},
+        )
+
+    async def release(self, admin_id: str, registration_ids: List[str]) -> int:
+        return await self.update_many(
+            {"id": {"$in": registration_ids}, "lease_owner": admin_id},
+            {"$set": {"lease_owner": None, "lease_expires_at": None}}
+        )
+
+    async def decide(self, registration_ids: List[str], status: str, admin_comments: str, admin_id: str,
+                     now: datetime) -> int:
+        """Set the verification outcome of many pending registrations in one round trip.
+
+        Registrations leased by another admin (lease still running) are left alone.
+        """
+        return await self.update_many(
+            {
+                "id": {"$in": registration_ids},
+                "verification_status": "pending",
+                "$or": [
+                    {"lease_owner": None},
+                    {"lease_owner": admin_id},
+                    {"lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {"$set": {
+                "verification_status": status,
+                "admin_comments": admin_comments,
+                "verified_by": admin_id,
+                "verified_at": now if status == "verified" else None,
+                "lease_owner": None,
+                "lease_expires_at": None,
+            }}
+        )
+
+
+class VehicleRepository(Repository):
+    collection = "vehicles"
+
+    async def create(self, vehicle: dict):
+        await self.insert_one(vehicle)
+
+    async def all(self) -> List[dict]:
+        return await self.find({})
+
+    async def get(self, vehicle_id: str) -> Optional[dict]:
+        return await self.find_one({"id": vehicle_id})
+
+    async def update(self, vehicle_id: str, fields: dict) -> bool:
+        return await self.update_one({"id": vehicle_id}, {"$set": fields}) > 0
+
+    async def delete(self, vehicle_id: str) -> bool:
+        return await self.delete_one({"id": vehicle_id}) > 0
+
+
+class CarrierRepository(Repository):
+    collection = "courier_carriers"
+
+    async def create(self, carrier: dict):
+        await self.insert_one(carrier)
+
+    async def active(self) -> List[dict]:
+        return await self.find({"active": True})
+
+
+class SettingsRepository(Repository):
+    collection = "app_settings"
+
+    async def upsert(self, setting: dict):
+        await self.update_one({"setting_key": setting["setting_key"]}, {"$set": setting}, upsert=True)
+
+    async def all(self) -> List[dict]:
+        return await self.find({})
+
+
+class PolicyRepository(Repository):
+    """Every revision of every policy document; ``policy_heads`` says which one is live"""
+
+    collection = "policy_documents"
+    indexes = [
+        ([("document_type", 1), ("language", 1), ("revision", 1)], {}),
+        ([("active", 1)], {}),
+    ]
+
+    async def create(self, policy: dict):
+        await self.insert_one(policy)
+
+    async def active(self) -> List[dict]:
+        return await self.find({"active": True}, sort=[("revision", -1), ("created_at", -1)])
+
+    async def by_ids(self, policy_ids: List[str]) -> List[dict]:
+        return await self.find({"id": {"$in": policy_ids}})
+
+    async def revision(self, document_type: str, language: str, revision: int) -> Optional[dict]:
+        return await self.find_one({"document_type": document_type, "language": language, "revision": revision})
+
+    async def deactivate_older(self, document_type: str, language: str, revision: int) -> int:
+        return await self.update_many(
+            {
+                "document_type": document_type,
+                "language": language,
+                "active": True,
+                "$or": [{"revision": None}, {"revision": {"$lt": revision}}],
+            },
+            {"$set": {"active": False}}
+        )
+
+
+class PolicyHeadRepository(Repository):
+    """One document per (document_type, language): revision counter and active pointer"""
+
+    collection = "policy_heads"
+    indexes = [([("document_type", 1), ("language", 1)], {"unique": True})]
+
+    async def next_revision(self, document_type: str, language: str) -> int:
+        head = await self.find_one_and_update(
+            {"document_type": document_type, "language": language},
+            {"$inc": {"revision": 1}},
+            upsert=True,
+        )
+        return head["revision"]
+
+    async def activate(self, document_type: str, language: str, policy_id: str, revision: int) -> bool:
+        """Point at ``revision`` unless a later one is already active"""
+        matched = await self.update_one(
+            {
+                "document_type": document_type,
+                "language": language,
+                "$or": [{"active_revision": None}, {"active_revision": {"$lt": revision}}],
+            },
+            {"$set": {"active_id": policy_id, "active_revision": revision}}
+        )
+        return matched > 0
+
+    async def all(self) -> List[dict]:
+        return await self.find({})
+
+
+class SketchRepository(Repository):
+    """Checkpoints of the in-process popularity sketches, one document per name"""
+
+    collection = "popularity_sketches"
+    indexes = [([("name", 1)], {"unique": True})]
+
+    async def load(self, name: str) -> Optional[dict]:
+        return await self.find_one({"name": name})
+
+    async def save(self, name: str, document: dict, version: int) -> bool:
+        """Replace the checkpoint if it is still at ``version`` (0: there is none yet)"""
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            saved = await self.find_one_and_update(
+                {"name": name, "version": version},
+                {"$set": {**document, "name": name, "version": version + 1}},
+                projection={"_id": 0, "version": 1},
+                upsert=version == 0,
+            )
+        except DuplicateKeyError:
+            # Another worker wrote the first checkpoint meanwhile: a lost race
+            return False
+        return saved is not None
+
+
+class SearchEventRepository(Repository):
+    """Search log, a time-series collection; see search_log.py"""
+
+    collection = "search_events"
+    create_options = {
+        "timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"},
+        "expireAfterSeconds": int(os.environ.get("SEARCH_LOG_RETENTION_DAYS", 90)) * 86400,
+    }
+
+    async def record(self, events: List[dict]):
+        await self.insert_many(events)
+
+    async def top(self, start: datetime, end: datetime, group: dict, limit: int,
+                  filter: Optional[dict] = None) -> List[dict]:
+        """Most frequent values of ``group`` between start and end, with their counts"""
+        match = {"timestamp": {"$gte": start, "$lt": end}, **(filter or {})}
+        return await self.aggregate([
+            {"$match": match},
+            {"$group": {"_id": group, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+        ])
+
+    async def totals(self, start: datetime, end: datetime) -> dict:
+        rows = await self.aggregate([
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": "$zero_result", "count": {"$sum": 1}}},
+        ])
+        counts = {row["_id"]: row["count"] for row in rows}
+        return {"total": sum(counts.values()), "zero_result": counts.get(True, 0)}
+
+
+class SearchRollupRepository(Repository):
+    """One document of daily search statistics per day"""
+
+    collection = "search_rollups"
+    indexes = [([("day", 1)], {"unique": True})]
+
+    async def save(self, rollup: dict):
+        await self.update_one({"day": rollup["day"]}, {"$set": rollup}, upsert=True)
+
+    async def get(self, day: str) -> Optional[dict]:
+        return await self.find_one({"day": day})
+
+    async def recent(self, limit: int) -> List[dict]:
+        return await self.find({}, sort=[("day", -1)], limit=limit)
+
+
+class DepartureCargoRepository(Repository):
+    """Parcel load of each bus departure carrying parcels; see consolidation.py"""
+
+    collection = "departure_cargo"
+    indexes = [([("id", 1)], {"unique": True}), ([("date", 1), ("departure_time", 1)], {})]
+
+    async def by_ids(self, departure_ids: List[str]) -> List[dict]:
+        return await self.find({"id": {"$in": departure_ids}})
+
+    async def on_date(self, date: str) -> List[dict]:
+        return await self.find({"date": date}, sort=[("departure_time", 1), ("id", 1)])
+
+    async def save_loads(self, departures: List[dict]) -> int:
+        """Upsert departures with their recomputed load, in one round trip"""
+        return await self.bulk_update(
+            [({"id": departure["id"]}, {"$set": departure}) for departure in departures], upsert=True
+        )
+
+
+class CourierRoundRepository(Repository):
+    """Ordered stops of each carrier per city and day; see courier_rounds.py"""
+
+    collection = "courier_rounds"
+    indexes = [([("id", 1)], {"unique": True}), ([("carrier_id", 1), ("date", 1)], {})]
+
+    async def save(self, rounds: List[dict]) -> int:
+        return await self.bulk_update([({"id": trip["id"]}, {"$set": trip}) for trip in rounds], upsert=True)
+
+    async def of_carrier(self, carrier_id: str, date: str) -> List[dict]:
+        return await self.find({"carrier_id": carrier_id, "date": date}, sort=[("city", 1)])
+
+
+class GeocodeCacheRepository(Repository):
+    """Geocoding results by cache key; see geocoding.py"""
+
+    collection = "geocode_cache"
+    indexes = [
+        ([("key", 1)], {"unique": True}),
+        ([("created_at", 1)], {"expireAfterSeconds": int(os.environ.get("GEOCODE_CACHE_TTL_DAYS", 30)) * 86400}),
+    ]
+
+    async def by_keys(self, keys: List[str]) -> List[dict]:
+        return await self.find({"key": {"$in": keys}}, {"_id": 0, "key": 1, "result": 1})
+
+    async def save(self, entries: List[dict]) -> int:
+        """Upsert entries, in one round trip"""
+        return await self.bulk_upsert([({"key": entry["key"]}, {"$set": entry}) for entry in entries])
+
+
+class JobLeaseRepository(Repository):
+    """Which worker runs each batch job, and when it last finished; see job_lease.py"""
+
+    collection = "job_leases"
+    indexes = [([("name", 1)], {"unique": True})]
+
+    async def acquire(self, name: str, owner: str, now: datetime, lease_until: datetime,
+                      not_run_since: datetime) -> bool:
+        """Lease job ``name`` to ``owner`` unless another worker holds it, or it finished after ``not_run_since``"""
+        await self.update_one(
+            {"name": name}, {"$setOnInsert": {"expires_at": datetime.min, "finished_at": datetime.min}}, upsert=True
+        )
+        return await self.find_one_and_update(
+            {"name": name, "expires_at": {"$lt": now}, "finished_at": {"$lte": not_run_since}},
+            {"$set": {"owner": owner, "expires_at": lease_until, "started_at": now}},
+        ) is not None
+
+    async def release(self, name: str, owner: str, now: datetime):
+        await self.update_one(
+            {"name": name, "owner": owner}, {"$set": {"expires_at": datetime.min, "finished_at": now}}
+        )
+
+
+class TimetableExceptionRepository(Repository):
+    """Runtime overrides of a schedule's departures on one date; see timetable.py"""
+
+    collection = "timetable_exceptions"
+    indexes = [([("schedule_id", 1), ("date", 1)], {"unique": True}), ([("date", 1)], {})]
+
+    async def put(self, exception: dict):
+        await self.update_one(
+            {"schedule_id": exception["schedule_id"], "date": exception["date"]}, {"$set": exception}, upsert=True
+        )
+
+    async def remove(self, schedule_id: str, date: str) -> bool:
+        return await self.delete_one({"schedule_id": schedule_id, "date": date}) > 0
+
+    async def from_date(self, date: str) -> List[dict]:
+        return await self.find({"date": {"$gte": date}}, sort=[("date", 1)])
+
+
+class Repositories:
+    """All repositories, sharing one backend that can be swapped at runtime"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.bookings = BookingRepository(self)
+        self.couriers = CourierRepository(self)
+        self.parcels = ParcelRepository(self)
+        self.registrations = RegistrationRepository(self)
+        self.vehicles = VehicleRepository(self)
+        self.carriers = CarrierRepository(self)
+        self.settings = SettingsRepository(self)
+        self.policies = PolicyRepository(self)
+        self.policy_heads = PolicyHeadRepository(self)
+        self.sketches = SketchRepository(self)
+        self.search_events = SearchEventRepository(self)
+        self.search_rollups = SearchRollupRepository(self)
+        self.timetable_exceptions = TimetableExceptionRepository(self)
+        self.departure_cargo = DepartureCargoRepository(self)
+        self.courier_rounds = CourierRoundRepository(self)
+        self.geocode_cache = GeocodeCacheRepository(self)
+        self.job_leases = JobLeaseRepository(self)
+
+    def use_backend(self, backend):
+        self.backend = backend
+
+    async def ping(self) -> float:
+        """Round-trip latency to the storage backend in milliseconds"""
+        return await self.backend.ping()
+
+    async def ensure_indexes(self):
+        for repository in vars(self).values():
+            if isinstance(repository, Repository):
+                await repository.ensure_indexes()
+
+
+repos = Repositories(create_backend(os.environ.get("REPOSITORY_BACKEND", "motor")))
+add_timing_hook(observe_repository_operation)
@@ -0,0 +1,116 @@
+"""In-process cache for computed responses: LRU within a memory budget, plus TTL.
+
+``get_or_compute(key, compute)`` returns the cached value for ``key`` or awaits
+``compute()`` to produce it.  Concurrent misses on the same key share one
+computation (single flight), so a burst of identical requests computes once.
+The first request computes inline, so profiles charge the work to it; the
+others await its result shielded.  When the first request is cancelled (its
+client disconnected), the others are woken up and one of them takes over.
+Each entry's size is its serialized JSON length, and the least recently used
+entries are evicted to stay within ``max_bytes``.  ``invalidate()`` empties the
+cache when the data behind it changes.  Lookups, entries and memory are
+exported through ``metrics.register_cache``.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from metrics import register_cache
+from serialization import dumps
+
+# Result of an in-flight computation whose request was cancelled: compute again
+_RETRY = object()
+
+
+class ResultCache:
+    def __init__(self, name: str, max_bytes: int, ttl: float):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.metrics = register_cache(name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _report(self):
+        self.metrics.set_size(len(self._entries), self.bytes)
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def _store(self, key: Hashable, value: Any):
+        size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        self._report()
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            self._report()
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.metrics.hit()
+            return value
+        self.metrics.miss()
+
+        while True:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                return await self._compute(key, compute)
+            value = await asyncio.shield(in_flight)
+            if value is not _RETRY:
+                return value
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._generation
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            # Only this request is going away: let a waiting one compute instead
+            future.set_result(_RETRY)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark it retrieved: there may be no waiters
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Computed from data invalidated meanwhile: answer, but do not keep it
+            if generation == self._generation:
+                self._store(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def invalidate(self, *_):
+        """Drop every entry (usable directly as a change listener)"""
+        self._generation += 1
+        self._entries.clear()
+        self.bytes = 0
+        self._report()
@@ -0,0 +1,472 @@
+"""Administration: dashboard, verification, search analytics, fleet, carriers and settings"""
+
+import base64
+from datetime import date, datetime, timedelta
+import random
+from typing import Optional
+
+import orjson
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+import consolidation
+import courier_rounds
+from database import database_status, mongo_guard
+from dispatch import dispatcher
+from models import AdminDashboardStats, AppSettings, CourierCarrier, Vehicle
+from payments import reconciler
+from repositories import repos
+from routers.search import search_cache
+from search_log import rollup, search_log
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute, dependencies=[Depends(mongo_guard)])
+
+
+@router.get("/admin/dashboard")
+async def get_admin_dashboard():
+    """Admin dashboard with statistics and pending actions"""
+    try:
+        # Get real counts from database
+        total_bookings = await repos.bookings.count()
+        total_courier = await repos.couriers.count()
+        total_registrations = await repos.registrations.count()
+        pending_registrations = await repos.registrations.count("pending")
+        
+        # Calculate mock revenue and stats
+        today = datetime.utcnow().date()
+        revenue_today = random.randint(50000, 200000)
+        
+        stats = AdminDashboardStats(
+            total_users=total_registrations,
+            pending_verifications=pending_registrations,
+            total_bookings=total_bookings,
+            revenue_today=revenue_today,
+            active_vehicles=random.randint(15, 45),
+            courier_deliveries=total_courier
+        )
+        
+        # Get recent activities (safe for JSON serialization)
+        recent_bookings = await repos.bookings.recent(5)
+        recent_registrations = await repos.registrations.recent(5)
+        
+        # System health indicators
+        try:
+            database_latency_ms = round(await repos.ping(), 2)
+        except Exception:
+            database_latency_ms = None
+        system_health = {
+            "api_status": "healthy",
+            "database_status": database_status(),
+            "database_latency_ms": database_latency_ms,
+            "payment_system": "operational",
+            "sms_service": "operational",
+            "email_service": "operational"
+        }
+        
+        return {
+            "dashboard_stats": stats,
+            "recent_activities": {
+                "bookings": recent_bookings,
+                "registrations": recent_registrations
+            },
+            "system_health": system_health,
+            "alerts": [
+                {
+                    "type": "info",
+                    "message": f"{pending_registrations} nouvelles demandes d'inscription en attente",
+                    "priority": "medium"
+                }
+            ]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur dashboard admin: {str(e)}")
+
+@router.post("/admin/verify-registration/{registration_id}")
+async def verify_user_registration(
+    registration_id: str,
+    action: str = Query(..., description="approve or reject"),
+    admin_comments: str = Query("", description="Admin comments")
+):
+    """Admin endpoint to approve or reject user registrations"""
+    
+    if action not in ["approve", "reject"]:
+        raise HTTPException(status_code=400, detail="Action must be 'approve' or 'reject'")
+    
+    new_status = "verified" if action == "approve" else "rejected"
+    
+    # Update registration
+    if not await repos.registrations.set_verification(
+        registration_id, new_status, admin_comments,
+        datetime.utcnow() if action == "approve" else None
+    ):
+        raise HTTPException(status_code=404, detail="Registration not found")
+    
+    return {
+        "registration_id": registration_id,
+        "action": action,
+        "new_status": new_status,
+        "admin_comments": admin_comments,
+        "message": f"Inscription {action}ed successfully"
+    }
+
+# === VERIFICATION QUEUE ===
+# Pending registrations, oldest first.  Admins claim items under a lease so two
+# reviewers never work the same file; decisions are applied in batches.
+
+QUEUE_PAGE_MAX = 200
+CLAIM_MAX = 50
+BATCH_MAX = 1000
+DEFAULT_LEASE_SECONDS = 600
+
+
+def encode_cursor(item: dict) -> str:
+    raw = orjson.dumps([item["created_at"], item["id"]])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, registration_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), registration_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
+
+def registration_ids(body: dict) -> list:
+    ids = body.get("registration_ids")
+    if not isinstance(ids, list) or not ids or not all(isinstance(value, str) for value in ids):
+        raise HTTPException(status_code=400, detail="registration_ids doit être une liste non vide d'identifiants")
+    if len(ids) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Maximum {BATCH_MAX} inscriptions par lot")
+    return list(dict.fromkeys(ids))
+
+
+@router.get("/admin/verification-queue")
+async def get_verification_queue(
+    user_type: Optional[str] = Query(None, description="agency, transporter, ..."),
+    limit: int = Query(50, ge=1, le=QUEUE_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
+):
+    """Pending registrations, oldest first, one keyset page at a time"""
+    after = decode_cursor(cursor) if cursor else None
+    try:
+        items = await repos.registrations.pending_page(user_type, after, limit)
+        pending = await repos.registrations.count("pending", user_type) if after is None else None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur file de vérification: {str(e)}")
+
+    now = datetime.utcnow()
+    for item in items:
+        expires = item.get("lease_expires_at")
+        item["leased"] = expires is not None and expires > now
+    return {
+        "items": items,
+        "pending_total": pending,
+        "next_cursor": encode_cursor(items[-1]) if len(items) == limit else None,
+    }
+
+
+@router.post("/admin/verification-queue/claim")
+async def claim_registrations(
+    admin_id: str = Query(..., description="Admin taking the items"),
+    count: int = Query(10, ge=1, le=CLAIM_MAX),
+    lease_seconds: int = Query(DEFAULT_LEASE_SECONDS, ge=30, le=3600),
+    user_type: Optional[str] = Query(None)
+):
+    """Lease the oldest unclaimed pending registrations to one admin"""
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=lease_seconds)
+    claimed = []
+    try:
+        # One atomic find-and-update per item: concurrent claims never overlap
+        for _ in range(count):
+            item = await repos.registrations.claim(admin_id, lease_until, now, user_type)
+            if item is None:
+                break
+            claimed.append(item)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la réservation: {str(e)}")
+    return {"admin_id": admin_id, "lease_expires_at": lease_until, "claimed": claimed}
+
+
+@router.post("/admin/verification-queue/release")
+async def release_registrations(body: dict):
+    """Give back leased registrations without deciding on them"""
+    admin_id = body.get("admin_id")
+    if not admin_id:
+        raise HTTPException(status_code=400, detail="admin_id requis")
+    ids = registration_ids(body)
+    released = await repos.registrations.release(admin_id, ids)
+    return {"admin_id": admin_id, "released": released}
+
+
+@router.post("/admin/verification-queue/decide")
+async def decide_registrations(body: dict):
+    """Approve or reject many pending registrations at once"""
+    action = body.get("action")
+    admin_id = body.get("admin_id")
+    if action not in ["approve", "reject"]:
+        raise HTTPException(status_code=400, detail="Action must be 'approve' or 'reject'")
+    if not admin_id:
+        raise HTTPException(status_code=400, detail="admin_id requis")
+    ids = registration_ids(body)
+
+    new_status = "verified" if action == "approve" else "rejected"
+    try:
+        updated = await repos.registrations.decide(
+            ids, new_status, body.get("admin_comments", ""), admin_id, datetime.utcnow()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la vérification: {str(e)}")
+    return {
+        "action": action,
+        "new_status": new_status,
+        "requested": len(ids),
+        "updated": updated,
+        # Already decided, unknown, or leased by another admin
+        "skipped": len(ids) - updated,
+    }
+
+
+# === SEARCH ANALYTICS ===
+
+def parse_day(day: Optional[str]) -> date:
+    if day is None:
+        return datetime.utcnow().date() - timedelta(days=1)
+    try:
+        return date.fromisoformat(day)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date invalide, format attendu AAAA-MM-JJ")
+
+
+@router.get("/admin/search-analytics")
+async def get_search_analytics(day: Optional[str] = Query(None, description="YYYY-MM-DD, yesterday by default")):
+    """Daily search rollup: totals, top queries and zero-result queries"""
+    rollup = await repos.search_rollups.get(parse_day(day).isoformat())
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Aucune statistique pour ce jour")
+    return rollup
+
+
+@router.post("/admin/search-analytics/rollup")
+async def compute_search_analytics(day: Optional[str] = Query(None, description="YYYY-MM-DD, yesterday by default")):
+    """Recompute the rollup of one day now (today gives a partial rollup)"""
+    target = parse_day(day)
+    try:
+        await search_log.flush()
+        return await rollup(target)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur statistiques de recherche: {str(e)}")
+
+
+@router.post("/admin/vehicles")
+async def add_vehicle(vehicle_data: dict):
+    """Admin endpoint to add new vehicles"""
+    try:
+        vehicle = Vehicle(
+            agency_id=vehicle_data.get("agency_id"),
+            agency_name=vehicle_data.get("agency_name"),
+            model=vehicle_data.get("model"),
+            brand=vehicle_data.get("brand"),
+            year=int(vehicle_data.get("year")),
+            color=vehicle_data.get("color"),
+            license_plate=vehicle_data.get("license_plate"),
+            capacity=int(vehicle_data.get("capacity")),
+            vehicle_type=vehicle_data.get("vehicle_type"),
+            driver_name=vehicle_data.get("driver_name", ""),
+            driver_phone=vehicle_data.get("driver_phone", ""),
+            current_route=vehicle_data.get("current_route", ""),
+        )
+        
+        # Save to database
+        await repos.vehicles.create(vehicle.model_dump())
+        
+        return {
+            "vehicle_id": vehicle.id,
+            "message": "Véhicule ajouté avec succès",
+            "vehicle": vehicle
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur lors de l'ajout du véhicule: {str(e)}")
+
+@router.get("/admin/vehicles")
+async def get_all_vehicles():
+    """Get all vehicles with pagination"""
+    vehicles = await repos.vehicles.all()
+    
+    return {
+        "vehicles": vehicles,
+        "total": len(vehicles)
+    }
+
+@router.put("/admin/vehicles/{vehicle_id}")
+async def update_vehicle(vehicle_id: str, vehicle_data: dict):
+    """Update vehicle information"""
+    vehicle = await repos.vehicles.get(vehicle_id)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    # Update vehicle data
+    update_data = {
+        "model": vehicle_data.get("model", vehicle["model"]),
+        "brand": vehicle_data.get("brand", vehicle["brand"]),
+        "year": int(vehicle_data.get("year", vehicle["year"])),
+        "color": vehicle_data.get("color", vehicle["color"]),
+        "license_plate": vehicle_data.get("license_plate", vehicle["license_plate"]),
+        "capacity": int(vehicle_data.get("capacity", vehicle["capacity"])),
+        "status": vehicle_data.get("status", vehicle["status"]),
+        "driver_name": vehicle_data.get("driver_name", vehicle.get("driver_name", "")),
+        "driver_phone": vehicle_data.get("driver_phone", vehicle.get("driver_phone", "")),
+        "current_route": vehicle_data.get("current_route", vehicle.get("current_route", "")),
+    }
+    
+    await repos.vehicles.update(vehicle_id, update_data)
+    
+    return {
+        "vehicle_id": vehicle_id,
+        "message": "Véhicule mis à jour avec succès",
+        "updated_data": update_data
+    }
+
+@router.delete("/admin/vehicles/{vehicle_id}")
+async def delete_vehicle(vehicle_id: str):
+    """Delete a vehicle"""
+    if not await repos.vehicles.delete(vehicle_id):
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    return {"message": "Véhicule supprimé avec succès"}
+
+@router.post("/admin/courier-carriers")
+async def add_courier_carrier(carrier_data: dict):
+    """Admin endpoint to add courier carriers"""
+    try:
+        carrier = CourierCarrier(
+            name=carrier_data.get("name"),
+            phone=carrier_data.get("phone"),
+            email=carrier_data.get("email", ""),
+            license_number=carrier_data.get("license_number"),
+            vehicle_type=carrier_data.get("vehicle_type"),
+            coverage_areas=carrier_data.get("coverage_areas", []),
+            rating=float(carrier_data.get("rating", 4.0))
+        )
+        
+        await repos.carriers.create(carrier.model_dump())
+        await dispatcher.refresh_carriers()
+        
+        return {
+            "carrier_id": carrier.id,
+            "message": "Transporteur de colis ajouté avec succès",
+            "carrier": carrier
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur: {str(e)}")
+
+@router.get("/admin/dispatch")
+async def get_dispatch_status():
+    """Carriers indexed by this worker and its last dispatch pass"""
+    return {
+        "carriers": len(dispatcher.index.carriers),
+        "coverage_areas": len(dispatcher.index.by_area),
+        "last_pass": dispatcher.last_pass,
+    }
+
+
+@router.post("/admin/dispatch/run")
+async def run_dispatch():
+    """Assign pending parcels to carriers now"""
+    try:
+        await dispatcher.refresh_carriers()
+        counts = await dispatcher.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur d'attribution des colis: {str(e)}")
+    if counts is None:
+        raise HTTPException(status_code=409, detail="Attribution des colis déjà en cours")
+    return counts
+
+@router.get("/admin/payments")
+async def get_payment_reconciliation():
+    """Callbacks queued in this worker and its last reconciliation pass"""
+    return {"callbacks_queued": len(reconciler.callbacks), "last_pass": reconciler.last_pass}
+
+
+@router.post("/admin/payments/reconcile")
+async def run_payment_reconciliation():
+    """Apply queued callbacks and poll due mobile-money transactions now"""
+    try:
+        return await reconciler.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de rapprochement des paiements: {str(e)}")
+
+@router.post("/admin/consolidation/run")
+async def run_consolidation():
+    """Book pending intercity parcels on upcoming departures now"""
+    try:
+        counts = await consolidation.consolidate()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de regroupement des colis: {str(e)}")
+    if counts is None:
+        raise HTTPException(status_code=409, detail="Regroupement des colis déjà en cours")
+    return counts
+
+
+@router.post("/admin/courier-rounds/run")
+async def run_courier_rounds():
+    """Recompute today's rounds of every carrier now"""
+    try:
+        rounds = await courier_rounds.plan_all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de calcul des tournées: {str(e)}")
+    if rounds is None:
+        raise HTTPException(status_code=409, detail="Calcul des tournées déjà en cours")
+    return {
+        "rounds": len(rounds),
+        "parcels": sum(trip["parcels"] for trip in rounds),
+        "distance_km": round(sum(trip["distance_km"] for trip in rounds), 2),
+        "budget_exhausted": sum(1 for trip in rounds if trip["budget_exhausted"]),
+    }
+
+
+@router.get("/admin/consolidation/departures")
+async def get_departure_cargo(day: Optional[str] = Query(None, description="YYYY-MM-DD, today by default")):
+    """Parcel load of each departure of a day"""
+    try:
+        target = date.fromisoformat(day) if day else consolidation.local_now().date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date invalide, format attendu AAAA-MM-JJ")
+    return {"date": target.isoformat(), "departures": await repos.departure_cargo.on_date(target.isoformat())}
+
+@router.post("/admin/app-settings")
+async def update_app_setting(setting_data: dict):
+    """Admin endpoint to update app settings"""
+    try:
+        setting = AppSettings(
+            setting_key=setting_data.get("setting_key"),
+            setting_value=setting_data.get("setting_value"),
+            setting_type=setting_data.get("setting_type", "text"),
+            description=setting_data.get("description", ""),
+            updated_by=setting_data.get("admin_id", "admin")
+        )
+        
+        # Update or insert setting
+        await repos.settings.upsert(setting.model_dump())
+        # Settings (fares among them) can change search results
+        search_cache.invalidate()
+        
+        return {
+            "message": "Paramètre mis à jour avec succès",
+            "setting": setting
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur: {str(e)}")
+
+@router.get("/admin/app-settings")
+async def get_app_settings():
+    """Get all app settings"""
+    settings = await repos.settings.all()
+    
+    return {"settings": settings}
@@ -0,0 +1,197 @@
+"""Bookings, payment calculation and mobile-money callbacks"""
+
+import hmac
+import os
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+import catalog
+import popularity
+from database import mongo_guard
+from models import EnhancedBooking, PaymentMethod, PaymentTransaction
+from payments import MERCHANT_CODES, PROVIDERS, USSD_CODES, provider_name, reconciler
+from pricing import payment_breakdown
+from repositories import repos
+from serialization import ORJSONRoute
+from timetable import format_time, parse_time
+
+router = APIRouter(route_class=ORJSONRoute)
+
+# Shared secret providers send back in X-Callback-Token; every callback is refused when unset
+WEBHOOK_TOKEN = os.environ.get("PAYMENT_WEBHOOK_TOKEN")
+
+
+def booked_route(route_details: dict) -> Optional[tuple]:
+    """Catalog names of the (origin, destination) of a booking, when they can be told"""
+    origin, destination = route_details.get("origin"), route_details.get("destination")
+    if not (origin and destination) and "-" in str(route_details.get("id", "")):
+        origin, destination = catalog.route_endpoints(route_details["id"])
+    snapshot = catalog.store.snapshot
+    origin_city, destination_city = snapshot.city(origin or ""), snapshot.city(destination or "")
+    if origin_city is None or destination_city is None:
+        return None
+    return origin_city["name"], destination_city["name"]
+
+
+def check_departure(route: Optional[tuple], departure_date, departure_time):
+    """Refuse a departure the timetable does not run; bookings it cannot check go through"""
+    timetable = catalog.store.snapshot.timetable
+    if route is None or not timetable.serves(*route):
+        return
+    try:
+        day = date.fromisoformat(str(departure_date)[:10])
+        minutes = parse_time(str(departure_time))
+    except ValueError:
+        return
+    if timetable.has_departure(*route, day, minutes):
+        return
+    others = sorted({departure["departure_time"] for departure in timetable.departures(*route, day)})[:6]
+    detail = f"Aucun départ {route[0]} - {route[1]} le {day.isoformat()} à {format_time(minutes)}"
+    detail += f". Départs ce jour : {', '.join(others)}" if others else ". Aucun départ ce jour"
+    raise HTTPException(status_code=409, detail=detail)
+
+
+@router.post("/booking/enhanced", dependencies=[Depends(mongo_guard)])
+async def create_enhanced_booking(booking_data: dict):
+    """Create enhanced booking with all Connect237 features"""
+    
+    user_id = booking_data.get("user_id")
+    agency_id = booking_data.get("agency_id")
+    route_details = booking_data.get("route_details", {})
+    passenger_count = booking_data.get("passenger_count", 1)
+    custom_count = booking_data.get("custom_passenger_count")
+    
+    # Use custom count if provided
+    final_passenger_count = custom_count if custom_count else passenger_count
+
+    route = booked_route(route_details)
+    check_departure(route, booking_data.get("departure_date"), booking_data.get("departure_time"))
+    
+    # Calculate pricing
+    base_price = route_details.get("price", 5000)
+    total_base_price = base_price * final_passenger_count
+    
+    # Payment method processing
+    payment_method = booking_data.get("payment_method", {})
+    reservation_fee = 500  # Always 500 FCFA for reservation
+    payment = None
+    
+    if payment_method.get("type") == "reservation":
+        payment_status = "reservation"
+        amount_to_pay_now = reservation_fee
+    elif payment_method.get("type") == "mobile_money":
+        provider = provider_name(payment_method.get("provider"))
+        if provider is None:
+            raise HTTPException(status_code=400, detail="Opérateur mobile money inconnu (MTN ou ORANGE)")
+        # Collected and reconciled by the payment worker: never wait for the operator here
+        payment_status = "pending"
+        amount_to_pay_now = total_base_price
+        payment = PaymentTransaction(provider=provider, amount=amount_to_pay_now,
+                                     account_number=payment_method.get("account_number"))
+    else:
+        payment_status = "completed"
+        amount_to_pay_now = total_base_price
+    
+    # Create booking
+    booking = EnhancedBooking(
+        user_id=user_id,
+        route_id=route_details.get("id", "route_default"),
+        agency_id=agency_id,
+        passenger_count=final_passenger_count,
+        custom_passenger_count=custom_count,
+        departure_date=booking_data.get("departure_date"),
+        departure_time=booking_data.get("departure_time"),
+        pickup_location=booking_data.get("pickup_location", {}),
+        dropoff_location=booking_data.get("dropoff_location", {}),
+        base_price=base_price,
+        total_price=total_base_price,
+        payment_method=PaymentMethod(**payment_method),
+        payment_status=payment_status,
+        payment=payment,
+        courier_services=booking_data.get("courier_services", []),
+        special_requests=booking_data.get("special_requests", "")
+    )
+    
+    # Generate QR code
+    booking.qr_code = f"C237_{booking.booking_reference}"
+    
+    # Save to database
+    await repos.bookings.create(booking.model_dump())
+    
+    if route:
+        popularity.routes.record_booking(*route, base_price, booking.departure_time)
+    
+    # Return payment information
+    payment_info = {
+        "booking_id": booking.id,
+        "booking_reference": booking.booking_reference,
+        "amount_to_pay_now": amount_to_pay_now,
+        "payment_status": payment_status,
+        "qr_code": booking.qr_code
+    }
+    
+    # Add payment provider specific info
+    if payment is not None:
+        ussd_code = USSD_CODES[payment.provider]
+        
+        payment_info.update({
+            "payment_reference": payment.reference,
+            "merchant_code": MERCHANT_CODES[payment.provider],
+            "provider": payment.provider,
+            "ussd_code": ussd_code,
+            "instructions": f"Composez {ussd_code} et suivez les instructions. Code marchand: {MERCHANT_CODES[payment.provider]}"
+        })
+    
+    return payment_info
+
+@router.post("/payment/webhook/{provider}", status_code=202)
+async def payment_webhook(provider: str, body: dict, x_callback_token: Optional[str] = Header(None)):
+    """Acknowledge an operator callback at once; the payment worker polls the operator for the outcome"""
+    name = provider_name(provider)
+    if name is None:
+        raise HTTPException(status_code=404, detail="Opérateur inconnu")
+    if not WEBHOOK_TOKEN:
+        raise HTTPException(status_code=503, detail="Notifications de paiement non configurées")
+    if not hmac.compare_digest((x_callback_token or "").encode(), WEBHOOK_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Jeton de rappel invalide")
+    callback = PROVIDERS[name].parse_callback(body)
+    if callback is None:
+        raise HTTPException(status_code=400, detail="Notification de paiement illisible")
+    if not reconciler.enqueue(name, callback):
+        # The operator retries later
+        raise HTTPException(status_code=503, detail="File de notifications pleine", headers={"Retry-After": "5"})
+    return {"received": True, "reference": callback[0]}
+
+@router.get("/payment/status/{reference}", dependencies=[Depends(mongo_guard)])
+async def get_payment_status(reference: str):
+    """Payment status of a booking by transaction reference"""
+    booking = await repos.bookings.by_payment_reference(reference)
+    if booking is None:
+        raise HTTPException(status_code=404, detail="Paiement introuvable")
+    payment = booking["payment"]
+    return {
+        "reference": reference,
+        "booking_id": booking["id"],
+        "booking_reference": booking["booking_reference"],
+        "booking_status": booking["status"],
+        "payment_status": booking["payment_status"],
+        "provider": payment["provider"],
+        "amount": payment["amount"],
+        "transaction_status": payment["status"],
+        "provider_transaction_id": payment.get("provider_transaction_id"),
+        "settled_at": payment.get("settled_at"),
+    }
+
+@router.get("/payment/calculator")
+async def payment_calculator(
+    base_price: int = Query(...),
+    passenger_count: int = Query(1),
+    custom_count: Optional[int] = Query(None),
+    courier_services: int = Query(0),
+    package_value: int = Query(0),  # Valeur du colis en FCFA
+    payment_type: str = Query("full")
+):
+    """Calculate total payment amount with updated rules"""
+    return payment_breakdown(base_price, passenger_count, custom_count, courier_services, package_value)
@@ -0,0 +1,151 @@
+"""Reference catalogs: agencies, attractions, cities, weather and regions"""
+
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+
+import catalog
+from serialization import ORJSONRoute
+from simulation import generate_weather_data
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+def enhanced_cities(snapshot: catalog.CatalogSnapshot) -> List[dict]:
+    """Major cities with current weather, attractions and agency count"""
+    cities = []
+    for city in snapshot.major_cities:
+        weather = generate_weather_data(city["name"], city["region"])
+        cities.append({
+            **city,
+            "current_weather": weather,
+            "attractions": snapshot.attractions_in(city["name"]),
+            "agencies_count": snapshot.agencies_count(city["name"])
+        })
+    return cities
+
+
+def shared_response(name: str, build) -> Response:
+    """A catalog response served from the shared segment, or built when there is none"""
+    body = catalog.store.snapshot.response(name)
+    if body is None:
+        return build()
+    return Response(body, media_type="application/json")
+
+
+@router.get("/agencies")
+async def get_transport_agencies():
+    """Get all registered transport agencies"""
+    return shared_response("agencies", lambda: {"agencies": catalog.agencies()})
+
+@router.get("/agencies/premium")
+async def get_premium_agencies():
+    """Get premium partner agencies"""
+    return shared_response(
+        "premium_agencies", lambda: {"premium_agencies": catalog.store.snapshot.premium_agencies}
+    )
+
+@router.get("/weather/cities")
+async def get_all_weather():
+    """Get weather for all major cities"""
+    snapshot = catalog.store.snapshot
+    try:
+        weather_data = []
+        for city in snapshot.major_cities:
+            weather = generate_weather_data(city["name"], city["region"])
+            weather_data.append(weather)
+        
+        return {"weather_data": weather_data}
+    except Exception as e:
+        return {"error": str(e), "cities_count": len(snapshot.cities)}
+
+@router.get("/weather/{city}")
+async def get_city_weather(city: str):
+    """Get real-time weather for a city"""
+    city_info = catalog.store.snapshot.city(city)
+    
+    if not city_info:
+        raise HTTPException(status_code=404, detail="City not found")
+    
+    weather = generate_weather_data(city_info["name"], city_info["region"])
+    return weather
+
+@router.get("/attractions")
+async def get_tourist_attractions():
+    """Get tourist attractions in Cameroon"""
+    return shared_response("attractions", lambda: {"attractions": catalog.attractions()})
+
+@router.get("/attractions/by-city/{city}")
+async def get_attractions_by_city(city: str):
+    """Get tourist attractions in a specific city"""
+    return {"city": city, "attractions": catalog.store.snapshot.attractions_in(city)}
+
+@router.get("/attractions/along-route")
+async def get_attractions_along_route(
+    origin: str,
+    destination: str,
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Best rated attractions near the road between two served cities"""
+    snapshot = catalog.store.snapshot
+    for city in (origin, destination):
+        if snapshot.city(city) is None:
+            raise HTTPException(status_code=404, detail=f"Ville inconnue: {city}")
+    attractions = snapshot.attractions_along(origin, destination, limit)
+    if attractions is None:
+        raise HTTPException(status_code=404, detail=f"Aucune agence ne dessert {origin} - {destination}")
+    return {
+        "origin": snapshot.city(origin)["name"],
+        "destination": snapshot.city(destination)["name"],
+        "corridor_km": catalog.CORRIDOR_KM,
+        "attractions": attractions,
+    }
+
+@router.get("/cities/enhanced")
+async def get_enhanced_cities():
+    """Get enhanced cities with weather and attractions"""
+    return {"cities": enhanced_cities(catalog.store.snapshot)}
+
+@router.get("/catalog/version")
+async def get_catalog_version():
+    """Version of the catalog data served by this worker"""
+    snapshot = catalog.store.snapshot
+    return {
+        "version": snapshot.version,
+        "generation": snapshot.generation,
+        "loaded_at": snapshot.loaded_at,
+        "counts": {
+            "agencies": len(snapshot.agencies),
+            "attractions": len(snapshot.attractions),
+            "cities": len(snapshot.cities),
+            "regions": len(snapshot.administrative_structure)
+        }
+    }
+
+@router.get("/administrative-structure")
+async def get_administrative_structure():
+    """Obtenir la structure administrative simplifiée du Cameroun avec les chefs-lieux"""
+    return shared_response("administrative_structure", lambda: {"regions": catalog.administrative_structure()})
+
+@router.get("/cities/{region}")
+async def get_cities_by_region(region: str):
+    """Obtenir les villes/chefs-lieux d'une région spécifique"""
+    structure = catalog.administrative_structure()
+    if region not in structure:
+        raise HTTPException(status_code=404, detail="Région non trouvée")
+    
+    region_data = structure[region]
+    
+    return {
+        "region": region,
+        "cities": region_data["cities"]
+    }
+
+@router.post("/admin/catalog/reload")
+async def reload_catalog():
+    """Rebuild the catalog snapshot from data/ and swap it in without a restart"""
+    try:
+        return await catalog.store.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de rechargement du catalogue: {str(e)}")
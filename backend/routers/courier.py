@@ -0,0 +1,167 @@
+"""Courier and parcel delivery"""
+
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+import courier_rounds
+from consolidation import estimate_volume
+from database import mongo_guard
+from dispatch import CarrierIndex
+from models import CourierService
+from pricing import courier_price
+from repositories import repos
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute, dependencies=[Depends(mongo_guard)])
+
+
+@router.post("/courier/book")
+async def book_courier_service(courier: CourierService):
+    """Book courier/parcel delivery service"""
+    
+    # Calculate price based on weight, distance, and urgency
+    total_price = courier_price(courier.weight_kg, courier.declared_value, courier.urgent, courier.insurance)
+    courier.price = total_price
+    if not courier.volume_liters:
+        courier.volume_liters = estimate_volume(courier.package_type, courier.weight_kg)
+    
+    # Save to database
+    await repos.couriers.create(courier.model_dump())
+    
+    return {
+        "courier_id": courier.id,
+        "tracking_number": courier.tracking_number,
+        "total_price": total_price,
+        "estimated_delivery": "24-48 heures" if not courier.urgent else "6-12 heures",
+        "status": "pending",
+        "message": f"Service courrier réservé avec succès. Code de suivi: {courier.tracking_number}"
+    }
+
+@router.get("/courier/track/{tracking_number}")
+async def track_courier(tracking_number: str):
+    """Track courier package"""
+    courier = await repos.couriers.by_tracking_number(tracking_number)
+    
+    if not courier:
+        raise HTTPException(status_code=404, detail="Numéro de suivi introuvable")
+    
+    # Simulate tracking updates
+    statuses = ["pending", "assigned", "collected", "in_transit", "delivered"]
+    current_status_index = statuses.index(courier.get("status", "pending"))
+    
+    tracking_history = []
+    for i, status in enumerate(statuses[:current_status_index + 1]):
+        tracking_history.append({
+            "status": status,
+            "description": {
+                "pending": "Colis en attente de collecte",
+                "assigned": f"Colis confié au transporteur {courier.get('carrier_name', '')}".rstrip(),
+                "collected": "Colis collecté et en préparation",
+                "in_transit": "Colis en transit vers la destination",
+                "delivered": "Colis livré avec succès"
+            }[status],
+            "timestamp": datetime.utcnow() - timedelta(hours=24-i*8)
+        })
+    
+    return {
+        "tracking_number": tracking_number,
+        "current_status": courier["status"],
+        "origin": courier["origin"],
+        "destination": courier["destination"],
+        "recipient": courier["recipient_name"],
+        "carrier": courier.get("carrier_name"),
+        "departure": courier.get("departure"),
+        "tracking_history": tracking_history
+    }
+
+@router.post("/parcel-delivery")
+async def create_parcel_delivery(parcel_data: dict):
+    """Create parcel delivery service (alternative endpoint)"""
+    try:
+        # Map the input data to CourierService model
+        courier_service = CourierService(
+            sender_id=parcel_data.get("sender_id", "anonymous"),
+            recipient_name=parcel_data.get("recipient_name", ""),
+            recipient_phone=parcel_data.get("recipient_phone", ""),
+            origin=parcel_data.get("origin", ""),
+            destination=parcel_data.get("destination", ""),
+            pickup_address=parcel_data.get("pickup_address", ""),
+            delivery_address=parcel_data.get("delivery_address", ""),
+            pickup_coordinates=parcel_data.get("pickup_coordinates"),
+            delivery_coordinates=parcel_data.get("delivery_coordinates"),
+            package_type=parcel_data.get("package_type", "documents"),
+            weight_kg=float(parcel_data.get("weight_kg", 1.0)),
+            volume_liters=parcel_data.get("volume_liters"),
+            declared_value=int(parcel_data.get("declared_value", 10000)),
+            urgent=bool(parcel_data.get("urgent", False)),
+            insurance=bool(parcel_data.get("insurance", False)),
+            pickup_time=parcel_data.get("pickup_time"),
+            delivery_instructions=parcel_data.get("delivery_instructions", "")
+        )
+        
+        # Calculate price
+        total_price = courier_price(
+            courier_service.weight_kg, courier_service.declared_value,
+            courier_service.urgent, courier_service.insurance
+        )
+        courier_service.price = total_price
+        if not courier_service.volume_liters:
+            courier_service.volume_liters = estimate_volume(courier_service.package_type, courier_service.weight_kg)
+        
+        # Save to database
+        await repos.parcels.create(courier_service.model_dump())
+        
+        return {
+            "parcel_id": courier_service.id,
+            "tracking_number": courier_service.tracking_number,
+            "total_price": total_price,
+            "estimated_delivery": "24-48 heures" if not courier_service.urgent else "6-12 heures",
+            "status": "pending",
+            "message": f"Service de livraison créé avec succès. Code: {courier_service.tracking_number}"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur de validation: {str(e)}")
+
+@router.get("/courier/rounds/{carrier_id}")
+async def get_courier_rounds(
+    carrier_id: str,
+    city: Optional[str] = Query(None, description="Only the round in this city"),
+):
+    """Today's stored pickup and delivery stops of a carrier, per city"""
+    day = courier_rounds.local_now().date().isoformat()
+    rounds = await repos.courier_rounds.of_carrier(carrier_id, day)
+    if city:
+        rounds = [trip for trip in rounds if trip["city"] == city]
+    if not rounds:
+        raise HTTPException(status_code=404, detail="Aucune tournée calculée aujourd'hui pour ce transporteur")
+    return {"carrier_id": carrier_id, "date": day, "rounds": rounds}
+
+@router.post("/courier/rounds/{carrier_id}/refresh")
+async def refresh_courier_rounds(
+    carrier_id: str,
+    city: Optional[str] = Query(None, description="Only the round in this city"),
+    budget_ms: float = Query(courier_rounds.ROUTING_BUDGET_MS, ge=10, le=5000)
+):
+    """Recompute and store today's ordered stops of a carrier, per city"""
+    day = courier_rounds.local_now().date().isoformat()
+    try:
+        rounds = await courier_rounds.plan_rounds(carrier_id, city, budget_ms)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de calcul de tournée: {str(e)}")
+    if not rounds:
+        raise HTTPException(status_code=404, detail="Aucun colis attribué à ce transporteur")
+    return {"carrier_id": carrier_id, "date": day, "rounds": rounds}
+
+@router.get("/courier-carriers")
+async def get_courier_carriers(area: Optional[str] = Query(None, description="City or region to cover")):
+    """Get all active courier carriers, or those covering an area"""
+    carriers = await repos.carriers.active()
+    if area:
+        covering = {carrier.id for carrier, _ in CarrierIndex(carriers).candidates(area)}
+        carriers = [carrier for carrier in carriers if carrier["id"] in covering]
+    
+    return {"carriers": carriers}
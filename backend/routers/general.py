@@ -0,0 +1,56 @@
+"""General information: API banner and support contacts"""
+
+from fastapi import APIRouter
+
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+@router.get("/")
+async def root():
+    return {
+        "app": "Connect237 - Ultimate Cameroon Transport Platform",
+        "version": "1.0.0",
+        "features": [
+            "Real-time Vehicle Tracking",
+            "Weather Integration", 
+            "Tourist Attractions",
+            "Courier Services",
+            "Enhanced Payment System",
+            "Custom Passenger Count",
+            "Pickup Location Selection",
+            "Reservation System",
+            "Multi-Agency Support"
+        ],
+        "contact": {
+            "whatsapp": "+237699000000",
+            "email": "support@connect237.cm",
+            "phone": "+237677000000"
+        }
+    }
+
+@router.get("/contact/support")
+async def get_support_contacts():
+    """Get support contact information"""
+    return {
+        "whatsapp": {
+            "number": "+237699000000",
+            "link": "https://wa.me/237699000000",
+            "available": "24/7"
+        },
+        "email": {
+            "address": "support@connect237.cm",
+            "response_time": "2-4 heures"
+        },
+        "call_center": {
+            "number": "+237677000000",
+            "hours": "06:00 - 22:00",
+            "languages": ["Français", "English"]
+        },
+        "emergency": {
+            "number": "+237699999999",
+            "available": "24/7",
+            "services": ["Urgences voyageurs", "Assistance technique"]
+        }
+    }
@@ -0,0 +1,46 @@
+"""Geocoding of free-text addresses against the catalog gazetteer"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from database import mongo_guard
+from geocoding import geocoder
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute, dependencies=[Depends(mongo_guard)])
+
+BATCH_MAX = 5000
+
+
+@router.get("/geocode")
+async def geocode_address(
+    address: str = Query(..., min_length=1),
+    city: Optional[str] = Query(None, description="City the address is expected in")
+):
+    """Coordinates of one address, with a confidence score"""
+    try:
+        place = await geocoder.geocode(address, city)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de géocodage: {str(e)}")
+    if place is None:
+        raise HTTPException(status_code=404, detail="Adresse introuvable")
+    return place
+
+
+@router.post("/geocode/batch")
+async def geocode_addresses(body: dict):
+    """Coordinates of up to BATCH_MAX addresses, in order (null when not found)"""
+    addresses = body.get("addresses")
+    city = body.get("city")
+    if not isinstance(addresses, list) or not addresses or not all(isinstance(value, str) for value in addresses):
+        raise HTTPException(status_code=400, detail="addresses doit être une liste non vide d'adresses")
+    if len(addresses) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Maximum {BATCH_MAX} adresses par lot")
+    if city is not None and not isinstance(city, str):
+        raise HTTPException(status_code=400, detail="city doit être un nom de ville")
+    try:
+        results = await geocoder.geocode_many(addresses, city)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de géocodage: {str(e)}")
+    return {"results": results, "found": sum(1 for result in results if result is not None)}
@@ -0,0 +1,37 @@
+"""Liveness and readiness probes (mounted at the root, outside /api)"""
+
+from fastapi import APIRouter
+
+import database
+from repositories import repos
+from serialization import ORJSONResponse, ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+@router.get("/health/live")
+async def liveness():
+    """The process is up and the event loop answers"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """Ready to take traffic: the storage backend answers a ping within MONGO_READY_TIMEOUT_MS"""
+    try:
+        latency_ms = await repos.ping()
+    except Exception as e:
+        return ORJSONResponse(
+            {
+                "status": "unavailable",
+                "database": {"status": "unreachable", "error": type(e).__name__},
+                "circuit_breaker": database.breaker.state
+            },
+            status_code=503
+        )
+
+    return {
+        "status": "ready",
+        "database": {"status": "ok", "latency_ms": round(latency_ms, 2)},
+        "circuit_breaker": database.breaker.state
+    }
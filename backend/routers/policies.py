@@ -0,0 +1,57 @@
+"""Policy documents (privacy, terms, refund)"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from database import mongo_guard
+from models import PolicyDocument
+from policy_store import DEFAULT_LANGUAGE, cached_response, store
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute, dependencies=[Depends(mongo_guard)])
+
+
+@router.post("/admin/policies")
+async def create_policy_document(policy_data: dict):
+    """Admin endpoint to create/update policy documents"""
+    try:
+        policy = PolicyDocument(
+            title=policy_data.get("title"),
+            content=policy_data.get("content"),
+            document_type=policy_data.get("document_type"),
+            language=policy_data.get("language", DEFAULT_LANGUAGE),
+            version=policy_data.get("version", "1.0")
+        )
+        
+        policy = await store.publish(policy)
+        
+        return {
+            "policy_id": policy.id,
+            "revision": policy.revision,
+            "message": "Document de politique créé avec succès",
+            "policy": policy
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur: {str(e)}")
+
+@router.get("/policies")
+async def get_policies(if_none_match: Optional[str] = Header(None)):
+    """Get all active policy documents"""
+    return cached_response(await store.all(), if_none_match)
+
+@router.get("/policies/{document_type}")
+async def get_policy_by_type(
+    document_type: str,
+    language: str = Query(DEFAULT_LANGUAGE, description="fr, en, ..."),
+    revision: Optional[int] = Query(None, ge=1, description="A past revision instead of the active one"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get specific policy document by type"""
+    cached = await store.get(document_type, language, revision)
+    
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Policy document not found")
+    
+    return cached_response(cached, if_none_match)
@@ -0,0 +1,38 @@
+"""Captured request profiles (see profiling.py)"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+import profiling
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+@router.get("/admin/profiles")
+async def list_profiles():
+    """Profiles in the ring, newest first"""
+    return {
+        "enabled": profiling.settings.enabled,
+        "sample_rate": profiling.settings.sample_rate,
+        "ring_size": profiling.settings.ring_size,
+        "profiles": profiling.store.list()
+    }
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query("collapsed", description="collapsed or speedscope")):
+    """Download a profile as collapsed stacks (flamegraph.pl) or speedscope JSON"""
+    if format not in ["collapsed", "speedscope"]:
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+
+    if format == "speedscope":
+        profile = profiling.store.speedscope(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return profile
+
+    collapsed = profiling.store.collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed)
@@ -0,0 +1,201 @@
+"""Multi-level user registration"""
+
+from datetime import datetime
+from urllib.parse import quote
+import base64
+import io
+import uuid
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from blob_storage import MAX_BYTES, BlobTooLarge, StoredBlob, blobs
+from database import mongo_guard
+from models import UserRegistration
+from repositories import repos
+from serialization import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute, dependencies=[Depends(mongo_guard)])
+
+DOCUMENT_TYPES = {"authorization_transport", "driving_license", "vehicle_photo", "identity_card"}
+# Content types accepted for documents.  Anything else (HTML, SVG...) would run
+# as script on the API origin if a browser ever rendered it.
+DOCUMENT_CONTENT_TYPES = {"application/pdf", "image/jpeg", "image/png"}
+UNSUPPORTED_CONTENT_TYPE = "Format de document non accepté (PDF, JPEG ou PNG)"
+
+REQUIRED_DOCUMENTS = {
+    "client": {"identity_card"},
+    "agency": {"authorization_transport", "identity_card"},
+    "transporter": {"authorization_transport", "driving_license", "vehicle_photo", "identity_card"},
+    "occasional_transporter": {"driving_license", "vehicle_photo", "identity_card"},
+}
+
+
+def document_reference(blob: StoredBlob, document_type: str, file_name: str, content_type: str) -> dict:
+    """What a registration keeps of an uploaded document: metadata and the content hash"""
+    return {
+        "id": str(uuid.uuid4()),
+        "document_type": document_type,
+        "file_name": file_name,
+        "file_size": blob.size,
+        "content_type": content_type,
+        "sha256": blob.sha256,
+        "storage": blobs.name,
+        "uploaded_at": datetime.utcnow(),
+        "verified": False
+    }
+
+
+def inline_content_type(document: dict) -> str:
+    """Declared content type of a base64 document, from its field or its data URL"""
+    header = document["content"].rpartition(",")[0]
+    content_type = document.get("content_type") or (
+        header[5:].split(";")[0] if header.startswith("data:") else "application/octet-stream"
+    )
+    return content_type.strip().lower()
+
+
+async def store_inline_document(document: dict) -> dict:
+    """Move a base64 document sent inside the JSON body into blob storage"""
+    content = document.get("content")
+    if not isinstance(content, str):
+        return document
+
+    # Accept raw base64 or a data URL ("data:image/jpeg;base64,...")
+    data = content.rpartition(",")[2]
+    content_type = inline_content_type(document)
+    stream = io.BytesIO(base64.b64decode(data))
+
+    async def read(size: int) -> bytes:
+        return stream.read(size)
+
+    blob = await blobs.put(read)
+    return document_reference(
+        blob, document.get("document_type", "other"), document.get("file_name", ""), content_type
+    )
+
+
+@router.post("/registration/multi-level")
+async def create_multi_level_registration(registration_data: dict):
+    """Multi-level registration system for different user types"""
+    for document in registration_data.get("documents", []):
+        if isinstance(document.get("content"), str) and inline_content_type(document) not in DOCUMENT_CONTENT_TYPES:
+            raise HTTPException(status_code=415, detail=UNSUPPORTED_CONTENT_TYPE)
+    try:
+        user_registration = UserRegistration(
+            user_type=registration_data.get("user_type", "client"),
+            personal_info=registration_data.get("personal_info", {}),
+            documents=[await store_inline_document(document) for document in registration_data.get("documents", [])],
+            verification_status="pending",
+            admin_comments=""
+        )
+        
+        # Save to database
+        await repos.registrations.create(user_registration.model_dump())
+        
+        # Send verification notification (mock)
+        notification_message = {
+            "client": "Inscription client enregistrée. Vérification en cours.",
+            "agency": "Demande d'agence soumise. Documents en cours de vérification.",
+            "transporter": "Inscription transporteur reçue. Validation administrative requise.",
+            "occasional_transporter": "Inscription transporteur occasionnel en attente d'approbation."
+        }
+        
+        return {
+            "registration_id": user_registration.id,
+            "status": "pending",
+            "message": notification_message.get(user_registration.user_type, "Inscription enregistrée"),
+            "next_steps": [
+                "Vérification des documents par l'équipe administrative",
+                "Validation des informations personnelles",
+                "Notification de statut par SMS/Email"
+            ],
+            "estimated_processing_time": "2-5 jours ouvrables"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur d'inscription: {str(e)}")
+
+@router.get("/registration/status/{registration_id}")
+async def get_registration_status(registration_id: str):
+    """Get registration status and admin feedback"""
+    registration = await repos.registrations.get(registration_id)
+    
+    if not registration:
+        raise HTTPException(status_code=404, detail="Demande d'inscription introuvable")
+    
+    return {
+        "registration_id": registration_id,
+        "status": registration["verification_status"],
+        "user_type": registration["user_type"],
+        "created_at": registration["created_at"],
+        "verified_at": registration.get("verified_at"),
+        "admin_comments": registration.get("admin_comments", ""),
+        "documents_status": {
+            "total_documents": len(registration["documents"]),
+            "verified_documents": len([doc for doc in registration["documents"] if doc.get("verified", False)])
+        }
+    }
+
+@router.post("/register/upload-document")
+async def upload_registration_document(
+    user_id: str = Form(..., description="Registration id"),
+    document_type: str = Form(...),
+    file: UploadFile = File(...)
+):
+    """Upload one registration document, streamed into content-addressed storage"""
+    if document_type not in DOCUMENT_TYPES:
+        raise HTTPException(status_code=400, detail="Type de document invalide")
+    content_type = (file.content_type or "").lower()
+    if content_type not in DOCUMENT_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=UNSUPPORTED_CONTENT_TYPE)
+
+    registration = await repos.registrations.get(user_id)
+    if not registration:
+        raise HTTPException(status_code=404, detail="Demande d'inscription introuvable")
+
+    try:
+        blob = await blobs.put(file.read)
+    except BlobTooLarge:
+        raise HTTPException(
+            status_code=413, detail=f"Fichier trop volumineux (maximum {MAX_BYTES // (1024 * 1024)} Mo)"
+        )
+    finally:
+        await file.close()
+
+    reference = document_reference(blob, document_type, file.filename or "", content_type)
+    await repos.registrations.add_document(user_id, reference)
+
+    documents = registration["documents"] + [reference]
+    uploaded_types = {document.get("document_type") for document in documents}
+    return {
+        "document": reference,
+        "deduplicated": blob.deduplicated,
+        "uploaded_documents": documents,
+        "all_required_uploaded": REQUIRED_DOCUMENTS.get(registration["user_type"], set()) <= uploaded_types
+    }
+
+@router.get("/registration/{registration_id}/documents/{document_id}")
+async def download_registration_document(registration_id: str, document_id: str):
+    """Stream back a document uploaded for a registration"""
+    registration = await repos.registrations.get(registration_id)
+    if not registration:
+        raise HTTPException(status_code=404, detail="Demande d'inscription introuvable")
+
+    document = next(
+        (doc for doc in registration["documents"] if doc.get("id") == document_id and doc.get("sha256")), None
+    )
+    stream = await blobs.open(document["sha256"]) if document else None
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Document introuvable")
+
+    content_type = document.get("content_type")
+    # Always a download, never rendered on the API origin, and never sniffed into something else
+    return StreamingResponse(
+        stream,
+        media_type=content_type if content_type in DOCUMENT_CONTENT_TYPES else "application/octet-stream",
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(document.get('file_name', ''))}",
+            "X-Content-Type-Options": "nosniff",
+        }
+    )
@@ -0,0 +1,153 @@
+"""Smart route search.
+
+Routes and departure times come from the timetable for the requested date.
+When no agency runs the trip directly, ``connections`` lists itineraries with
+changes of bus from the journey planner.
+Results are cached per normalized query (case, accents and surrounding spaces
+ignored) for ``SEARCH_CACHE_TTL`` seconds, within ``SEARCH_CACHE_MAX_BYTES``.
+The cache is emptied when the catalog is swapped, a timetable exception is
+written or app settings change; analytics (popularity, search log) are still
+recorded for every request.
+"""
+
+from datetime import date as Date
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+import catalog
+import popularity
+from search_log import search_log
+from result_cache import ResultCache
+from serialization import ORJSONRoute
+from text_folding import fold
+from timetable import format_time, parse_day, runtime_exceptions, search_window
+
+router = APIRouter(route_class=ORJSONRoute)
+
+search_cache = ResultCache(
+    "search",
+    max_bytes=int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", 30)),
+)
+catalog.store.on_swap(search_cache.invalidate)
+runtime_exceptions.on_change(search_cache.invalidate)
+
+
+def match_cities(snapshot: catalog.CatalogSnapshot, q: str) -> List[dict]:
+    """Cities whose name, region or an alias contains the query (ignoring case and accents)"""
+    query = fold(q)
+    return [city for city, terms in snapshot.city_search_terms if any(query in term for term in terms)]
+
+
+def find_routes(snapshot: catalog.CatalogSnapshot, origin: str, destination: str, day: Date) -> List[dict]:
+    """Agencies running origin -> destination on ``day``, with their remaining departures"""
+    earliest = search_window(day)
+    available_routes = []
+    for schedule, times in snapshot.timetable.services(origin, destination, day):
+        departure_times = [format_time(minutes) for minutes in times if minutes >= earliest]
+        if not departure_times:
+            continue
+        agency = snapshot.agency_by_name.get(schedule.agency, {})
+        available_routes.append({
+            "agency": schedule.agency,
+            "route": f"{schedule.origin}-{schedule.destination}",
+            "schedule_id": schedule.id,
+            "price": schedule.price,
+            "duration": f"{schedule.duration // 60}h{schedule.duration % 60:02d}",
+            "departure_times": departure_times,
+            "vehicle_type": schedule.vehicle_type,
+            "rating": agency.get("rating")
+        })
+    return available_routes
+
+
+def search_key(q: str, origin: Optional[str], destination: Optional[str], date: Optional[str],
+               passengers: int) -> tuple:
+    return fold(q), fold(origin or ""), fold(destination or ""), (date or "").strip(), passengers
+
+
+async def compute_search(q: str, origin: Optional[str], destination: Optional[str], day: Date,
+                         passengers: int) -> dict:
+    """Search results for one normalized query; cached, so identical searches share them"""
+    # Mock smart AI search results (in production, this would use actual AI/ML)
+    search_results = {
+        "suggestions": [],
+        "routes": [],
+        "connections": [],
+        "smart_recommendations": []
+    }
+    
+    snapshot = catalog.store.snapshot
+    
+    # Smart suggestions based on query
+    search_results["suggestions"] = match_cities(snapshot, q)[:5]
+    
+    # Route suggestions
+    route_stats = None
+    if origin and destination:
+        search_results["routes"] = find_routes(snapshot, origin, destination, day)[:10]
+        if not search_results["routes"]:
+            search_results["connections"] = snapshot.planner.plan(
+                origin, destination, day, search_window(day), limit=3
+            ) or []
+        origin_city, destination_city = snapshot.city(origin), snapshot.city(destination)
+        if origin_city and destination_city:
+            route_stats = popularity.routes.stats(origin_city["name"], destination_city["name"])
+    
+    # Smart recommendations: most searched and booked routes lately
+    search_results["smart_recommendations"] = popularity.routes.top(4)
+    
+    # Insights from recent bookings on this route
+    ai_insights = []
+    if route_stats:
+        rank = route_stats["rank"]
+        ai_insights.append(f"{rank}{'er' if rank == 1 else 'e'} trajet le plus demandé en ce moment")
+        if route_stats["peak_hour"] is not None:
+            ai_insights.append(f"Heure de départ la plus demandée: {route_stats['peak_hour']:02d}h00")
+        if route_stats["avg_price"] is not None:
+            ai_insights.append(
+                f"Prix moyen pour {passengers} passager(s): {route_stats['avg_price'] * passengers} FCFA"
+            )
+    
+    search_results["ai_insights"] = ai_insights
+    return search_results
+
+
+@router.get("/routes/search-smart-ai")
+async def smart_ai_search(
+    q: str = Query(..., description="Query string for smart search"),
+    origin: Optional[str] = Query(None, description="Origin city"),
+    destination: Optional[str] = Query(None, description="Destination city"),
+    date: Optional[str] = Query(None, description="Travel date"),
+    passengers: int = Query(1, description="Number of passengers")
+):
+    """Smart AI-powered route search"""
+    try:
+        day = parse_day(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date invalide, format attendu AAAA-MM-JJ")
+    try:
+        search_results = await search_cache.get_or_compute(
+            search_key(q, origin, destination, day.isoformat(), passengers),
+            lambda: compute_search(q, origin, destination, day, passengers)
+        )
+        
+        if origin and destination:
+            snapshot = catalog.store.snapshot
+            origin_city, destination_city = snapshot.city(origin), snapshot.city(destination)
+            if origin_city and destination_city:
+                popularity.routes.record_search(origin_city["name"], destination_city["name"])
+        
+        search_log.record(q, origin, destination, date, passengers,
+                          len(search_results["routes"]), len(search_results["suggestions"]))
+        
+        return {
+            "success": True,
+            "results": {"query": q, **search_results},
+            "total_found": len(search_results["routes"]) + len(search_results["suggestions"])
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de recherche AI: {str(e)}")
@@ -0,0 +1,122 @@
+"""Departure timetables, journeys with connections, and runtime exceptions"""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+import catalog
+from database import mongo_guard
+from repositories import repos
+from serialization import ORJSONRoute
+from planner import MAX_TRANSFERS
+from timetable import parse_day, parse_time, runtime_exceptions, search_window
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+def parse_times(values: List[str]) -> List[str]:
+    try:
+        return sorted({f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in map(parse_time, values)
+                       if 0 <= minutes < 24 * 60})
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail="Heures invalides, format attendu HH:MM")
+
+
+@router.get("/timetable/departures")
+async def get_departures(
+    origin: str,
+    destination: str,
+    date: Optional[str] = Query(None, description="YYYY-MM-DD, today by default"),
+    after: Optional[str] = Query(None, description="HH:MM; now for today, midnight otherwise"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Departures between two cities on a date, earliest first"""
+    try:
+        day = parse_day(date)
+        earliest = parse_time(after) if after else search_window(day)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date ou heure invalide")
+
+    timetable = catalog.store.snapshot.timetable
+    return {
+        "origin": origin,
+        "destination": destination,
+        "date": day.isoformat(),
+        "served": timetable.serves(origin, destination),
+        "departures": timetable.departures(origin, destination, day, earliest, limit),
+    }
+
+
+@router.get("/timetable/journeys")
+async def get_journeys(
+    origin: str,
+    destination: str,
+    date: Optional[str] = Query(None, description="YYYY-MM-DD, today by default"),
+    after: Optional[str] = Query(None, description="HH:MM; now for today, midnight otherwise"),
+    max_transfers: int = Query(MAX_TRANSFERS, ge=0, le=5),
+    limit: int = Query(5, ge=1, le=20)
+):
+    """Itineraries with connections, none beaten on arrival, transfers and price at once"""
+    try:
+        day = parse_day(date)
+        earliest = parse_time(after) if after else search_window(day)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date ou heure invalide")
+
+    itineraries = catalog.store.snapshot.planner.plan(origin, destination, day, earliest, max_transfers, limit)
+    if itineraries is None:
+        raise HTTPException(status_code=404, detail="Ville non desservie par les agences")
+    return {
+        "origin": origin,
+        "destination": destination,
+        "date": day.isoformat(),
+        "itineraries": itineraries,
+    }
+
+
+@router.get("/admin/timetable/exceptions", dependencies=[Depends(mongo_guard)])
+async def get_timetable_exceptions(since: Optional[str] = Query(None, description="YYYY-MM-DD, today by default")):
+    """Runtime timetable exceptions from a date on"""
+    try:
+        day = parse_day(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date invalide")
+    return {"exceptions": await repos.timetable_exceptions.from_date(day.isoformat())}
+
+
+@router.post("/admin/timetable/exceptions", dependencies=[Depends(mongo_guard)])
+async def put_timetable_exception(exception_data: dict):
+    """Cancel a schedule on a date, or replace its departure times for that date"""
+    schedule_id = exception_data.get("schedule_id")
+    if schedule_id not in catalog.store.snapshot.timetable.by_id:
+        raise HTTPException(status_code=404, detail="Horaire introuvable")
+    try:
+        day = date.fromisoformat(str(exception_data.get("date")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date invalide, format attendu AAAA-MM-JJ")
+
+    cancelled = bool(exception_data.get("cancelled", False))
+    exception = {
+        "schedule_id": schedule_id,
+        "date": day.isoformat(),
+        "cancelled": cancelled,
+        "times": [] if cancelled else parse_times(exception_data.get("times") or []),
+        "reason": exception_data.get("reason", ""),
+        "updated_by": exception_data.get("admin_id", "admin"),
+    }
+    if not cancelled and not exception["times"]:
+        raise HTTPException(status_code=400, detail="Indiquez 'cancelled' ou une liste d'heures")
+
+    await repos.timetable_exceptions.put(exception)
+    await runtime_exceptions.refresh()
+    return {"message": "Exception d'horaire enregistrée", "exception": exception}
+
+
+@router.delete("/admin/timetable/exceptions/{schedule_id}/{day}", dependencies=[Depends(mongo_guard)])
+async def delete_timetable_exception(schedule_id: str, day: str):
+    """Restore the regular departures of a schedule on a date"""
+    if not await repos.timetable_exceptions.remove(schedule_id, day):
+        raise HTTPException(status_code=404, detail="Exception introuvable")
+    await runtime_exceptions.refresh()
+    return {"message": "Exception d'horaire supprimée"}
@@ -0,0 +1,37 @@
+"""Real-time vehicle tracking"""
+
+import random
+
+from fastapi import APIRouter
+
+from serialization import ORJSONRoute
+from simulation import simulate_gps_tracking
+
+router = APIRouter(route_class=ORJSONRoute)
+
+
+@router.get("/tracking/{vehicle_id}")
+async def track_vehicle(vehicle_id: str):
+    """Get real-time GPS location of a vehicle"""
+    location = simulate_gps_tracking(vehicle_id)
+    return location
+
+@router.get("/tracking/route/{route_id}")
+async def track_route_vehicles(route_id: str):
+    """Get all vehicles on a specific route"""
+    # Simulate 3-5 vehicles per route
+    num_vehicles = random.randint(3, 5)
+    vehicles = []
+    
+    for i in range(num_vehicles):
+        vehicle_id = f"VH{route_id}{i+1:03d}"
+        location = simulate_gps_tracking(vehicle_id)
+        vehicles.append({
+            "vehicle_id": vehicle_id,
+            "location": location,
+            "occupancy": random.randint(10, 45),
+            "next_stop": random.choice(["Yaoundé", "Douala", "Bafoussam", "Bamenda"]),
+            "eta": f"{random.randint(1, 4)}h{random.randint(0, 59):02d}min"
+        })
+    
+    return {"route_id": route_id, "vehicles": vehicles}
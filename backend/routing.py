@@ -0,0 +1,178 @@
+"""Stop ordering for a courier's round: pickups, deliveries, then the bus station.
+
+``optimize`` is a pure function of coordinates, so it can run in a process
+pool (see ``courier_rounds.py``).  It works on a distance matrix computed once
+(straight-line distance times ``ROAD_FACTOR``, flat ``array('d')``):
+
+1. construction: nearest neighbour from the start, a delivery becoming
+   eligible only once its pickup is on the route;
+2. improvement, until no move helps or ``budget_ms`` runs out:
+   * 2-opt: reverse a stretch of the route;
+   * or-opt: move a run of 1 to 3 consecutive stops elsewhere, same order.
+   A pass over the candidate moves is quadratic in the stops, so the budget
+   is checked within the passes, once per first stop of a move.
+
+A move is only applied if it shortens the route and keeps every pickup
+before its delivery.  The start (and the end, when given) stay in place.
+"""
+
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from geo import Point, haversine_km
+
+# Streets are longer than straight lines
+ROAD_FACTOR = 1.35
+OR_OPT_LENGTHS = (1, 2, 3)
+EPSILON = 1e-9
+
+
+def distance_matrix(points: Sequence[Point]) -> array:
+    size = len(points)
+    matrix = array("d", bytes(8 * size * size))
+    for i in range(size):
+        for j in range(i + 1, size):
+            matrix[i * size + j] = matrix[j * size + i] = haversine_km(points[i], points[j]) * ROAD_FACTOR
+    return matrix
+
+
+class Route:
+    """Stop order over a distance matrix, with pickup -> delivery precedence"""
+
+    def __init__(self, matrix: array, size: int, order: List[int], pickup_of: Dict[int, int], fixed_end: bool,
+                 deadline: float = float("inf")):
+        self.matrix = matrix
+        self.size = size
+        self.order = order
+        self.pickup_of = pickup_of
+        self.delivery_of = {pickup: delivery for delivery, pickup in pickup_of.items()}
+        self.fixed_end = fixed_end
+        # perf_counter() past which moves are no longer searched
+        self.deadline = deadline
+        self.exhausted = False
+
+    def d(self, a: int, b: int) -> float:
+        return self.matrix[a * self.size + b]
+
+    def length(self) -> float:
+        return sum(self.d(a, b) for a, b in zip(self.order, self.order[1:]))
+
+    def _edge(self, i: int) -> float:
+        """Length of the edge leaving position ``i`` (0 past the open end)"""
+        return self.d(self.order[i], self.order[i + 1]) if i + 1 < len(self.order) else 0.0
+
+    def out_of_time(self) -> bool:
+        if not self.exhausted and time.perf_counter() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+    @property
+    def last_movable(self) -> int:
+        return len(self.order) - (2 if self.fixed_end else 1)
+
+    def can_reverse(self, i: int, j: int) -> bool:
+        inside = set(self.order[i:j + 1])
+        return not any(self.pickup_of.get(stop) in inside for stop in inside)
+
+    def two_opt(self) -> bool:
+        """Apply the first improving reversal found; False when there is none (or no time left)"""
+        order, last = self.order, self.last_movable
+        for i in range(1, last):
+            if self.out_of_time():
+                return False
+            a, b = order[i - 1], order[i]
+            removed_ab = self.d(a, b)
+            for j in range(i + 1, last + 1):
+                c = order[j]
+                if j + 1 < len(order):
+                    e = order[j + 1]
+                    delta = self.d(a, c) + self.d(b, e) - removed_ab - self.d(c, e)
+                else:
+                    delta = self.d(a, c) - removed_ab
+                if delta < -EPSILON and self.can_reverse(i, j):
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    return True
+        return False
+
+    def can_move(self, segment: List[int], rest: List[int], position: int) -> bool:
+        """Whether inserting ``segment`` before ``rest[position]`` keeps every pickup before its delivery"""
+        before, after = set(rest[:position]), set(rest[position:])
+        for stop in segment:
+            if self.pickup_of.get(stop) in after or self.delivery_of.get(stop) in before:
+                return False
+        return True
+
+    def or_opt(self) -> bool:
+        """Apply the first improving segment move found; False when there is none (or no time left)"""
+        order, last = self.order, self.last_movable
+        for length in OR_OPT_LENGTHS:
+            for i in range(1, last - length + 2):
+                if self.out_of_time():
+                    return False
+                j = i + length - 1
+                a, first, tail = order[i - 1], order[i], order[j]
+                removed = self.d(a, first) + self._edge(j)
+                if j + 1 < len(order):
+                    removed -= self.d(a, order[j + 1])
+                for k in range(0, len(order) - 1 if self.fixed_end else len(order)):
+                    if i - 1 <= k <= j:
+                        continue
+                    # Insert between order[k] and order[k + 1]
+                    p = order[k]
+                    if k + 1 < len(order):
+                        q = order[k + 1]
+                        added = self.d(p, first) + self.d(tail, q) - self.d(p, q)
+                    else:
+                        added = self.d(p, first)
+                    if added - removed < -EPSILON:
+                        segment = order[i:j + 1]
+                        rest = order[:i] + order[j + 1:]
+                        position = k + 1 if k < i else k + 1 - length
+                        if self.can_move(segment, rest, position):
+                            self.order[:] = rest[:position] + segment + rest[position:]
+                            return True
+        return False
+
+
+def construct(matrix: array, size: int, start: int, end: Optional[int], pickup_of: Dict[int, int]) -> List[int]:
+    """Nearest neighbour from ``start``; deliveries wait for their pickup"""
+    remaining = set(range(size)) - {start} - ({end} if end is not None else set())
+    order = [start]
+    visited = {start}
+    while remaining:
+        current = order[-1]
+        eligible = [stop for stop in remaining if pickup_of.get(stop, start) in visited]
+        nearest = min(eligible, key=lambda stop: matrix[current * size + stop])
+        order.append(nearest)
+        visited.add(nearest)
+        remaining.discard(nearest)
+    if end is not None:
+        order.append(end)
+    return order
+
+
+def optimize(points: Sequence[Point], pickup_of: Dict[int, int], start: int = 0, end: Optional[int] = None,
+             budget_ms: float = 200.0) -> Tuple[List[int], dict]:
+    """Order ``points`` from ``start`` (to ``end`` when given), pickups before deliveries.
+
+    ``pickup_of`` maps a delivery's index to its pickup's.  Returns the order
+    (point indices) and stats: length before and after improvement, moves
+    applied, and whether the time budget cut the search short.
+    """
+    began = time.perf_counter()
+    deadline = began + budget_ms / 1000
+    size = len(points)
+    matrix = distance_matrix(points)
+    route = Route(matrix, size, construct(matrix, size, start, end, pickup_of), pickup_of, end is not None, deadline)
+    constructed = route.length()
+    moves = 0
+    while route.two_opt() or route.or_opt():
+        moves += 1
+    return route.order, {
+        "constructed_km": round(constructed, 3),
+        "distance_km": round(route.length(), 3),
+        "moves": moves,
+        "budget_exhausted": route.exhausted,
+        "elapsed_ms": round((time.perf_counter() - began) * 1000, 2),
+    }
@@ -0,0 +1,153 @@
+"""Search analytics: what people look for in the smart search, and what finds nothing.
+
+The search handler calls ``search_log.record``, which only appends a small
+dict to an in-process buffer.  When the buffer holds ``SEARCH_LOG_QUEUE_SIZE``
+events, new ones are dropped (and counted) rather than slowing the search.
+A background task flushes the buffer every ``SEARCH_LOG_FLUSH_SECONDS`` with
+``insert_many`` batches of ``SEARCH_LOG_BATCH_SIZE`` into ``search_events``.
+That collection is a MongoDB time-series collection, kept for
+``SEARCH_LOG_RETENTION_DAYS``.  An insert into a missing collection would
+create a plain one that never expires, so no batch is written before the
+collection was created (or checked) by this worker; until then, events stay
+buffered and creation is retried at every flush.
+
+Once a day, shortly after midnight UTC, the previous day is rolled up into
+``search_rollups``: totals, top queries, top routes and top zero-result
+queries.  Every worker schedules the rollup, and the one that takes the
+``search_rollup`` job lease (see job_lease.py) runs it.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from typing import Deque, Optional
+
+from job_lease import exclusive
+from metrics import SEARCH_EVENTS
+from repositories import repos
+from text_folding import fold
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.environ.get("SEARCH_LOG_QUEUE_SIZE", 10000))
+BATCH_SIZE = int(os.environ.get("SEARCH_LOG_BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.environ.get("SEARCH_LOG_FLUSH_SECONDS", 2))
+ROLLUP_AFTER = timedelta(minutes=10)  # past midnight UTC
+ROLLUP_TOP = 20
+ROLLUP_LEASE_SECONDS = 3600
+
+_queued = SEARCH_EVENTS.labels("queued")
+_dropped = SEARCH_EVENTS.labels("dropped")
+_written = SEARCH_EVENTS.labels("written")
+_failed = SEARCH_EVENTS.labels("failed")
+
+
+class SearchLog:
+    def __init__(self, max_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.pending: Deque[dict] = deque()
+        self.collection_ready = False
+
+    def record(self, q: str, origin: Optional[str], destination: Optional[str], date: Optional[str],
+               passengers: int, routes_found: int, suggestions_found: int):
+        if len(self.pending) >= self.max_size:
+            _dropped.inc()
+            return
+        self.pending.append({
+            "timestamp": datetime.utcnow(),
+            "meta": {
+                "origin": fold(origin) if origin else None,
+                "destination": fold(destination) if destination else None,
+            },
+            "q": q,
+            "q_normalized": fold(q),
+            "origin": origin,
+            "destination": destination,
+            "date": date,
+            "passengers": passengers,
+            "routes_found": routes_found,
+            "suggestions_found": suggestions_found,
+            "zero_result": routes_found + suggestions_found == 0,
+        })
+        _queued.inc()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; a batch that fails is dropped, not retried"""
+        if not self.pending:
+            return 0
+        if not self.collection_ready:
+            try:
+                await repos.search_events.ensure_indexes()
+            except Exception as e:
+                logger.warning("search_events not ready, keeping %d events buffered: %s", len(self.pending), e)
+                return 0
+            self.collection_ready = True
+        written = 0
+        while self.pending:
+            batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+            try:
+                await repos.search_events.record(batch)
+            except Exception as e:
+                _failed.inc(len(batch))
+                logger.warning("Dropped %d search events: %s", len(batch), e)
+                break
+            _written.inc(len(batch))
+            written += len(batch)
+        return written
+
+    async def run(self, interval: float = FLUSH_INTERVAL):
+        """Background task flushing the buffer every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+
+async def rollup(day: date) -> dict:
+    """Aggregate one UTC day of search events into search_rollups"""
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    events = repos.search_events
+    totals = await events.totals(start, end)
+    top_queries = await events.top(start, end, "$q_normalized", ROLLUP_TOP)
+    top_routes = await events.top(
+        start, end, {"origin": "$meta.origin", "destination": "$meta.destination"}, ROLLUP_TOP,
+        {"meta.origin": {"$ne": None}, "meta.destination": {"$ne": None}},
+    )
+    zero_result = await events.top(
+        start, end, {"q": "$q_normalized", "origin": "$meta.origin", "destination": "$meta.destination"},
+        ROLLUP_TOP, {"zero_result": True},
+    )
+    document = {
+        "day": day.isoformat(),
+        "total": totals["total"],
+        "zero_result_total": totals["zero_result"],
+        "top_queries": [{"q": row["_id"], "count": row["count"]} for row in top_queries],
+        "top_routes": [{**row["_id"], "count": row["count"]} for row in top_routes],
+        "zero_result_queries": [{**row["_id"], "count": row["count"]} for row in zero_result],
+        "computed_at": datetime.utcnow(),
+    }
+    await repos.search_rollups.save(document)
+    return document
+
+
+async def run_daily_rollup():
+    """Background task rolling up the previous day shortly after each midnight UTC"""
+    while True:
+        now = datetime.utcnow()
+        next_run = datetime.combine(now.date(), time.min) + ROLLUP_AFTER
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            # Every worker wakes up now: one rolls up, the others find the lease taken or the job done
+            async with exclusive("search_rollup", ROLLUP_LEASE_SECONDS, ROLLUP_AFTER.total_seconds()) as acquired:
+                if acquired:
+                    await rollup(next_run.date() - timedelta(days=1))
+        except Exception:
+            logger.exception("Search rollup failed")
+
+
+search_log = SearchLog()
@@ -0,0 +1,101 @@
+"""Fast JSON serialization for the Connect237 API.
+
+FastAPI runs every plain return value through ``jsonable_encoder`` before the
+response class renders it, which walks the whole payload in Python.  The
+helpers here skip that step: handlers keep returning dicts / Pydantic models and
+the route class below hands them straight to orjson, which encodes datetimes,
+UUIDs and nested containers natively.
+"""
+
+import functools
+import inspect
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it does not know natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize a response payload to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class: orjson with Pydantic model support"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ORJSONRoute(APIRoute):
+    """APIRoute that renders plain return values directly with orjson.
+
+    Routes declaring a ``response_model`` keep FastAPI's validation path.
+    Everything else is wrapped so the endpoint returns an ``ORJSONResponse``
+    itself, which FastAPI passes through untouched.  FastAPI would merge the
+    status code, headers (cookies) and background of a ``Response`` parameter
+    into the response it builds, so the wrapper does it instead.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        annotated = inspect.signature(endpoint).return_annotation is not inspect.Signature.empty
+        wrapped = getattr(endpoint, "_orjson_route", False)
+        if inspect.iscoroutinefunction(endpoint) and not annotated and not wrapped and (
+            response_model is None or isinstance(response_model, DefaultPlaceholder)
+        ):
+            endpoint = _wrap_endpoint(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _response_parameters(endpoint) -> list:
+    """Names of the endpoint parameters FastAPI fills with the sub-response"""
+    return [
+        name for name, parameter in inspect.signature(endpoint).parameters.items()
+        if inspect.isclass(parameter.annotation) and issubclass(parameter.annotation, Response)
+    ]
+
+
+def _wrap_endpoint(endpoint, status_code):
+    status_code = status_code if isinstance(status_code, int) else 200
+    response_parameters = _response_parameters(endpoint)
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        content = await endpoint(*args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        response = ORJSONResponse(content, status_code=status_code)
+        for name in response_parameters:
+            sub_response = kwargs.get(name)
+            if sub_response is None:
+                continue
+            if sub_response.status_code:
+                response.status_code = sub_response.status_code
+            response.headers.raw.extend(sub_response.headers.raw)
+            if sub_response.background is not None:
+                response.background = sub_response.background
+        return response
+
+    # Routers included into a parent router re-create their routes
+    wrapper._orjson_route = True
+    return wrapper
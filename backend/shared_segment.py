@@ -0,0 +1,135 @@
+"""Read-only data shared by all workers through memory-mapped segment files.
+
+A segment is an immutable file of named binary sections.  It is written once,
+by whichever worker takes the build lock first, and mapped read-only by
+every worker.  The pages live once in the page cache (tmpfs under /dev/shm),
+whatever the number of workers.
+
+A small control file, also memory-mapped, holds the current generation and
+content version.  Publishing a new segment writes ``segment-<generation>``
+first and then bumps the control block under a sequence lock.  Workers compare
+the control generation with the one they have mapped, a single struct read,
+and attach the new file when it changes.  Segment files are never modified
+in place.  Old ones are unlinked after a few generations; a worker still
+holding one keeps a valid mapping until it lets go.
+"""
+
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+MAGIC = b"C237SEG1"
+HEADER = struct.Struct("<8sQI")  # magic, generation, section count
+ENTRY = struct.Struct("<64sQQ")  # section name, offset, length
+CONTROL = struct.Struct("<QQ32s")  # sequence, generation, version
+KEEP_GENERATIONS = 3
+
+
+def default_directory() -> Path:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(os.environ.get("TMPDIR", "/tmp"))
+    return base / "connect237"
+
+
+def write_segment(path: Path, generation: int, sections: Dict[str, bytes]):
+    """Write an immutable segment file (atomically, via a temporary file)"""
+    table_size = HEADER.size + ENTRY.size * len(sections)
+    offset = table_size
+    entries = []
+    for name, data in sections.items():
+        encoded = name.encode()
+        if len(encoded) > 64:
+            raise ValueError(f"Section name too long: {name}")
+        entries.append(ENTRY.pack(encoded, offset, len(data)))
+        offset += len(data)
+
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, generation, len(sections)))
+        handle.writelines(entries)
+        handle.writelines(sections.values())
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """A mapped segment file; sections are zero-copy memoryviews into the mapping"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a segment file")
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        for index in range(count):
+            name, offset, length = ENTRY.unpack_from(self._mmap, HEADER.size + index * ENTRY.size)
+            self._sections[name.rstrip(b"\0").decode()] = (offset, length)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def section(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def bytes(self, name: str) -> bytes:
+        offset, length = self._sections[name]
+        return self._mmap[offset:offset + length]
+
+
+class SegmentControl:
+    """Generation pointer and build lock shared by the workers using one segment family"""
+
+    def __init__(self, directory: Path, family: str):
+        self.directory = directory
+        self.family = family
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{family}.control"
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < CONTROL.size:
+            os.ftruncate(self._fd, CONTROL.size)
+        self._mmap = mmap.mmap(self._fd, CONTROL.size)
+
+    def segment_path(self, generation: int) -> Path:
+        return self.directory / f"{self.family}-{generation}.segment"
+
+    def read(self) -> Tuple[int, str]:
+        """Current (generation, version); generation 0 means nothing published yet"""
+        while True:
+            sequence, generation, version = CONTROL.unpack_from(self._mmap, 0)
+            if sequence % 2 == 0 and CONTROL.unpack_from(self._mmap, 0)[0] == sequence:
+                return generation, version.rstrip(b"\0").decode()
+
+    def generation(self) -> int:
+        return self.read()[0]
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive build lock across processes"""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def publish(self, generation: int, version: str, sections: Dict[str, bytes]):
+        """Write the segment for ``generation`` and point the control block at it (hold ``lock``)"""
+        write_segment(self.segment_path(generation), generation, sections)
+        sequence = CONTROL.unpack_from(self._mmap, 0)[0]
+        struct.pack_into("<Q", self._mmap, 0, sequence + 1)
+        CONTROL.pack_into(self._mmap, 0, sequence + 1, generation, version.encode()[:32])
+        struct.pack_into("<Q", self._mmap, 0, sequence + 2)
+        for path in self.directory.glob(f"{self.family}-*.segment"):
+            try:
+                old = int(path.stem.rsplit("-", 1)[1])
+            except ValueError:
+                continue
+            if old <= generation - KEEP_GENERATIONS:
+                path.unlink(missing_ok=True)
+
+    def attach(self, generation: int) -> Segment:
+        return Segment(self.segment_path(generation))
@@ -0,0 +1,98 @@
+"""Simulated real-time data: city weather and vehicle GPS positions.
+
+Weather is a pure function of the city and a time bucket of
+``WEATHER_BUCKET_SECONDS``.  Every worker reports the same conditions for a
+city until the bucket rolls over, and nothing has to be stored or shared.
+"""
+
+from datetime import datetime
+import os
+import random
+import time
+from typing import Optional
+
+from models import GPSLocation, WeatherInfo
+
+WEATHER_BUCKET_SECONDS = int(os.environ.get("WEATHER_BUCKET_SECONDS", 600))
+
+# Readings of the current bucket, keyed by (city, region); reset when the bucket rolls over
+_weather_bucket = None
+_weather_readings = {}
+
+
+def generate_weather_data(city_name: str, region: str, at: Optional[float] = None) -> WeatherInfo:
+    """Generate realistic weather data for Cameroon cities"""
+    global _weather_bucket
+    bucket = int((time.time() if at is None else at) // WEATHER_BUCKET_SECONDS)
+    if bucket != _weather_bucket:
+        _weather_readings.clear()
+        _weather_bucket = bucket
+    reading = _weather_readings.get((city_name, region))
+    if reading is None:
+        reading = _weather_readings[(city_name, region)] = _bucket_weather(city_name, region, bucket)
+    return reading
+
+
+def _bucket_weather(city_name: str, region: str, bucket: int) -> WeatherInfo:
+    # Seeding with a string hashes it with SHA-512: stable across processes
+    rng = random.Random(f"{city_name}:{bucket}")
+    
+    # Base temperatures by region (Cameroon climate)
+    regional_temps = {
+        "Centre": (22, 32),
+        "Littoral": (24, 31),
+        "Ouest": (18, 28),
+        "Nord-Ouest": (16, 26),
+        "Sud-Ouest": (22, 30),
+        "Sud": (21, 29),
+        "Est": (20, 30),
+        "Adamaoua": (15, 25),
+        "Nord": (20, 35),
+        "Extrême-Nord": (22, 40)
+    }
+    
+    min_temp, max_temp = regional_temps.get(region, (20, 30))
+    temp = rng.uniform(min_temp, max_temp)
+    
+    weather_conditions = [
+        {"desc": "Ensoleillé", "icon": "☀️"},
+        {"desc": "Partiellement nuageux", "icon": "⛅"},
+        {"desc": "Nuageux", "icon": "☁️"},
+        {"desc": "Pluie légère", "icon": "🌦️"},
+        {"desc": "Orageux", "icon": "⛈️"}
+    ]
+    
+    # Rainy season probability (May-October)
+    month = datetime.utcfromtimestamp(bucket * WEATHER_BUCKET_SECONDS).month
+    if 5 <= month <= 10:
+        weather_weights = [0.2, 0.3, 0.2, 0.2, 0.1]
+    else:
+        weather_weights = [0.4, 0.3, 0.2, 0.08, 0.02]
+    
+    weather = rng.choices(weather_conditions, weights=weather_weights)[0]
+    
+    return WeatherInfo(
+        city=city_name,
+        temperature=round(temp, 1),
+        description=weather["desc"],
+        humidity=rng.randint(40, 90),
+        wind_speed=round(rng.uniform(5, 25), 1),
+        icon=weather["icon"],
+        # The reading stands for the whole bucket
+        timestamp=datetime.utcfromtimestamp(bucket * WEATHER_BUCKET_SECONDS)
+    )
+
+def simulate_gps_tracking(vehicle_id: str) -> GPSLocation:
+    """Simulate real-time GPS tracking"""
+    # Random location around Cameroon
+    lat = random.uniform(2.0, 13.0)
+    lng = random.uniform(8.5, 16.0)
+    
+    return GPSLocation(
+        vehicle_id=vehicle_id,
+        latitude=lat,
+        longitude=lng,
+        heading=random.uniform(0, 360),
+        speed_kmh=random.uniform(40, 90),
+        driver_status=random.choice(["active", "break"])
+    )
@@ -0,0 +1,10 @@
+"""Accent- and case-insensitive forms of user text ("Yaoundé " -> "yaounde")."""
+
+import unicodedata
+
+
+def fold(text: str) -> str:
+    """Casefolded, accents stripped, whitespace collapsed"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
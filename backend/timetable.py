@@ -0,0 +1,250 @@
+"""Departure timetables, one schedule per agency and direction.
+
+Schedules come from ``data/timetables.json``, a catalog source compiled,
+versioned and shared with the rest of the catalog.  A schedule stores
+recurrence rules, not departures::
+
+    {"days": [1, 2, 3, 4, 5, 6], "first": "05:00", "last": "21:00", "every": 30}
+    {"days": [7], "times": ["07:00", "12:00", "16:00"]}
+
+Days are ISO weekdays (1 = Monday).  Public holidays (``holidays``, as MM-DD)
+run the Sunday service.  ``transfers`` gives the minimum time to change
+buses in a city (``stations`` overrides ``default_minutes`` where agencies
+have separate stations across town).  A schedule's ``exceptions`` replace the times of one
+date (``times``) or cancel it (``cancelled``).  Operational exceptions, such as
+a day cancelled after a breakdown, are written at runtime to the
+``timetable_exceptions`` collection and take precedence over the file (see
+``RuntimeExceptions``).
+
+Nothing is expanded up front.  The first query for an (origin, destination,
+date) merges the times of every schedule on that pair into one sorted board,
+kept in an LRU.  "Departures after T" is then a bisect on the board.
+"""
+
+import asyncio
+import logging
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from repositories import repos
+from text_folding import fold
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE = ZoneInfo("Africa/Douala")
+BOARD_CACHE_SIZE = 4096
+MINUTES_PER_DAY = 24 * 60
+EXCEPTIONS_REFRESH = float(os.environ.get("TIMETABLE_EXCEPTIONS_REFRESH_SECONDS", 30))
+
+Times = Tuple[int, ...]  # minutes after midnight, sorted
+
+
+def parse_time(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes: int) -> str:
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def local_now() -> datetime:
+    return datetime.now(TIMEZONE)
+
+
+def _rule_times(rule: dict) -> Times:
+    if "times" in rule:
+        return tuple(sorted(parse_time(value) for value in rule["times"]))
+    first, last = parse_time(rule["first"]), parse_time(rule["last"])
+    return tuple(range(first, last + 1, rule["every"]))
+
+
+class Schedule:
+    """One agency's service in one direction, with its rules compiled per weekday"""
+
+    __slots__ = ("id", "agency", "origin", "destination", "duration", "price", "vehicle_type",
+                 "weekday_times", "exceptions", "valid_from", "valid_until")
+
+    def __init__(self, source: dict):
+        self.id = source["id"]
+        self.agency = source["agency"]
+        self.origin = source["origin"]
+        self.destination = source["destination"]
+        self.duration = source["duration_minutes"]
+        self.price = source["price"]
+        self.vehicle_type = source.get("vehicle_type", "Bus climatisé")
+        weekday_times: List[set] = [set() for _ in range(8)]
+        for rule in source["rules"]:
+            for day in rule["days"]:
+                weekday_times[day].update(_rule_times(rule))
+        self.weekday_times: Tuple[Times, ...] = tuple(tuple(sorted(times)) for times in weekday_times)
+        self.exceptions: Dict[str, Times] = {
+            exception["date"]: () if exception.get("cancelled") else tuple(sorted(map(parse_time, exception["times"])))
+            for exception in source.get("exceptions", [])
+        }
+        self.valid_from = source.get("valid_from")
+        self.valid_until = source.get("valid_until")
+
+    def times_on(self, day: date, holiday: bool, override: Optional[Times] = None) -> Times:
+        iso = day.isoformat()
+        if (self.valid_from and iso < self.valid_from) or (self.valid_until and iso > self.valid_until):
+            return ()
+        if override is not None:
+            return override
+        if iso in self.exceptions:
+            return self.exceptions[iso]
+        return self.weekday_times[7 if holiday else day.isoweekday()]
+
+    def departure(self, minutes: int, day: date) -> dict:
+        arrival = minutes + self.duration
+        return {
+            "schedule_id": self.id,
+            "agency": self.agency,
+            "origin": self.origin,
+            "destination": self.destination,
+            "date": day.isoformat(),
+            "departure_time": format_time(minutes),
+            "arrival_time": format_time(arrival),
+            "arrival_day_offset": arrival // MINUTES_PER_DAY,
+            "duration_minutes": self.duration,
+            "price": self.price,
+            "vehicle_type": self.vehicle_type,
+        }
+
+
+class Board:
+    """All departures of one pair on one date, sorted by time"""
+
+    __slots__ = ("minutes", "schedules")
+
+    def __init__(self, entries: List[Tuple[int, Schedule]]):
+        entries.sort(key=lambda entry: entry[0])
+        self.minutes = array("H", (minutes for minutes, _ in entries))
+        self.schedules = [schedule for _, schedule in entries]
+
+
+class RuntimeExceptions:
+    """Exceptions written by admins, mirrored in process and refreshed periodically"""
+
+    def __init__(self):
+        self.overrides: Dict[Tuple[str, str], Times] = {}
+        self.version = 0
+        self._listeners = []
+
+    def on_change(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def get(self, schedule_id: str, day: date) -> Optional[Times]:
+        return self.overrides.get((schedule_id, day.isoformat()))
+
+    async def refresh(self):
+        documents = await repos.timetable_exceptions.from_date(local_now().date().isoformat())
+        overrides = {
+            (document["schedule_id"], document["date"]):
+                () if document.get("cancelled") else tuple(sorted(map(parse_time, document.get("times", []))))
+            for document in documents
+        }
+        if overrides != self.overrides:
+            self.overrides = overrides
+            self.version += 1
+            for callback in self._listeners:
+                callback()
+
+    async def run(self, interval: float = EXCEPTIONS_REFRESH):
+        """Background task picking up exceptions written by other workers"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Timetable exceptions refresh failed")
+            await asyncio.sleep(interval)
+
+
+runtime_exceptions = RuntimeExceptions()
+
+
+class Timetable:
+    """Schedules of one catalog version, indexed by (origin, destination)"""
+
+    def __init__(self, source: dict, exceptions: RuntimeExceptions = runtime_exceptions):
+        self.schedules = [Schedule(schedule) for schedule in source["schedules"]]
+        self.by_id = {schedule.id: schedule for schedule in self.schedules}
+        self.by_pair: Dict[Tuple[str, str], List[Schedule]] = {}
+        for schedule in self.schedules:
+            self.by_pair.setdefault((fold(schedule.origin), fold(schedule.destination)), []).append(schedule)
+        self.holidays = frozenset(source.get("holidays", []))
+        transfers = source.get("transfers", {})
+        self.default_transfer = transfers.get("default_minutes", 30)
+        self.transfers = {fold(city): minutes for city, minutes in transfers.get("stations", {}).items()}
+        self.exceptions = exceptions
+        self._boards: "OrderedDict[tuple, Board]" = OrderedDict()
+
+    def is_holiday(self, day: date) -> bool:
+        return day.strftime("%m-%d") in self.holidays
+
+    def transfer_minutes(self, city: str) -> int:
+        return self.transfers.get(fold(city), self.default_transfer)
+
+    def serves(self, origin: str, destination: str) -> bool:
+        return (fold(origin), fold(destination)) in self.by_pair
+
+    def services(self, origin: str, destination: str, day: date) -> List[Tuple[Schedule, Times]]:
+        """Each schedule on the pair with its departure times that day (schedules not running are left out)"""
+        holiday = self.is_holiday(day)
+        services = []
+        for schedule in self.by_pair.get((fold(origin), fold(destination)), []):
+            times = schedule.times_on(day, holiday, self.exceptions.get(schedule.id, day))
+            if times:
+                services.append((schedule, times))
+        return services
+
+    def board(self, origin: str, destination: str, day: date) -> Board:
+        key = (fold(origin), fold(destination), day, self.exceptions.version)
+        board = self._boards.get(key)
+        if board is not None:
+            self._boards.move_to_end(key)
+            return board
+        board = Board([
+            (minutes, schedule)
+            for schedule, times in self.services(origin, destination, day)
+            for minutes in times
+        ])
+        self._boards[key] = board
+        if len(self._boards) > BOARD_CACHE_SIZE:
+            self._boards.popitem(last=False)
+        return board
+
+    def departures(self, origin: str, destination: str, day: date, after: int = 0,
+                   limit: Optional[int] = None) -> List[dict]:
+        """Departures on ``day`` at or after ``after`` (minutes), earliest first"""
+        board = self.board(origin, destination, day)
+        start = bisect_left(board.minutes, after)
+        end = len(board.minutes) if limit is None else min(len(board.minutes), start + limit)
+        return [board.schedules[index].departure(board.minutes[index], day) for index in range(start, end)]
+
+    def has_departure(self, origin: str, destination: str, day: date, minutes: int) -> bool:
+        board = self.board(origin, destination, day)
+        index = bisect_left(board.minutes, minutes)
+        return index < len(board.minutes) and board.minutes[index] == minutes
+
+
+def search_window(day: date) -> int:
+    """Earliest departure worth showing on ``day``: now for today, midnight otherwise"""
+    now = local_now()
+    if day == now.date():
+        return now.hour * 60 + now.minute
+    return 0
+
+
+def parse_day(value: Optional[str]) -> date:
+    """ISO date, today (local time) when empty; ValueError when malformed"""
+    if not value:
+        return local_now().date()
+    return date.fromisoformat(value.strip()[:10])
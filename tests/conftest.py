@@ -0,0 +1,24 @@
+"""Tests run against the in-memory repository backend, with the backend modules importable as in production"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "connect237_test")
+os.environ["REPOSITORY_BACKEND"] = "memory"
+
+from repositories import MemoryBackend, repos  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def memory_backend():
+    """A fresh, empty backend for every test"""
+    previous = repos.backend
+    repos.use_backend(MemoryBackend())
+    yield repos.backend
+    repos.use_backend(previous)
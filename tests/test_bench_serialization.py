@@ -0,0 +1,24 @@
+import json
+import sys
+
+from fastapi.responses import Response
+
+import benchmarks.bench_serialization as bench
+
+
+def test_every_endpoint_serializes_the_same_document_both_ways():
+    payloads = bench.endpoint_payloads()
+    # Catalog endpoints answer with the response prebuilt from the shared segment
+    assert any(isinstance(payload, Response) for _, payload in payloads)
+    for endpoint, payload in payloads:
+        document = json.loads(payload.body) if isinstance(payload, Response) else payload
+        assert json.loads(bench.before(document)) == json.loads(bench.after(payload)), endpoint
+
+
+def test_benchmark_runs(monkeypatch, tmp_path, capsys):
+    output = tmp_path / "results.json"
+    monkeypatch.setattr(sys, "argv", ["bench_serialization.py", "--number", "1", "--json", str(output)])
+    bench.main()
+    results = json.loads(output.read_text())["results"]
+    assert len(results) == len(bench.endpoint_payloads())
+    assert all(result["bytes"] > 0 for result in results)
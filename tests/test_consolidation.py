@@ -0,0 +1,44 @@
+from consolidation import Hold, pack
+
+
+def departure(time, vehicle_type="Bus standard"):
+    return {"schedule_id": "s1", "date": "2026-10-19", "departure_time": time, "vehicle_type": vehicle_type}
+
+
+def parcel(id, weight_kg, urgent=False):
+    return "parcels", {"id": id, "weight_kg": weight_kg, "volume_liters": 1.0, "urgent": urgent}
+
+
+def contents(hold):
+    return [parcel_id for _, parcel_id in hold.parcels]
+
+
+def test_pack_is_first_fit_decreasing_over_the_earliest_holds():
+    holds = [Hold(departure("08:00"), None), Hold(departure("10:00"), None)]
+    leftovers = pack([parcel("p50", 50), parcel("p200", 200), parcel("p100", 100), parcel("p150", 150)], holds)
+    assert leftovers == []
+    assert contents(holds[0]) == ["p200", "p100"]
+    assert contents(holds[1]) == ["p150", "p50"]
+    assert holds[0].free_kg == 0 and holds[1].free_kg == 100
+
+
+def test_pack_puts_urgent_parcels_first():
+    holds = [Hold(departure("08:00"), None)]
+    leftovers = pack([parcel("big", 250), parcel("urgent", 100, urgent=True)], holds)
+    assert contents(holds[0]) == ["urgent"]
+    assert [item["id"] for _, item in leftovers] == ["big"]
+
+
+def test_pack_counts_the_load_already_aboard():
+    holds = [Hold(departure("08:00"), {"weight_kg": 280.0, "volume_liters": 100.0}), Hold(departure("10:00"), None)]
+    leftovers = pack([parcel("p30", 30), parcel("p10", 10)], holds)
+    assert leftovers == []
+    assert contents(holds[0]) == ["p10"]
+    assert contents(holds[1]) == ["p30"]
+
+
+def test_pack_leaves_over_what_fits_nowhere():
+    holds = [Hold(departure("08:00"), None)]
+    leftovers = pack([parcel("heavy", 301), parcel("light", 1)], holds)
+    assert [item["id"] for _, item in leftovers] == ["heavy"]
+    assert contents(holds[0]) == ["light"]
@@ -0,0 +1,58 @@
+import asyncio
+
+from job_lease import exclusive
+from repositories import repos
+
+
+def test_one_holder_at_a_time():
+    async def scenario():
+        async with exclusive("job", ttl=60) as first:
+            async with exclusive("job", ttl=60) as second:
+                assert first and not second
+            async with exclusive("other-job", ttl=60) as other:
+                assert other
+        async with exclusive("job", ttl=60) as again:
+            assert again
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_runs_hold_the_job_once():
+    async def run(held):
+        async with exclusive("job", ttl=60) as acquired:
+            if acquired:
+                held.append(1)
+                await asyncio.sleep(0.01)
+            return acquired
+
+    async def scenario():
+        held = []
+        results = await asyncio.gather(*(run(held) for _ in range(5)))
+        assert results.count(True) == 1 and held == [1]
+
+    asyncio.run(scenario())
+
+
+def test_min_interval_skips_a_run_finished_recently():
+    async def scenario():
+        async with exclusive("job", ttl=60) as acquired:
+            assert acquired
+        async with exclusive("job", ttl=60, min_interval=3600) as acquired:
+            assert not acquired
+        async with exclusive("job", ttl=60, min_interval=0) as acquired:
+            assert acquired
+
+    asyncio.run(scenario())
+
+
+def test_an_expired_lease_is_taken_over():
+    async def scenario():
+        async with exclusive("job", ttl=0) as first:
+            assert first
+            # The holder died without releasing: its lease has run out
+            async with exclusive("job", ttl=60) as second:
+                assert second
+            lease = await repos.job_leases.find_one({"name": "job"})
+            assert lease["finished_at"] is not None
+
+    asyncio.run(scenario())
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import payments
+from payments import OPEN_STATUSES, PaymentReconciler, settlement
+from repositories import repos
+from routers import booking
+
+
+def transaction(reference, status="created", provider="MTN", **fields):
+    now = datetime.utcnow()
+    return {
+        "id": f"booking-{reference}",
+        "booking_reference": reference.upper(),
+        "status": "reserved",
+        "payment_status": "pending",
+        "payment": {
+            "reference": reference, "provider": provider, "amount": 5000, "status": status, "attempts": 0,
+            "created_at": now, "next_poll_at": now, "requested_at": now if status == "pending" else None, **fields,
+        },
+    }
+
+
+async def payment(reference):
+    return await repos.bookings.by_payment_reference(reference)
+
+
+def test_two_passes_claim_each_transaction_once():
+    async def scenario():
+        for i in range(20):
+            await repos.bookings.create(transaction(f"ref-{i}"))
+        first, second = await asyncio.gather(PaymentReconciler().run_once(), PaymentReconciler().run_once())
+        assert first["claimed"] + second["claimed"] == 20
+        assert first["written"] + second["written"] == 20
+        assert [(await payment(f"ref-{i}"))["payment"]["status"] for i in range(20)] == ["pending"] * 20
+
+    asyncio.run(scenario())
+
+
+def test_a_claim_taken_over_can_no_longer_settle():
+    async def scenario():
+        await repos.bookings.create(transaction("ref", status="pending"))
+        now = datetime.utcnow()
+        stale = await repos.bookings.claim_payments(OPEN_STATUSES, now, now, "stale", 10)
+        # The first claim ran out: another pass claims the transaction
+        later = now + timedelta(seconds=1)
+        fresh = await repos.bookings.claim_payments(OPEN_STATUSES, later, later + timedelta(minutes=1), "fresh", 10)
+        assert len(stale) == len(fresh) == 1
+        assert await repos.bookings.update_payments({"ref": ("stale", settlement("failed", later))}, OPEN_STATUSES) == 0
+        assert await repos.bookings.update_payments({"ref": ("fresh", settlement("successful", later))},
+                                                    OPEN_STATUSES) == 1
+        # Settled: nothing changes it any more, claim or not
+        assert await repos.bookings.update_payments({"ref": ("fresh", settlement("failed", later))}, OPEN_STATUSES) == 0
+        settled = await payment("ref")
+        assert (settled["payment"]["status"], settled["payment_status"], settled["status"]) == \
+            ("successful", "completed", "confirmed")
+
+    asyncio.run(scenario())
+
+
+def test_expired_transactions_fail():
+    async def scenario():
+        created_at = datetime.utcnow() - payments.TIMEOUT - timedelta(minutes=1)
+        await repos.bookings.create(transaction("ref", status="pending", created_at=created_at))
+        assert (await PaymentReconciler().run_once())["expired"] == 1
+        expired = await payment("ref")
+        assert (expired["payment"]["status"], expired["payment_status"]) == ("expired", "failed")
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    monkeypatch.setattr(booking, "WEBHOOK_TOKEN", "secret")
+    booking.reconciler.callbacks.clear()
+    app = FastAPI()
+    app.include_router(booking.router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
+    booking.reconciler.callbacks.clear()
+
+
+def test_webhook_refuses_callbacks_without_the_token(webhook, monkeypatch):
+    body = {"externalId": "ref", "status": "SUCCESSFUL", "financialTransactionId": "F1"}
+    assert webhook.post("/api/payment/webhook/mtn", json=body).status_code == 401
+    assert webhook.post("/api/payment/webhook/mtn", json=body, headers={"X-Callback-Token": "guess"}).status_code == 401
+    monkeypatch.setattr(booking, "WEBHOOK_TOKEN", None)
+    assert webhook.post("/api/payment/webhook/mtn", json=body, headers={"X-Callback-Token": ""}).status_code == 503
+    assert not booking.reconciler.callbacks
+
+
+def test_a_callback_does_not_settle_a_payment_on_its_own(webhook):
+    async def seed():
+        # Requested a moment ago: the provider still answers "pending" to a poll
+        await repos.bookings.create(transaction("ref", status="pending"))
+        await repos.bookings.bulk_update([({"payment.reference": "ref"},
+                                           {"$set": {"payment.next_poll_at": datetime.utcnow() + timedelta(hours=1)}})])
+
+    asyncio.run(seed())
+    response = webhook.post(
+        "/api/payment/webhook/mtn", headers={"X-Callback-Token": "secret"},
+        json={"externalId": "ref", "status": "SUCCESSFUL", "financialTransactionId": "F1"},
+    )
+    assert response.status_code == 202
+
+    async def reconcile():
+        counts = await booking.reconciler.run_once()
+        # The callback made the transaction due for a poll now, and the poll found it still pending
+        assert (counts["callbacks"], counts["polled"], counts["pending"]) == (1, 1, 1)
+        forged = await payment("ref")
+        assert (forged["payment"]["status"], forged["payment_status"], forged["status"]) == \
+            ("pending", "pending", "reserved")
+
+    asyncio.run(reconcile())
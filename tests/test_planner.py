@@ -0,0 +1,53 @@
+from datetime import date
+
+from planner import Planner
+from timetable import RuntimeExceptions, Timetable
+
+EVERY_DAY = [1, 2, 3, 4, 5, 6, 7]
+
+
+def schedule(id, origin, destination, time, duration, price):
+    return {
+        "id": id, "agency": "Test", "origin": origin, "destination": destination,
+        "duration_minutes": duration, "price": price, "rules": [{"days": EVERY_DAY, "times": [time]}],
+    }
+
+
+def planner():
+    return Planner(Timetable({
+        "schedules": [
+            schedule("express", "Douala", "Garoua", "07:00", 240, 15000),
+            schedule("direct", "Douala", "Garoua", "08:00", 600, 10000),
+            # Arrives later than "direct" for more: never an answer
+            schedule("slow", "Douala", "Garoua", "09:00", 600, 12000),
+            schedule("first-leg", "Douala", "Yaoundé", "08:00", 120, 3000),
+            schedule("second-leg", "Yaoundé", "Garoua", "10:30", 180, 4000),
+        ],
+        "transfers": {"default_minutes": 30},
+    }, RuntimeExceptions()))
+
+
+def test_plan_returns_the_pareto_set_earliest_first():
+    itineraries = planner().plan("Douala", "Garoua", date(2026, 10, 19))
+    summary = [(it["departure_time"], it["arrival_time"], it["price"], it["transfers"]) for it in itineraries]
+    assert summary == [
+        ("07:00", "11:00", 15000, 0),
+        ("08:00", "13:30", 7000, 1),
+        ("08:00", "18:00", 10000, 0),
+    ]
+    assert itineraries[1]["via"] == ["Yaoundé"]
+    assert itineraries[1]["legs"][1]["wait_minutes"] == 30
+
+
+def test_plan_respects_the_transfer_time():
+    timetable = planner().timetable
+    timetable.transfers["yaounde"] = 45
+    connection = [it for it in Planner(timetable).plan("Douala", "Garoua", date(2026, 10, 19)) if it["transfers"]]
+    # The 10:30 is missed: the cheapest itinerary now takes the next day's
+    assert [(it["arrival_date"], it["arrival_time"], it["price"]) for it in connection] == [("2026-10-20", "13:30", 7000)]
+    assert connection[0]["legs"][1]["wait_minutes"] == 24 * 60 + 30
+
+
+def test_plan_without_service():
+    assert planner().plan("Douala", "Bertoua", date(2026, 10, 19)) is None
+    assert planner().plan("Douala", "douala", date(2026, 10, 19)) == []
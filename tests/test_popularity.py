@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from popularity import CountMinSketch, PopularityState, RoutePopularity
+from repositories import repos
+
+NOW = 1_700_000_000.0
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {f"route-{i}": i % 7 + 1 for i in range(200)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+
+
+def test_merged_sketches_equal_one_sketch_of_both_streams():
+    left, right, both = CountMinSketch(), CountMinSketch(), CountMinSketch()
+    for i in range(100):
+        key = f"route-{i % 13}"
+        (left if i % 2 else right).add(key, 1.0)
+        both.add(key, 1.0)
+    left.merge(right)
+    assert left.table == both.table
+
+
+def test_merged_states_keep_the_top_routes():
+    first, second = PopularityState(NOW), PopularityState(NOW)
+    first.record("douala-yaounde", 3, NOW, price=5000, hour=8)
+    second.record("douala-yaounde", 2, NOW, price=7000, hour=8)
+    second.record("douala-bafoussam", 1, NOW)
+    first.merge(second)
+    ranking = first.ranking(10, NOW)
+    assert [entry["route"] for entry in ranking] == ["douala-yaounde", "douala-bafoussam"]
+    assert ranking[0]["score"] >= 5 and ranking[0]["avg_price"] == 6000
+
+
+def test_checkpoints_of_two_workers_add_up():
+    async def scenario():
+        a, b = RoutePopularity("test"), RoutePopularity("test")
+        a.record("douala-yaounde", 3)
+        b.record("douala-yaounde", 2)
+        await a.checkpoint()
+        await b.checkpoint()
+        assert b.version == 2
+        assert b.view.sketch.estimate("douala-yaounde") >= 5
+        restored = RoutePopularity("test")
+        await restored.restore()
+        assert restored.view.sketch.estimate("douala-yaounde") == b.view.sketch.estimate("douala-yaounde")
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_checkpoint_keeps_its_events(monkeypatch):
+    async def unavailable(*args):
+        raise ConnectionError("mongo down")
+
+    async def scenario():
+        popularity = RoutePopularity("test")
+        popularity.record("douala-yaounde", 3)
+        monkeypatch.setattr(repos.sketches, "save", unavailable)
+        with pytest.raises(ConnectionError):
+            await popularity.checkpoint()
+        assert popularity.pending.sketch.estimate("douala-yaounde") >= 3
+        monkeypatch.undo()
+        await popularity.checkpoint()
+        assert popularity.pending.sketch.estimate("douala-yaounde") == 0
+        assert (await repos.sketches.load("test"))["version"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_lost_race_keeps_its_events(monkeypatch):
+    async def lost(*args):
+        return False
+
+    async def scenario():
+        popularity = RoutePopularity("test")
+        popularity.record("douala-yaounde", 3)
+        monkeypatch.setattr(repos.sketches, "save", lost)
+        await popularity.checkpoint(attempts=2)
+        assert popularity.version == 0
+        assert popularity.pending.sketch.estimate("douala-yaounde") >= 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from result_cache import ResultCache
+
+
+def cache():
+    return ResultCache("test", max_bytes=1 << 20, ttl=60)
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def scenario():
+        results_cache = cache()
+        results = await asyncio.gather(*(results_cache.get_or_compute("key", compute) for _ in range(10)))
+        assert results == [{"value": 42}] * 10
+        assert await results_cache.get_or_compute("key", compute) == {"value": 42}
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_an_error_reaches_every_waiter_and_is_not_cached():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        results_cache = cache()
+        results = await asyncio.gather(*(results_cache.get_or_compute("key", compute) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+        with pytest.raises(ValueError):
+            await results_cache.get_or_compute("key", compute)
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_leader_hands_over_to_a_waiter():
+    started = []
+
+    async def compute():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return len(started)
+
+    async def scenario():
+        results_cache = cache()
+        leader = asyncio.create_task(results_cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(results_cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # The follower computes instead, and its answer is cached
+        assert await follower == 2
+        assert results_cache.get("key") == 2
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_waiter_leaves_the_computation_running():
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        results_cache = cache()
+        leader = asyncio.create_task(results_cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(results_cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        assert await leader == "done"
+        assert follower.cancelled()
+        assert results_cache.get("key") == "done"
+
+    asyncio.run(scenario())
+
+
+def test_results_computed_across_an_invalidation_are_not_kept():
+    async def scenario():
+        results_cache = cache()
+
+        async def compute():
+            results_cache.invalidate()
+            return "stale"
+
+        assert await results_cache.get_or_compute("key", compute) == "stale"
+        assert results_cache.get("key") is None
+
+    asyncio.run(scenario())
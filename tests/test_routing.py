@@ -0,0 +1,57 @@
+import random
+
+from routing import Route, distance_matrix, optimize
+
+
+def precedence_holds(order, pickup_of):
+    position = {stop: index for index, stop in enumerate(order)}
+    return all(position[pickup] < position[delivery] for delivery, pickup in pickup_of.items())
+
+
+def random_round(seed, parcels):
+    rng = random.Random(seed)
+    points = [(4.05, 9.7)] + [(4.05 + rng.uniform(-0.05, 0.05), 9.7 + rng.uniform(-0.05, 0.05))
+                              for _ in range(2 * parcels)]
+    # Stop 2k + 1 picks up parcel k, stop 2k + 2 delivers it
+    pickup_of = {2 * k + 2: 2 * k + 1 for k in range(parcels)}
+    return points, pickup_of
+
+
+def test_optimize_keeps_pickups_before_deliveries():
+    for seed in range(20):
+        points, pickup_of = random_round(seed, 12)
+        order, stats = optimize(points, pickup_of, start=0, budget_ms=1000)
+        assert sorted(order) == list(range(len(points)))
+        assert order[0] == 0
+        assert precedence_holds(order, pickup_of)
+        assert stats["distance_km"] <= stats["constructed_km"]
+        assert not stats["budget_exhausted"]
+
+
+def test_optimize_keeps_the_end_in_place():
+    points, pickup_of = random_round(1, 8)
+    points.append((4.0, 9.6))
+    end = len(points) - 1
+    order, _ = optimize(points, pickup_of, start=0, end=end, budget_ms=1000)
+    assert order[0] == 0 and order[-1] == end
+    assert precedence_holds(order, pickup_of)
+
+
+def test_two_opt_does_not_reverse_a_pickup_past_its_delivery():
+    # On a line: start 0, delivery at 1, its pickup at 2.  Reversing 1..2 would
+    # shorten the route but deliver before picking up
+    points = [(0.0, 0.0), (0.0, 0.01), (0.0, 0.02)]
+    route = Route(distance_matrix(points), 3, [0, 2, 1], {1: 2}, fixed_end=False)
+    assert not route.can_reverse(1, 2)
+    assert not route.two_opt()
+    assert route.order == [0, 2, 1]
+
+
+def test_or_opt_does_not_move_a_delivery_before_its_pickup():
+    points = [(0.0, 0.0), (0.0, 0.01), (0.0, 0.02), (0.0, 0.03)]
+    route = Route(distance_matrix(points), 4, [0, 3, 2, 1], {1: 3}, fixed_end=False)
+    assert not route.can_move([1], [0, 3, 2], 1)
+    assert route.can_move([1], [0, 3, 2], 2)
+    while route.or_opt():
+        pass
+    assert precedence_holds(route.order, {1: 3})